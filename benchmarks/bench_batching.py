@@ -0,0 +1,72 @@
+# benchmarks/bench_batching.py
+"""
+Throughput / latency curve of the asyncio MicroBatcher versus unbatched
+per-transaction scoring, under a closed-loop load of concurrent clients.
+Unbatched calls run inline on the event loop, so their latency excludes
+queueing behind other clients.
+
+Usage:
+    python -m benchmarks.bench_batching --clients 256 --batch-sizes 1 8 32 128 --waits-us 200 1000
+"""
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from benchmarks.bench_scoring import train_model
+from src.batching import MicroBatcher
+from src.scoring import FraudScorer
+
+
+async def closed_loop(score, records, clients: int) -> tuple:
+    """Each client scores its share of records back to back; returns (latencies, wall seconds)."""
+    samples = []
+
+    async def client(chunk):
+        for record in chunk:
+            start = time.perf_counter()
+            await score(record)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(records[i::clients]) for i in range(clients)))
+    return np.array(samples), time.perf_counter() - start
+
+
+def report(label: str, samples: np.ndarray, wall: float):
+    p50, p99 = np.percentile(samples, [50, 99]) * 1e3
+    print(f"{label:<22} {len(samples) / wall:>12,.0f} {p50:>9.2f} {p99:>9.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--clients', type=int, default=256)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--waits-us', type=int, nargs='+', default=[200, 1000])
+    args = parser.parse_args(argv)
+
+    preprocessor, model, X_raw = train_model(args.rows)
+    records = X_raw.to_dict('records')
+    records = (records * (args.requests // len(records) + 1))[:args.requests]
+    scorer = FraudScorer(preprocessor, model)
+
+    async def unbatched(record):
+        return scorer.score_one(record)
+
+    async def run_batched(batch_size, wait_us):
+        async with MicroBatcher(scorer.score_batch, max_batch_size=batch_size, max_wait_us=wait_us) as batcher:
+            return await closed_loop(batcher.score, records, args.clients)
+
+    print(f"{len(records):,} requests from {args.clients} concurrent clients")
+    print(f"{'mode':<22} {'req/s':>12} {'p50 ms':>9} {'p99 ms':>9}")
+    report('unbatched', *asyncio.run(closed_loop(unbatched, records, args.clients)))
+    for wait_us in args.waits_us:
+        for batch_size in args.batch_sizes:
+            report(f"batch={batch_size} wait={wait_us}us", *asyncio.run(run_batched(batch_size, wait_us)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_categorical.py
+"""
+One-hot vs native categorical encoding on a full-size Fraud_Data with the
+modeling notebook's feature set (country has ~180 categories): width of the
+design matrix, preprocessing + SMOTE time, XGBoost training time, model size
+(UBJSON bytes), batch and single-transaction inference latency, and test AUC-PR.
+
+Usage:
+    python -m benchmarks.bench_categorical --rows 151112
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+from sklearn.metrics import average_precision_score
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import make_fraud_data, make_ip_table
+from src.data_cleaning import remove_duplicates, remove_missing_values
+from src.data_preprocessing import engineer_features
+from src.data_processing import map_ips_to_countries
+from src.model_preprocessing import prepare_data_for_modeling
+from src.scoring import FraudScorer
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def run(label: str, X, y, encoding: str, n_estimators: int, n_single: int):
+    (X_train, y_train, X_test, y_test, prep), prep_s = timed(
+        lambda: prepare_data_for_modeling(X, y, label, "smote", encoding=encoding))
+    model = XGBClassifier(n_estimators=n_estimators, tree_method='hist', eval_metric='aucpr',
+                          enable_categorical=encoding == "native", random_state=42)
+    _, fit_s = timed(lambda: model.fit(X_train, y_train))
+    model_kb = len(model.get_booster().save_raw('ubj')) / 1024
+
+    y_prob, batch_s = timed(lambda: model.predict_proba(X_test)[:, 1])
+    scorer = FraudScorer(prep, model)
+    records = X.loc[X_test.index[:n_single]].to_dict('records')
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        scorer.score_one(record)
+        latencies.append(time.perf_counter() - start)
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+
+    auc_pr = average_precision_score(y_test, y_prob)
+    print(f"{label:<10} {X_train.shape[1]:>8,} {prep_s:>7.1f} {fit_s:>7.1f} {model_kb:>9.0f} "
+          f"{batch_s * 1e3:>9.1f} {p50:>8.0f} {p99:>8.0f} {auc_pr:>8.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=151_112)
+    parser.add_argument('--n-estimators', type=int, default=200)
+    parser.add_argument('--single', type=int, default=2000, help="Transactions scored one at a time")
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    df = remove_missing_values(remove_duplicates(make_fraud_data(args.rows)))
+    df = engineer_features(map_ips_to_countries(df, make_ip_table()))
+    X = df.drop(columns=['class', 'user_total_spent', 'user_avg_purchase'])
+    y = df['class']
+
+    print(f"{'encoding':<10} {'features':>8} {'prep s':>7} {'fit s':>7} {'model KB':>9} "
+          f"{'batch ms':>9} {'p50 µs':>8} {'p99 µs':>8} {'AUC-PR':>8}")
+    run('one-hot', X, y, "onehot", args.n_estimators, args.single)
+    run('native', X, y, "native", args.n_estimators, args.single)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_cold_start.py
+"""
+Scorer cold start: a fresh process imports src.scoring, loads a bundle and
+scores its first transaction, for the earlier pickled .joblib bundle vs the
+versioned bundle (native booster, JSON + memory-mapped arrays). Reports
+median wall time per stage over several process launches and which heavy
+libraries each process ended up importing.
+
+Usage:
+    python -m benchmarks.bench_cold_start --launches 5
+"""
+import argparse
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from benchmarks.bench_scoring import train_model
+from src.scoring import save_bundle
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ('xgboost', 'sklearn', 'scipy', 'pandas', 'shap', 'matplotlib', 'IPython')
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from src.scoring import load_scorer
+imported = time.perf_counter()
+scorer = load_scorer(sys.argv[1])
+loaded = time.perf_counter()
+scorer.score_one(json.loads(sys.argv[2]))
+scored = time.perf_counter()
+print(json.dumps({'import': imported - start, 'load': loaded - imported, 'first score': scored - loaded,
+                  'modules': [m for m in json.loads(sys.argv[3]) if m in sys.modules]}))
+"""
+
+
+def launch(bundle: Path, record: dict) -> dict:
+    """Runs one scorer process; the interpreter's own startup is timed from outside."""
+    out = subprocess.run([sys.executable, '-c', CHILD, str(bundle), json.dumps(record), json.dumps(HEAVY)],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--launches', type=int, default=5)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    preprocessor, model, X_raw = train_model(args.rows)
+    record = {k: (v.item() if hasattr(v, 'item') else v) for k, v in X_raw.iloc[0].items()}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = Path(tmp) / 'fraud_xgb.joblib'
+        joblib.dump({'preprocessor': preprocessor, 'model': model, 'threshold': 0.5}, legacy)
+        versioned = save_bundle(Path(tmp) / 'fraud_xgb', preprocessor, model)
+
+        print(f"{'bundle':<12} {'import s':>9} {'load s':>9} {'1st score s':>12} {'total s':>9}  heavy modules")
+        for label, path in (('joblib', legacy), ('versioned', versioned.parent)):
+            runs = [launch(path, record) for _ in range(args.launches)]
+            stages = {k: float(np.median([r[k] for r in runs])) for k in ('import', 'load', 'first score')}
+            print(f"{label:<12} {stages['import']:>9.3f} {stages['load']:>9.3f} {stages['first score']:>12.4f} "
+                  f"{sum(stages.values()):>9.3f}  {', '.join(runs[0]['modules']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/bench_evaluation.py
+"""
+Model evaluation on a creditcard-shaped test set: the old evaluate_model
+passes (predict + predict_proba, PR curve, F1 / precision / recall and
+classification_report, each on its own) vs the single-pass engine, a
+100-threshold confusion-matrix sweep, 1000 AUC-PR bootstraps (sklearn
+per resample vs bootstrap_metrics), and several models evaluated
+sequentially vs concurrently with evaluate_models.
+
+Usage:
+    python -m benchmarks.bench_evaluation --rows 284807 --models 4
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+from sklearn.metrics import (auc, classification_report, confusion_matrix, f1_score,
+                             precision_recall_curve, precision_score, recall_score)
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import make_creditcard
+from src.evaluation import bootstrap_metrics, counts_at, evaluate_models, evaluate_scores, threshold_curve
+
+
+def old_metrics(model, X_test, y_test):
+    """The computations of evaluate_model before the single-pass engine (without the plot)."""
+    y_pred = model.predict(X_test)
+    y_prob = model.predict_proba(X_test)[:, 1]
+    precision, recall, _ = precision_recall_curve(y_test, y_prob)
+    auc(recall, precision)
+    f1_score(y_test, y_pred)
+    precision_score(y_test, y_pred)
+    recall_score(y_test, y_pred)
+    classification_report(y_test, y_pred)
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=284_807)
+    parser.add_argument('--models', type=int, default=4)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    df = make_creditcard(args.rows)
+    X, y = df.drop(columns='Class'), df['Class']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    models = [XGBClassifier(n_estimators=100, max_depth=4 + i, n_jobs=1).fit(X_train, y_train)
+              for i in range(args.models)]
+    model = models[0]
+    print(f"test set: {len(X_test):,} rows; {args.models} models of 100 trees")
+
+    y_prob = model.predict_proba(X_test)[:, 1]
+    print(f"{'step':<40} {'seconds':>9}")
+    print(f"{'old evaluate_model passes':<40} {timed(lambda: old_metrics(model, X_test, y_test)):>9.3f}")
+    print(f"{'single pass (scoring included)':<40} "
+          f"{timed(lambda: evaluate_scores(y_test, model.predict_proba(X_test)[:, 1])):>9.3f}")
+    print(f"{'single pass (metrics only)':<40} {timed(lambda: evaluate_scores(y_test, y_prob)):>9.3f}")
+
+    grid = np.linspace(0, 1, 100)
+    sweep_old = timed(lambda: [confusion_matrix(y_test, (y_prob >= t).astype(int)) for t in grid], repeat=1)
+    sweep_new = timed(lambda: counts_at(threshold_curve(y_test, y_prob), grid))
+    print(f"{'100 confusion matrices, sklearn':<40} {sweep_old:>9.3f}")
+    print(f"{'100 confusion matrices, counts_at':<40} {sweep_new:>9.3f}")
+
+    def sklearn_bootstraps(n_boot):
+        rng = np.random.default_rng(0)
+        labels = y_test.to_numpy()
+        for _ in range(n_boot):
+            rows = rng.integers(0, len(labels), len(labels))
+            precision, recall, _ = precision_recall_curve(labels[rows], y_prob[rows])
+            auc(recall, precision)
+
+    sampled = 50
+    per_resample = timed(lambda: sklearn_bootstraps(sampled), repeat=1) / sampled
+    print(f"{'1000 bootstraps, sklearn (extrapolated)':<40} {per_resample * 1000:>9.3f}")
+    print(f"{'1000 bootstraps, bootstrap_metrics':<40} "
+          f"{timed(lambda: bootstrap_metrics(y_test, y_prob, 1000, random_state=0), repeat=1):>9.3f}")
+
+    jobs = [(m, X_test, y_test, "CreditCard", f"XGB depth {4 + i}") for i, m in enumerate(models)]
+    print(f"{'evaluate_models, 1 thread':<40} {timed(lambda: evaluate_models(jobs, n_jobs=1, n_boot=0), repeat=1):>9.3f}")
+    print(f"{f'evaluate_models, {len(jobs)} threads':<40} {timed(lambda: evaluate_models(jobs, n_boot=0), repeat=1):>9.3f}")
+    table = evaluate_models(jobs)
+    print(table[['Model', 'AUC-PR', 'AUC-PR CI Low', 'AUC-PR CI High', 'Recall CI Low', 'Recall CI High']]
+          .to_string(index=False, float_format='%.4f'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_external.py
+"""
+XGBoost grid search on the resampled Fraud_Data training set: in-memory
+train_xgboost vs out-of-core train_xgboost_external from on-disk shards
+(QuantileDMatrix, and paged external-memory DMatrix). Each path runs in a
+fresh process that starts from the shard directory; reports wall time and
+peak RSS.
+
+Usage:
+    python -m benchmarks.bench_external --rows 151112
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+PARAM_GRID = {'n_estimators': [100], 'max_depth': [4, 6]}
+
+
+def rss_mb() -> float:
+    """Peak RSS of this process (VmHWM; ru_maxrss would carry over the parent's through exec)."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def load_shards(shard_dir: Path):
+    from src.shards import iter_shards, read_manifest
+
+    parts = list(iter_shards(shard_dir))
+    y = np.concatenate([p[1] for p in parts])
+    if read_manifest(shard_dir)['sparse']:
+        return sp.vstack([p[0] for p in parts], format='csr'), y
+    return np.vstack([p[0] for p in parts]), y
+
+
+def run_path(mode: str, shard_dir: str, cv: int, queue):
+    from src.modeling import train_xgboost, train_xgboost_external
+
+    logging.disable(logging.INFO)
+    base = rss_mb()
+    start = time.perf_counter()
+    if mode == 'in-memory':
+        X, y = load_shards(Path(shard_dir))
+        grid = train_xgboost(X, y, PARAM_GRID, cv=cv)
+    else:
+        grid = train_xgboost_external(shard_dir, PARAM_GRID, cv=cv, external_memory=mode == 'external-memory')
+    queue.put((time.perf_counter() - start, rss_mb(), rss_mb() - base, grid.best_score_))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=151_112)
+    parser.add_argument('--cv', type=int, default=3)
+    parser.add_argument('--rows-per-shard', type=int, default=100_000)
+    parser.add_argument('--sparse', action='store_true', help="Shard the sparse CSR design matrix")
+    parser.add_argument('--paths', nargs='+', default=['in-memory', 'quantile', 'external-memory'],
+                        choices=['in-memory', 'quantile', 'external-memory'])
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    from benchmarks.synthetic import make_fraud_data, make_ip_table
+    from src.data_cleaning import remove_duplicates, remove_missing_values
+    from src.data_preprocessing import engineer_features
+    from src.data_processing import map_ips_to_countries
+    from src.model_preprocessing import prepare_data_for_modeling
+    from src.shards import write_shards
+
+    df = remove_missing_values(remove_duplicates(make_fraud_data(args.rows)))
+    df = engineer_features(map_ips_to_countries(df, make_ip_table()))
+    X = df.drop(columns=['class', 'user_total_spent', 'user_avg_purchase'])
+    X_train, y_train, _, _, _ = prepare_data_for_modeling(X, df['class'], "Fraud", "smote", sparse=args.sparse)
+    del df, X
+
+    with tempfile.TemporaryDirectory() as tmp:
+        shard_dir = Path(tmp) / 'shards'
+        write_shards(X_train, y_train, shard_dir, rows_per_shard=args.rows_per_shard)
+        print(f"training set: {X_train.shape[0]:,} x {X_train.shape[1]} "
+              f"({'sparse' if args.sparse else 'dense'}), {args.cv}-fold grid of {PARAM_GRID}")
+        del X_train, y_train
+
+        print(f"{'path':<18} {'wall s':>8} {'peak RSS MB':>12} {'+RSS MB':>9} {'best AUC-PR':>12}")
+        ctx = mp.get_context('spawn')
+        for mode in args.paths:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=run_path, args=(mode, str(shard_dir), args.cv, queue))
+            proc.start()
+            elapsed, peak, grown, score = queue.get()
+            proc.join()
+            print(f"{mode:<18} {elapsed:>8.1f} {peak:>12.0f} {grown:>9.0f} {score:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
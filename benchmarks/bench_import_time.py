@@ -0,0 +1,74 @@
+# benchmarks/bench_import_time.py
+"""
+Import-time budgets: fresh processes import the preprocessing entry point
+(scripts/preprocess.py), the scoring entry point (scripts/serve.py) and the
+evaluation / explainability / modeling modules. Reports the median import
+time over several launches and which heavy libraries each import pulled in,
+and exits with status 1 when an entry point goes over its budget.
+
+Usage:
+    python -m benchmarks.bench_import_time --launches 5 --preprocess-budget 1.0 --scoring-budget 0.3
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY = ('pandas', 'pyarrow', 'scipy', 'sklearn', 'imblearn', 'xgboost', 'shap', 'matplotlib', 'IPython')
+# (label, module, budget argument or None for report-only)
+TARGETS = (
+    ('preprocess', 'scripts.preprocess', 'preprocess_budget'),
+    ('scoring', 'scripts.serve', 'scoring_budget'),
+    ('evaluation', 'src.evaluation', None),
+    ('explainability', 'src.explainability', None),
+    ('modeling', 'src.modeling', None),
+)
+
+CHILD = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+print(json.dumps({'import': imported - start, 'modules': [m for m in json.loads(sys.argv[2]) if m in sys.modules]}))
+"""
+
+
+def launch(module: str) -> dict:
+    """Imports module in a fresh interpreter; its own startup is not counted."""
+    out = subprocess.run([sys.executable, '-c', CHILD, module, json.dumps(HEAVY)],
+                         cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--launches', type=int, default=5)
+    parser.add_argument('--preprocess-budget', type=float, default=1.0,
+                        help="Seconds allowed to import scripts/preprocess.py (default: 1.0)")
+    parser.add_argument('--scoring-budget', type=float, default=0.3,
+                        help="Seconds allowed to import scripts/serve.py (default: 0.3)")
+    args = parser.parse_args(argv)
+    if args.launches < 1:
+        parser.error("--launches must be at least 1")
+
+    over = []
+    print(f"{'entry point':<16} {'module':<20} {'import s':>9} {'budget s':>9}  heavy modules")
+    for label, module, budget_arg in TARGETS:
+        runs = [launch(module) for _ in range(args.launches)]
+        seconds = float(np.median([r['import'] for r in runs]))
+        budget = getattr(args, budget_arg) if budget_arg else None
+        if budget is not None and seconds > budget:
+            over.append(f"{label}: {seconds:.3f} s > {budget:.3f} s")
+        print(f"{label:<16} {module:<20} {seconds:>9.3f} {budget if budget is not None else '-':>9}  "
+              f"{', '.join(runs[0]['modules']) or '-'}")
+    for line in over:
+        print(f"⚠️ Over budget: {line}")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
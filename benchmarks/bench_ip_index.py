@@ -0,0 +1,75 @@
+# benchmarks/bench_ip_index.py
+"""
+Times IP -> country lookup with the compiled IpCountryIndex against the
+previous sort + pd.merge_asof implementation.
+
+Usage:
+    python -m benchmarks.bench_ip_index --sizes 1000000 10000000 100000000
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_ip_table
+from src.ip_index import IpCountryIndex
+
+
+def merge_asof_countries(ips: np.ndarray, ip_df: pd.DataFrame) -> pd.Series:
+    """The pre-index implementation of map_ips_to_countries, kept as a baseline."""
+    fraud_df = pd.DataFrame({'ip_address': ips}).astype('int64')
+    ip_df = ip_df.copy()
+    ip_df['lower_bound_ip_address'] = ip_df['lower_bound_ip_address'].astype('float').astype('int64')
+    ip_df['upper_bound_ip_address'] = ip_df['upper_bound_ip_address'].astype('float').astype('int64')
+    ip_df = ip_df.sort_values('lower_bound_ip_address')
+    fraud_df = fraud_df.sort_values('ip_address')
+    merged = pd.merge_asof(fraud_df, ip_df, left_on='ip_address',
+                           right_on='lower_bound_ip_address', direction='backward')
+    unknown = (merged['ip_address'] > merged['upper_bound_ip_address']) | merged['country'].isnull()
+    merged.loc[unknown, 'country'] = 'Unknown'
+    return merged['country']
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000_000, 10_000_000, 100_000_000])
+    parser.add_argument('--max-baseline-rows', type=int, default=100_000_000,
+                        help="Skip the merge_asof baseline above this many IPs (it needs several GB).")
+    args = parser.parse_args(argv)
+
+    ip_df = make_ip_table()
+    index, build_s = timed(lambda: IpCountryIndex.from_frame(ip_df))
+    with tempfile.TemporaryDirectory() as tmp:
+        index.save(tmp)
+        mapped, load_s = timed(lambda: IpCountryIndex.load(tmp))
+        print(f"Index: {len(index):,} ranges | build {build_s * 1e3:.1f} ms | mmap load {load_s * 1e3:.2f} ms")
+
+        one_ip = 2_000_000_000
+        start = time.perf_counter()
+        for _ in range(10_000):
+            mapped.lookup_one(one_ip)
+        print(f"lookup_one: {(time.perf_counter() - start) / 10_000 * 1e6:.2f} us/call")
+
+        print(f"{'IPs':>12} {'merge_asof s':>13} {'index s':>9} {'speedup':>8}")
+        rng = np.random.default_rng(0)
+        for n in args.sizes:
+            ips = rng.uniform(5.2e4, 4.29e9, n)
+            codes, index_s = timed(lambda: mapped.lookup(ips))
+            if n <= args.max_baseline_rows:
+                _, merge_s = timed(lambda: merge_asof_countries(ips, ip_df))
+                print(f"{n:>12,} {merge_s:>13.3f} {index_s:>9.3f} {merge_s / index_s:>7.1f}x")
+            else:
+                print(f"{n:>12,} {'skipped':>13} {index_s:>9.3f} {'-':>8}")
+            del ips, codes
+
+
+if __name__ == "__main__":
+    main()
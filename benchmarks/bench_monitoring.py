@@ -0,0 +1,121 @@
+# benchmarks/bench_monitoring.py
+"""
+Streaming drift monitoring on engineered Fraud_Data: DriftMonitor batch and
+per-row update cost, merging per-worker monitors, profile size, the
+overhead on FraudScorer.score_one, and the sketch estimates (quantiles, KS,
+PSI, distinct devices) against exact computations over the stored rows.
+
+Usage:
+    python -m benchmarks.bench_monitoring --rows 1000000 --workers 8
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp
+
+from benchmarks.bench_scoring import train_model
+from benchmarks.synthetic import make_fraud_data, make_ip_table
+from src.data_preprocessing import engineer_features
+from src.data_processing import map_ips_to_countries
+from src.ip_index import UNKNOWN_COUNTRY
+from src.monitoring import DriftMonitor
+from src.scoring import FraudScorer
+
+NUMERIC = ['purchase_value', 'age', 'hour_of_day', 'day_of_week', 'time_since_signup', 'user_txn_count']
+CATEGORICAL = ['source', 'browser', 'sex', 'country', 'device_id']
+
+
+def engineered(rows: int, seed: int) -> pd.DataFrame:
+    raw = make_fraud_data(rows, seed=seed)
+    df = engineer_features(map_ips_to_countries(raw, make_ip_table()))
+    return df.assign(device_id=raw.loc[df.index, 'device_id'].to_numpy())
+
+
+def exact_psi(reference: np.ndarray, live: np.ndarray, n_bins: int = 10) -> float:
+    edges = np.unique(np.quantile(reference, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    expected = np.bincount(np.searchsorted(edges, reference, side='right'), minlength=len(edges) + 1) / len(reference)
+    actual = np.bincount(np.searchsorted(edges, live, side='right'), minlength=len(edges) + 1) / len(live)
+    expected, actual = np.maximum(expected, 1e-4), np.maximum(actual, 1e-4)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=8, help="Monitors merged into one")
+    parser.add_argument('--single', type=int, default=20_000, help="Rows added one at a time")
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    reference = engineered(args.rows, seed=0)
+    live = engineered(args.rows, seed=1)
+    live['purchase_value'] = (live['purchase_value'] * 1.1).round()  # a mild drift to measure
+    print(f"{len(reference):,} reference rows, {len(live):,} live rows, "
+          f"{len(NUMERIC)} numeric + {len(CATEGORICAL)} categorical features")
+
+    profile = DriftMonitor.for_columns(NUMERIC, CATEGORICAL, unknown_values={'country': UNKNOWN_COUNTRY})
+    start = time.perf_counter()
+    profile.update(reference)
+    batch_s = time.perf_counter() - start
+    monitor = profile.as_reference()
+
+    records = live.head(args.single).to_dict('records')
+    one = monitor.empty()
+    start = time.perf_counter()
+    for record in records:
+        one.update_one(record)
+    per_row_us = (time.perf_counter() - start) / len(records) * 1e6
+
+    shards = [monitor.empty() for _ in range(args.workers)]
+    for shard, part in zip(shards, np.array_split(np.arange(len(live)), args.workers)):
+        shard.update(live.iloc[part])
+    start = time.perf_counter()
+    for shard in shards:
+        monitor.merge(shard)
+    merge_ms = (time.perf_counter() - start) * 1e3
+    start = time.perf_counter()
+    report = monitor.report()
+    report_ms = (time.perf_counter() - start) * 1e3
+    profile_kb = len(json.dumps(profile.to_dict(), separators=(',', ':'))) / 1024
+
+    print(f"{'step':<36} {'value':>12}")
+    print(f"{'batch update (rows/s)':<36} {len(reference) / batch_s:>12,.0f}")
+    print(f"{'update_one (µs/row)':<36} {per_row_us:>12.1f}")
+    print(f"{f'merge {args.workers} monitors (ms)':<36} {merge_ms:>12.2f}")
+    print(f"{'report (ms)':<36} {report_ms:>12.2f}")
+    print(f"{'profile JSON (KB)':<36} {profile_kb:>12.1f}")
+
+    prep, model, _ = train_model(50_000)
+    scorers = {'without monitor': FraudScorer(prep, model),
+               'with monitor': FraudScorer(prep, model, monitor=profile.as_reference())}
+    for label, scorer in scorers.items():
+        latencies = []
+        for record in records[:5000]:
+            start = time.perf_counter()
+            scorer.score_one(record)
+            latencies.append(time.perf_counter() - start)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e6
+        print(f"{f'score_one {label} p50 / p99 (µs)':<36} {p50:>5.0f} / {p99:<5.0f}")
+
+    print(f"\n{'estimate':<34} {'sketch':>10} {'exact':>10}")
+    values = live['purchase_value'].to_numpy(dtype=float)
+    sketch = monitor.sketches['purchase_value']
+    for q, estimate in zip((0.5, 0.99), sketch.quantiles([0.5, 0.99])):
+        print(f"{f'purchase_value p{q * 100:g}':<34} {estimate:>10.2f} {np.quantile(values, q):>10.2f}")
+    ref_values = reference['purchase_value'].to_numpy(dtype=float)
+    features = report['features']
+    print(f"{'purchase_value KS':<34} {features['purchase_value']['ks']:>10.4f} "
+          f"{ks_2samp(ref_values, values).statistic:>10.4f}")
+    print(f"{'purchase_value PSI':<34} {features['purchase_value']['psi']:>10.4f} {exact_psi(ref_values, values):>10.4f}")
+    print(f"{'distinct device_id':<34} {features['device_id']['distinct']:>10,} {live['device_id'].nunique():>10,}")
+    print(f"{'unknown country rate':<34} {features['country']['unknown_rate']:>10.4f} "
+          f"{(live['country'] == UNKNOWN_COUNTRY).mean():>10.4f}")
+    print(f"alerts: {report['alerts']}")
+
+
+if __name__ == "__main__":
+    main()
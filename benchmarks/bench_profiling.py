@@ -0,0 +1,90 @@
+# benchmarks/bench_profiling.py
+"""
+Cost of the stage instrumentation in src.profiling: per-call overhead of an
+@instrument-ed function with recording off and on, and the Fraud_Data
+pipeline (dedup, missing values, IP mapping, feature engineering) run
+without recording, with stage metrics, and with sampled / cProfile profiles.
+
+Usage:
+    python -m benchmarks.bench_profiling --rows 1000000
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_fraud_data, make_ip_table
+from src.data_cleaning import remove_duplicates, remove_missing_values
+from src.data_preprocessing import engineer_features
+from src.data_processing import map_ips_to_countries
+from src.ip_index import IpCountryIndex
+from src.profiling import disable_profiling, enable_profiling, instrument
+
+
+def noop(x):
+    return x
+
+
+def per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def pipeline(raw, index):
+    df = remove_missing_values(remove_duplicates(raw))
+    return engineer_features(map_ips_to_countries(df, index))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--calls', type=int, default=1_000_000, help="Calls of a no-op function")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    decorated = instrument()(noop)
+    print(f"{'no-op call':<34} {'ns/call':>10}")
+    print(f"{'undecorated':<34} {per_call_ns(noop, args.calls):>10.0f}")
+    print(f"{'@instrument, recording off':<34} {per_call_ns(decorated, args.calls):>10.0f}")
+    enable_profiling()
+    try:
+        print(f"{'@instrument, recording on':<34} {per_call_ns(decorated, args.calls // 100):>10.0f}")
+    finally:
+        disable_profiling()
+
+    raw = make_fraud_data(args.rows)
+    index = IpCountryIndex.from_frame(make_ip_table())
+    pipeline(raw, index)  # warm-up
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = {
+            'off': None,
+            'stage metrics': dict(),
+            'metrics + sampled stacks': dict(profile_dir=Path(tmp), profile_mode='sample'),
+            'metrics + cProfile': dict(profile_dir=Path(tmp), profile_mode='cprofile'),
+        }
+        print(f"\n{f'pipeline, {len(raw):,} rows':<34} {'best s':>10} {'overhead':>10}")
+        baseline = None
+        for label, options in modes.items():
+            times = []
+            for _ in range(args.repeats):
+                recorder = enable_profiling(**options) if options is not None else None
+                start = time.perf_counter()
+                try:
+                    pipeline(raw, index)
+                finally:
+                    times.append(time.perf_counter() - start)
+                    disable_profiling()
+            best = min(times)
+            baseline = baseline or best
+            print(f"{label:<34} {best:>10.3f} {best / baseline - 1:>+10.1%}")
+    recorder.log_summary()
+    for name, totals in recorder.summary().items():
+        print(f"  {name:<32} {totals['wall_s']:>8.3f} s  +{totals['peak_rss_delta_mb']:.0f} MB RSS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_reason_codes.py
+"""
+Latency added by top-k reason codes: FraudScorer.score_batch vs decide_batch
+with 3 reason codes (XGBoost pred_contribs, exact and approximate, one-hot
+columns summed back to their source feature) at several batch sizes, plus
+per-row shap_values for reference.
+
+Usage:
+    python -m benchmarks.bench_reason_codes --batch-sizes 1 8 32 128
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import shap
+
+from benchmarks.bench_scoring import train_model
+from src.scoring import FraudScorer
+
+
+def per_batch(fn, batches) -> np.ndarray:
+    out = np.empty(len(batches))
+    for i, batch in enumerate(batches):
+        start = time.perf_counter()
+        fn(batch)
+        out[i] = time.perf_counter() - start
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--requests', type=int, default=4_096)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('-k', type=int, default=3)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    preprocessor, model, X_raw = train_model(args.rows)
+    records = X_raw.head(args.requests).to_dict('records')
+    plain = FraudScorer(preprocessor, model)
+    coders = {'exact': FraudScorer(preprocessor, model, reason_codes=args.k),
+              'approx': FraudScorer(preprocessor, model, reason_codes=args.k, approx_contribs=True)}
+    print(f"model: 200 trees, depth 6, {plain.preprocessor.n_features} encoded columns "
+          f"-> {len(coders['exact'].reason_coder.features)} source features")
+
+    print(f"{'batch':>6} {'codes':>7} {'score p50 us':>13} {'+codes p50 us':>14} {'+codes p99 us':>14} {'added us/row':>13}")
+    for size in args.batch_sizes:
+        batches = [records[i:i + size] for i in range(0, len(records), size)]
+        base = per_batch(plain.score_batch, batches)
+        for label, coded in coders.items():
+            with_codes = per_batch(coded.decide_batch, batches)
+            added = (np.median(with_codes) - np.median(base)) / size
+            print(f"{size:>6} {label:>7} {np.median(base) * 1e6:>13.1f} {np.median(with_codes) * 1e6:>14.1f} "
+                  f"{np.percentile(with_codes, 99) * 1e6:>14.1f} {added * 1e6:>13.1f}")
+
+    exact, approx = (coded.decide_batch(records[:1_000]) for coded in coders.values())
+    top1 = np.mean([e['reason_codes'][0]['feature'] == a['reason_codes'][0]['feature'] for e, a in zip(exact, approx)])
+    print(f"approx vs exact: same top feature for {top1:.0%} of rows")
+
+    explainer = shap.TreeExplainer(model)
+    encoded = pd.DataFrame(preprocessor.transform(X_raw.head(200)), columns=preprocessor.get_feature_names_out())
+    samples = per_batch(lambda i: explainer.shap_values(encoded.iloc[[i]]), range(len(encoded)))
+    print(f"per-row shap_values p50: {np.median(samples) * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_scoring.py
+"""
+Single-transaction scoring latency (p50/p99) of the compiled FraudScorer versus
+the pandas ColumnTransformer + predict_proba path, at several concurrency levels.
+
+Usage:
+    python -m benchmarks.bench_scoring --rows 200000 --concurrency 1 2 4 8
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import make_fraud_data, make_ip_table
+from src.data_processing import map_ips_to_countries
+from src.data_preprocessing import engineer_features
+from src.model_preprocessing import prepare_data_for_modeling
+from src.scoring import FraudScorer
+
+
+def train_model(rows: int):
+    """Fits the preprocessor and an XGBoost model on synthetic Fraud_Data."""
+    df = engineer_features(map_ips_to_countries(make_fraud_data(rows), make_ip_table()))
+    X, y = df.drop(columns=['class']), df['class']
+    X_train, y_train, X_test, _, preprocessor = prepare_data_for_modeling(X, y, imbalance_technique="none")
+    model = XGBClassifier(n_estimators=200, max_depth=6, eval_metric='aucpr').fit(X_train, y_train)
+    return preprocessor, model, X.loc[X_test.index]
+
+
+def latencies(fn, records, concurrency: int) -> np.ndarray:
+    """Calls fn on every record from `concurrency` threads; returns per-call seconds."""
+    def worker(chunk):
+        out = np.empty(len(chunk))
+        for i, record in enumerate(chunk):
+            start = time.perf_counter()
+            fn(record)
+            out[i] = time.perf_counter() - start
+        return out
+
+    chunks = [records[i::concurrency] for i in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return np.concatenate(list(pool.map(worker, chunks)))
+
+
+def report(label: str, concurrency: int, samples: np.ndarray, wall: float):
+    p50, p99 = np.percentile(samples, [50, 99]) * 1e6
+    print(f"{label:<10} {concurrency:>4} {p50:>10.1f} {p99:>10.1f} {len(samples) / wall:>12,.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--requests', type=int, default=5_000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    preprocessor, model, X_raw = train_model(args.rows)
+    records = X_raw.head(args.requests).to_dict('records')
+    scorer = FraudScorer(preprocessor, model)
+
+    def pandas_path(record):
+        return model.predict_proba(preprocessor.transform(pd.DataFrame([record])))[0, 1]
+
+    print(f"{'path':<10} {'thr':>4} {'p50 us':>10} {'p99 us':>10} {'req/s':>12}")
+    for concurrency in args.concurrency:
+        for label, fn, n in (('pandas', pandas_path, min(len(records), 1_000)),
+                             ('compiled', scorer.score_one, len(records))):
+            start = time.perf_counter()
+            samples = latencies(fn, records[:n], concurrency)
+            report(label, concurrency, samples, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
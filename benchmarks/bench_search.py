@@ -0,0 +1,62 @@
+# benchmarks/bench_search.py
+"""
+Hyperparameter search on the resampled Fraud_Data training set (sparse CSR,
+the modeling notebook's parameter grid): exhaustive GridSearchCV vs
+successive halving with early stopping, plus a resumed halving run that
+reads every trial from its trial cache. Reports wall time, best parameters,
+CV AUC-PR and test AUC-PR.
+
+Usage:
+    python -m benchmarks.bench_search --rows 151112
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+from sklearn.metrics import average_precision_score
+
+from benchmarks.synthetic import make_fraud_data, make_ip_table
+from src.data_cleaning import remove_duplicates, remove_missing_values
+from src.data_preprocessing import engineer_features
+from src.data_processing import map_ips_to_countries
+from src.model_preprocessing import prepare_data_for_modeling
+from src.modeling import train_xgboost
+
+PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [6, 8],
+    'learning_rate': [0.05, 0.1]
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=151_112)
+    parser.add_argument('--cv', type=int, default=5)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    df = remove_missing_values(remove_duplicates(make_fraud_data(args.rows)))
+    df = engineer_features(map_ips_to_countries(df, make_ip_table()))
+    X = df.drop(columns=['class', 'user_total_spent', 'user_avg_purchase'])
+    X_train, y_train, X_test, y_test, _ = prepare_data_for_modeling(X, df['class'], "Fraud", "smote", sparse=True)
+    del df, X
+    print(f"training set: {X_train.shape[0]:,} x {X_train.shape[1]}, {args.cv} folds")
+
+    print(f"{'strategy':<16} {'wall s':>8} {'CV AUC-PR':>10} {'test AUC-PR':>12}  best params")
+    with tempfile.TemporaryDirectory() as trial_dir:
+        for label, strategy, trials in [('grid', 'grid', None),
+                                        ('halving', 'halving', trial_dir),
+                                        ('halving resumed', 'halving', trial_dir)]:
+            start = time.perf_counter()
+            search = train_xgboost(X_train, y_train, PARAM_GRID, cv=args.cv, strategy=strategy,
+                                   n_jobs=args.n_jobs, trial_dir=trials)
+            elapsed = time.perf_counter() - start
+            test = average_precision_score(y_test, search.best_estimator_.predict_proba(X_test)[:, 1])
+            print(f"{label:<16} {elapsed:>8.1f} {search.best_score_:>10.4f} {test:>12.4f}  {search.best_params_}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/bench_shap.py
+"""
+Explaining a case-review queue on a creditcard-shaped test set: the
+notebook's per-row explainer.shap_values loop vs ShapCache batches
+(cold, across worker processes, and a warm repeat read from disk).
+
+Usage:
+    python -m benchmarks.bench_shap --queue 5000 --n-jobs 1 2
+"""
+import argparse
+import logging
+import tempfile
+import time
+
+import numpy as np
+import shap
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import make_creditcard
+from src.shap_cache import ShapCache
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=284_807)
+    parser.add_argument('--queue', type=int, default=5_000, help="highest-scored test rows to explain")
+    parser.add_argument('--loop-sample', type=int, default=300, help="rows timed in the per-row loop")
+    parser.add_argument('--n-jobs', type=int, nargs='+', default=[1, 2])
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    df = make_creditcard(args.rows)
+    X, y = df.drop(columns='Class'), df['Class']
+    X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    model = XGBClassifier(n_estimators=200, max_depth=6, learning_rate=0.1, tree_method='hist').fit(X_train, y_train)
+    X_test = X_test.reset_index(drop=True)
+    queue = np.argsort(-model.predict_proba(X_test)[:, 1])[:args.queue]
+    print(f"model: 200 trees, depth 6; review queue: {len(queue):,} of {len(X_test):,} test rows")
+
+    explainer = shap.TreeExplainer(model)
+    sample = queue[:args.loop_sample]
+    start = time.perf_counter()
+    for idx in sample:
+        explainer.shap_values(X_test.iloc[[idx]])
+    per_row = (time.perf_counter() - start) / len(sample)
+    print(f"{'implementation':<26} {'seconds':>9} {'rows/s':>10}")
+    print(f"{'per-row shap_values':<26} {per_row * len(queue):>9.2f} {1 / per_row:>10,.0f}  (extrapolated from {len(sample)} rows)")
+
+    for n_jobs in args.n_jobs:
+        with tempfile.TemporaryDirectory() as root:
+            cache = ShapCache(root, model)
+            for label in ('cold', 'warm'):
+                start = time.perf_counter()
+                cache.explain(X_test, rows=queue, n_jobs=n_jobs)
+                elapsed = time.perf_counter() - start
+                print(f"{f'ShapCache {label}, n_jobs={n_jobs}':<26} {elapsed:>9.2f} {len(queue) / elapsed:>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
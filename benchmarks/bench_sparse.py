@@ -0,0 +1,74 @@
+# benchmarks/bench_sparse.py
+"""
+Dense vs sparse (CSR) design matrix through prepare_data_for_modeling (split,
+ColumnTransformer, SMOTE) and XGBoost training on a full-size Fraud_Data,
+with the modeling notebook's feature set. Reports time, peak traced memory,
+matrix size and test AUC-PR per stage.
+
+Usage:
+    python -m benchmarks.bench_sparse --rows 151112
+"""
+import argparse
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.metrics import average_precision_score
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import make_fraud_data, make_ip_table
+from src.data_cleaning import remove_duplicates, remove_missing_values
+from src.data_preprocessing import engineer_features
+from src.data_processing import map_ips_to_countries
+from src.model_preprocessing import prepare_data_for_modeling
+
+
+def matrix_mb(X) -> float:
+    if sp.issparse(X):
+        return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 1024**2
+    return X.memory_usage(index=False).sum() / 1024**2
+
+
+def traced(fn):
+    """Runs fn() under tracemalloc; returns (result, seconds, peak MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def run(label: str, X, y, sparse: bool, n_estimators: int):
+    (X_train, y_train, X_test, y_test, _), prep_s, prep_mb = traced(
+        lambda: prepare_data_for_modeling(X, y, label, "smote", sparse=sparse))
+    model = XGBClassifier(n_estimators=n_estimators, tree_method='hist', eval_metric='aucpr',
+                          missing=0.0 if sparse else np.nan, random_state=42)
+    _, fit_s, fit_mb = traced(lambda: model.fit(X_train, y_train))
+    auc_pr = average_precision_score(y_test, model.predict_proba(X_test)[:, 1])
+    print(f"{label:<26} {X_train.shape[1]:>8,} {matrix_mb(X_train):>9.1f} {prep_s:>7.1f} {prep_mb:>9.1f} "
+          f"{fit_s:>7.1f} {fit_mb:>9.1f} {auc_pr:>8.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=151_112)
+    parser.add_argument('--n-estimators', type=int, default=200)
+    args = parser.parse_args(argv)
+    logging.disable(logging.INFO)
+
+    df = remove_missing_values(remove_duplicates(make_fraud_data(args.rows)))
+    df = engineer_features(map_ips_to_countries(df, make_ip_table()))
+    X = df.drop(columns=['class', 'user_total_spent', 'user_avg_purchase'])
+    y = df['class']
+
+    print(f"{'design matrix':<26} {'features':>8} {'train MB':>9} {'prep s':>7} {'prep MB':>9} "
+          f"{'fit s':>7} {'fit MB':>9} {'AUC-PR':>8}")
+    run('dense DataFrame', X, y, sparse=False, n_estimators=args.n_estimators)
+    run('sparse CSR', X, y, sparse=True, n_estimators=args.n_estimators)
+
+if __name__ == "__main__":
+    main()
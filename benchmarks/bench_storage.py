@@ -0,0 +1,53 @@
+# benchmarks/bench_storage.py
+"""
+Compares load time and file size of the engineered Fraud_Data table across
+CSV, Parquet and Feather.
+
+Usage:
+    python -m benchmarks.bench_storage --rows 1000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import make_fraud_data, make_ip_table
+from src.data_processing import map_ips_to_countries
+from src.data_preprocessing import engineer_features
+from src.storage import FRAUD_ENGINEERED_SCHEMA, read_table, write_table
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df = engineer_features(map_ips_to_countries(make_fraud_data(args.rows), make_ip_table()))
+    projection = ['purchase_value', 'country', 'class']
+    predicate = [('class', '==', 1)]
+
+    print(f"Engineered Fraud_Data: {len(df):,} rows x {df.shape[1]} columns")
+    print(f"{'format':<8} {'size MB':>9} {'write s':>9} {'load s':>9} {'project s':>10} {'filter s':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for suffix in ('.csv', '.parquet', '.feather'):
+            path = Path(tmp) / f"engineered{suffix}"
+            write_s = best_of(lambda: write_table(df, path, schema=FRAUD_ENGINEERED_SCHEMA), 1)
+            load_s = best_of(lambda: read_table(path, schema=FRAUD_ENGINEERED_SCHEMA), args.repeat)
+            project_s = best_of(lambda: read_table(path, columns=projection), args.repeat)
+            filter_s = best_of(lambda: read_table(path, columns=projection, filters=predicate), args.repeat)
+            size_mb = path.stat().st_size / 1e6
+            print(f"{suffix[1:]:<8} {size_mb:>9.1f} {write_s:>9.3f} {load_s:>9.3f} {project_s:>10.3f} {filter_s:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
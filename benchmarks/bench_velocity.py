@@ -0,0 +1,54 @@
+# benchmarks/bench_velocity.py
+"""
+Times add_window_features (user/device/IP x 1h/24h/7d + time since previous)
+and, at smaller sizes, a pandas groupby().rolling() baseline for the same counts.
+
+Usage:
+    python -m benchmarks.bench_velocity --rows 10000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import make_fraud_data
+from src.velocity import DEFAULT_WINDOWS, add_window_features
+
+
+def rolling_baseline(df: pd.DataFrame, entities) -> None:
+    """Same window counts with pandas time-based rolling windows."""
+    for entity in entities:
+        ordered = df[[entity, 'purchase_time']].assign(one=1).sort_values([entity, 'purchase_time'])
+        grouped = ordered.groupby(entity)
+        for window in DEFAULT_WINDOWS:
+            grouped.rolling(window, on='purchase_time')['one'].count()
+        grouped['purchase_time'].diff()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--max-baseline-rows', type=int, default=200_000,
+                        help="Skip the groupby().rolling() baseline above this many rows.")
+    args = parser.parse_args(argv)
+
+    entities = ('user_id', 'device_id', 'ip_address')
+    df = make_fraud_data(args.rows)
+    print(f"Synthetic Fraud_Data: {len(df):,} rows")
+
+    start = time.perf_counter()
+    add_window_features(df, entities=entities)
+    sorted_s = time.perf_counter() - start
+    print(f"single sorted pass   : {sorted_s:8.2f} s ({args.rows / sorted_s:,.0f} rows/s)")
+
+    if args.rows <= args.max_baseline_rows:
+        start = time.perf_counter()
+        rolling_baseline(df, entities)
+        rolling_s = time.perf_counter() - start
+        print(f"groupby().rolling()  : {rolling_s:8.2f} s ({rolling_s / sorted_s:.1f}x slower)")
+    else:
+        print("groupby().rolling()  : skipped (use --max-baseline-rows to include)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# benchmarks/suite.py
+"""
+Regression benchmark suite for the pipeline's hot paths on seeded synthetic data.
+
+`run` times remove_duplicates (Fraud_Data and creditcard), map_ips_to_countries,
+engineer_features, prepare_data_for_modeling with each imbalance technique,
+train_xgboost and evaluate_model, and writes the results (best / median wall
+time, CPU time, peak RSS growth and rows per case, plus the library versions
+and machine) as JSON. `compare` checks a run against a baseline and exits
+with status 1 when a case got slower than the tolerance allows.
+
+Usage:
+    python -m benchmarks.suite run --rows 100000 --output benchmarks/results/baseline.json
+    python -m benchmarks.suite compare benchmarks/results/baseline.json benchmarks/results/latest.json --tolerance 0.1
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+import xgboost
+
+from benchmarks.synthetic import make_creditcard, make_fraud_data, make_ip_table
+from src.data_cleaning import remove_duplicates
+from src.data_preprocessing import engineer_features
+from src.data_processing import map_ips_to_countries
+from src.evaluation import evaluate_model
+from src.model_preprocessing import prepare_data_for_modeling
+from src.modeling import train_xgboost
+from src.profiling import StageRecorder
+
+RESULTS_FORMAT = 1
+TECHNIQUES = ('none', 'undersample', 'smote', 'smotetomek')
+METRICS = ('best_s', 'median_s', 'cpu_s', 'peak_rss_mb')
+PARAM_GRID = {'n_estimators': [100], 'max_depth': [4, 6]}
+# Columns the modeling notebook leaves out of the Fraud_Data features (target and leaky user totals)
+DROP_COLUMNS = ['class', 'user_total_spent', 'user_avg_purchase']
+
+# (case name, keys it reads, key it writes, function of the data, rows it processes)
+Case = Tuple[str, Tuple[str, ...], str, Callable[[dict], object], Callable[[dict], int]]
+
+
+def cases(cv: int) -> List[Case]:
+    """The suite in run order; each case reads the output of an earlier one."""
+    def prepare(technique):
+        def run(data):
+            X = data['fraud_features'].head(data['model_rows'])
+            return prepare_data_for_modeling(X.drop(columns=DROP_COLUMNS), X['class'],
+                                             "Fraud_Data", imbalance_technique=technique)
+        return run
+
+    def train(data):
+        X_train, y_train, _, _, _ = data['modeling_smote']
+        return train_xgboost(X_train, y_train, PARAM_GRID, cv=cv).best_estimator_
+
+    def evaluate(data):
+        _, _, X_test, y_test, _ = data['modeling_smote']
+        return evaluate_model(data['model'], X_test, y_test, "Fraud_Data", "XGBoost", plot=False)
+
+    def rows(key, position=None):
+        return lambda data: len(data[key] if position is None else data[key][position])
+
+    return [
+        ('remove_duplicates[fraud]', ('fraud_raw',), 'fraud_clean',
+         lambda data: remove_duplicates(data['fraud_raw']), rows('fraud_raw')),
+        ('remove_duplicates[creditcard]', ('creditcard_raw',), 'creditcard_clean',
+         lambda data: remove_duplicates(data['creditcard_raw']), rows('creditcard_raw')),
+        ('map_ips_to_countries', ('fraud_clean', 'ip_table'), 'fraud_geo',
+         lambda data: map_ips_to_countries(data['fraud_clean'], data['ip_table']), rows('fraud_clean')),
+        ('engineer_features', ('fraud_geo',), 'fraud_features',
+         lambda data: engineer_features(data['fraud_geo']), rows('fraud_geo')),
+        *[(f'prepare_data_for_modeling[{technique}]', ('fraud_features',), f'modeling_{technique}',
+           prepare(technique), lambda data: min(len(data['fraud_features']), data['model_rows']))
+          for technique in TECHNIQUES],
+        ('train_xgboost', ('modeling_smote',), 'model', train, rows('modeling_smote', 0)),
+        ('evaluate_model', ('modeling_smote', 'model'), 'evaluation', evaluate, rows('modeling_smote', 2)),
+    ]
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+        'sklearn': sklearn.__version__, 'xgboost': xgboost.__version__,
+        'platform': platform.platform(), 'machine': platform.machine(), 'cpus': os.cpu_count(),
+    }
+
+
+def run_suite(rows: int, creditcard_rows: int, model_rows: int, ip_ranges: int, repeats: int,
+              cv: int = 3, seed: int = 0, only: Optional[List[str]] = None) -> dict:
+    """
+    Runs every case (or those whose name starts with one of only, plus the
+    cases they depend on, which run once untimed) and returns the results.
+    """
+    suite = cases(cv)
+    timed = {name for name, *_ in suite if only is None or name.startswith(tuple(only))}
+    needed = set()
+    for name, inputs, target, _, _ in reversed(suite):
+        if name in timed or target in needed:
+            needed.update(inputs)
+    generators = {
+        'fraud_raw': lambda: make_fraud_data(rows, seed=seed),
+        'creditcard_raw': lambda: make_creditcard(creditcard_rows, seed=seed),
+        'ip_table': lambda: make_ip_table(ip_ranges, seed=seed),
+    }
+    data = {key: generate() for key, generate in generators.items() if key in needed}
+    data['model_rows'] = model_rows
+
+    results = {}
+    for name, inputs, target, fn, rows_in in suite:
+        if name not in timed and target not in needed:
+            continue
+        recorder = StageRecorder()
+        for _ in range(repeats if name in timed else 1):
+            with contextlib.redirect_stdout(io.StringIO()), recorder.stage(name, rows_in(data)):
+                data[target] = fn(data)
+        if name not in timed:
+            continue
+        records = recorder.records
+        walls = [r['wall_s'] for r in records]
+        results[name] = {
+            'rows': records[0]['rows_in'], 'wall_s': walls, 'best_s': min(walls),
+            'median_s': statistics.median(walls), 'cpu_s': min(r['cpu_s'] for r in records),
+            'peak_rss_mb': max(r['peak_rss_delta_mb'] for r in records),
+        }
+        print(f"{name:<40} {results[name]['rows']:>12,} {min(walls):>10.3f} {statistics.median(walls):>10.3f} "
+              f"{results[name]['peak_rss_mb']:>10.1f}", flush=True)
+    return results
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.1, metric: str = 'best_s',
+            min_delta: float = 0.01) -> List[str]:
+    """
+    Prints a per-case comparison of metric and returns the regressions: cases
+    where current exceeds baseline by more than tolerance (a fraction) and by
+    more than min_delta in absolute terms (seconds or MB), so that sub-noise
+    cases do not flag.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric} (expected one of {METRICS})")
+    shape = {key: value for key, value in baseline['params'].items() if key != 'repeats'}
+    if shape != {key: value for key, value in current['params'].items() if key != 'repeats'}:
+        raise ValueError(f"Runs used different data parameters: {baseline['params']} vs {current['params']}")
+    changed = {key: (value, current['environment'].get(key))
+               for key, value in baseline['environment'].items() if current['environment'].get(key) != value}
+    for key, (before, after) in changed.items():
+        print(f"⚠️ Environment differs: {key} {before} -> {after}")
+
+    regressions = []
+    print(f"{'case':<40} {'baseline':>10} {'current':>10} {'change':>8}  status")
+    for name in dict.fromkeys([*baseline['cases'], *current['cases']]):
+        if name not in current['cases'] or name not in baseline['cases']:
+            print(f"{name:<40} {'':>10} {'':>10} {'':>8}  {'missing' if name in baseline['cases'] else 'new'}")
+            continue
+        before, after = baseline['cases'][name][metric], current['cases'][name][metric]
+        change = after / before - 1 if before > 0 else float('inf') if after > 0 else 0.0
+        if change > tolerance and after - before > min_delta:
+            status = 'REGRESSION'
+            regressions.append(f"{name}: {metric} {before:.3f} -> {after:.3f} ({change:+.1%})")
+        elif change < -tolerance and before - after > min_delta:
+            status = 'improved'
+        else:
+            status = 'ok'
+        print(f"{name:<40} {before:>10.3f} {after:>10.3f} {change:>+8.1%}  {status}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="Run the suite and save the results as JSON")
+    run.add_argument('--rows', type=int, default=100_000, help="Fraud_Data rows (100k to 50M)")
+    run.add_argument('--creditcard-rows', type=int, default=None, help="creditcard rows (default: --rows)")
+    run.add_argument('--model-rows', type=int, default=20_000,
+                     help="Engineered rows used by the modeling cases (default: 20000)")
+    run.add_argument('--ip-ranges', type=int, default=138_846)
+    run.add_argument('--repeats', type=int, default=3)
+    run.add_argument('--cv', type=int, default=3)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--only', nargs='+', default=None, metavar='CASE',
+                     help="Time only the cases whose names start with these prefixes")
+    run.add_argument('--output', type=Path, default=Path('benchmarks/results/latest.json'))
+    cmp = commands.add_parser('compare', help="Compare a run against a baseline; exit 1 on regressions")
+    cmp.add_argument('baseline', type=Path)
+    cmp.add_argument('current', type=Path)
+    cmp.add_argument('--tolerance', type=float, default=0.1, help="Allowed slowdown as a fraction (default: 0.1)")
+    cmp.add_argument('--metric', choices=METRICS, default='best_s')
+    cmp.add_argument('--min-delta', type=float, default=0.01,
+                     help="Ignore changes smaller than this many seconds (or MB for peak_rss_mb)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        baseline, current = (json.loads(path.read_text()) for path in (args.baseline, args.current))
+        try:
+            regressions = compare(baseline, current, args.tolerance, args.metric, args.min_delta)
+        except ValueError as e:
+            parser.error(str(e))
+        for regression in regressions:
+            print(f"⚠️ Regression: {regression}")
+        sys.exit(1 if regressions else 0)
+
+    if args.repeats < 1:
+        parser.error("--repeats must be at least 1")
+    logging.disable(logging.INFO)
+    params = {
+        'rows': args.rows, 'creditcard_rows': args.creditcard_rows or args.rows,
+        'model_rows': min(args.model_rows, args.rows), 'ip_ranges': args.ip_ranges,
+        'repeats': args.repeats, 'cv': args.cv, 'seed': args.seed,
+    }
+    print(f"{'case':<40} {'rows':>12} {'best s':>10} {'median s':>10} {'+RSS MB':>10}")
+    results = run_suite(params['rows'], params['creditcard_rows'], params['model_rows'], params['ip_ranges'],
+                        args.repeats, args.cv, args.seed, args.only)
+    payload = {
+        'format': RESULTS_FORMAT, 'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'params': params, 'environment': environment(), 'cases': results,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(payload, indent=2))
+    print(f"✅ Saved results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/synthetic.py
+"""
+Seeded synthetic stand-ins for the raw datasets, which are not shipped with the repo.
+
+The generators mimic the column layout, dtypes and rough distributions of
+Fraud_Data.csv, IpAddress_to_Country.csv and creditcard.csv so the pipeline
+can be exercised and timed at any scale.
+"""
+import numpy as np
+import pandas as pd
+
+SOURCES = ['SEO', 'Ads', 'Direct']
+BROWSERS = ['Chrome', 'IE', 'Safari', 'FireFox', 'Opera']
+SEXES = ['M', 'F']
+
+# Public IPv4 space used by IpAddress_to_Country.csv
+IP_MIN = 16_777_216
+IP_MAX = 3_758_096_383
+
+
+def make_ip_table(n_ranges: int = 138_846, n_countries: int = 180, seed: int = 0) -> pd.DataFrame:
+    """
+    Non-overlapping, sorted IP ranges covering most of the public IPv4 space,
+    with occasional gaps between neighbouring ranges.
+    """
+    rng = np.random.default_rng(seed)
+    lower = IP_MIN + 16 * np.sort(rng.choice((IP_MAX - IP_MIN) // 16, n_ranges, replace=False))
+    lower[0] = IP_MIN
+    gaps = np.where(rng.random(n_ranges) < 0.1, 8, 0)
+    upper = np.append(lower[1:], IP_MAX + 1) - 1 - gaps
+    countries = np.array([f"Country_{i:03d}" for i in range(n_countries)])
+    # A few countries own most ranges, like the real table
+    weights = 1.0 / np.arange(1, n_countries + 1)
+    country = rng.choice(countries, n_ranges, p=weights / weights.sum())
+    return pd.DataFrame({
+        'lower_bound_ip_address': lower.astype('float64'),
+        'upper_bound_ip_address': upper,
+        'country': country
+    })
+
+
+def make_fraud_data(n_rows: int = 151_112, fraud_rate: float = 0.094, dup_rate: float = 0.001,
+                    seed: int = 0) -> pd.DataFrame:
+    """
+    Fraud_Data-like transactions. Users repeat so per-user aggregates are non-trivial,
+    and a small fraction of rows are exact duplicates.
+    """
+    rng = np.random.default_rng(seed)
+    n_users = max(1, n_rows // 3)
+    signup = pd.Timestamp('2015-01-01') + pd.to_timedelta(rng.integers(0, 200 * 86_400, n_rows), unit='s')
+    purchase = signup + pd.to_timedelta(rng.integers(1, 120 * 86_400, n_rows), unit='s')
+    columns = {
+        'user_id': rng.integers(1, n_users + 1, n_rows),
+        'signup_time': signup.to_numpy(),
+        'purchase_time': purchase.to_numpy(),
+        'purchase_value': rng.integers(9, 155, n_rows),
+        'device_id': np.char.add('DEV', rng.integers(0, max(1, n_rows // 2), n_rows).astype(str)).astype(object),
+        'source': rng.choice(SOURCES, n_rows).astype(object),
+        'browser': rng.choice(BROWSERS, n_rows).astype(object),
+        'sex': rng.choice(SEXES, n_rows).astype(object),
+        'age': rng.integers(18, 77, n_rows),
+        'ip_address': rng.uniform(5.2e4, 4.29e9, n_rows),
+        'class': (rng.random(n_rows) < fraud_rate).astype('int64')
+    }
+    n_dups = int(n_rows * dup_rate)
+    if n_dups:
+        # Column by column: a whole-frame copy would go through one object array
+        dup_rows = rng.integers(0, n_rows, n_dups)
+        targets = rng.integers(0, n_rows, n_dups)
+        for values in columns.values():
+            values[targets] = values[dup_rows]
+    return pd.DataFrame(columns)
+
+
+def make_creditcard(n_rows: int = 284_807, fraud_rate: float = 0.00172, seed: int = 0) -> pd.DataFrame:
+    """
+    creditcard.csv-like frame: Time, 28 PCA components, Amount and Class.
+    Fraud rows are shifted in a few components so models have signal to learn.
+    """
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < fraud_rate).astype('int64')
+    V = rng.standard_normal((n_rows, 28))
+    V[y == 1, :5] += rng.normal(2.0, 1.0, ((y == 1).sum(), 5))
+    df = pd.DataFrame(V, columns=[f"V{i}" for i in range(1, 29)])
+    df.insert(0, 'Time', np.sort(rng.integers(0, 172_792, n_rows)).astype('float64'))
+    df['Amount'] = np.round(rng.lognormal(3.0, 1.5, n_rows), 2)
+    df['Class'] = y
+    return df
@@ -1,8 +1,11 @@
 import sys
 import os
+import argparse
 import logging
 import pandas as pd
+from concurrent.futures import Executor
 from pathlib import Path
+from typing import Optional
 
 # --- 1. Setup Logging ---
 # This configures the logger to show time, level (INFO/ERROR), and the message.
@@ -24,9 +27,23 @@ if str(project_root) not in sys.path:
 
 # Import custom modules after setting path
 try:
-    from src.data_cleaning import remove_duplicates, remove_missing_values
+    from src.data_cleaning import duplicate_mask, remove_duplicates, remove_missing_values
     from src.data_processing import map_ips_to_countries
     from src.data_preprocessing import engineer_features
+    from src.streaming import stream_fraud_data
+    from src.ip_index import IpCountryIndex, source_fingerprint
+    from src.velocity import add_window_features
+    from src.parallel import parallel_fraud_pipeline, process_pool
+    from src.cache import DEFAULT_MAX_BYTES, StageCache
+    from src.monitoring import DriftMonitor, log_report
+    from src.profiling import PROFILE_MODES, enable_profiling, instrument
+    from src import data_cleaning, data_preprocessing, data_processing, storage, velocity
+    from src import ip_index as ip_index_module
+    from src.ip_index import UNKNOWN_COUNTRY
+    from src.storage import (
+        CREDITCARD_COMPACT_SCHEMA, CREDITCARD_SCHEMA, FORMAT_SUFFIXES, FRAUD_ENGINEERED_SCHEMA, FRAUD_RAW_SCHEMA,
+        IP_COUNTRY_SCHEMA, iter_table_chunks, read_table, write_table
+    )
 except ImportError as e:
     logger.error(f"Failed to import src modules: {e}")
     sys.exit(1)
@@ -41,46 +58,133 @@ def validate_schema(df: pd.DataFrame, required_columns: list, dataset_name: str)
         logger.error(error_msg)
         raise ValueError(error_msg)
 
+def fraud_monitor(reference: Optional[Path] = None, window_features: bool = False) -> DriftMonitor:
+    """
+    Drift / data-quality monitor of the engineered Fraud_Data columns: compares
+    against the profile saved at reference, or profiles from scratch (the
+    optional window velocity columns only with window_features).
+    """
+    if reference is not None:
+        return DriftMonitor.load(reference).as_reference()
+    exclude = ['class']
+    if not window_features:
+        exclude += [col for col in FRAUD_ENGINEERED_SCHEMA if col.endswith(('_1h', '_24h', '_7d', '_since_prev'))]
+    return DriftMonitor.from_dtypes(FRAUD_ENGINEERED_SCHEMA, exclude=exclude,
+                                    unknown_values={'country': UNKNOWN_COUNTRY})
+
+
+def report_monitor(monitor: DriftMonitor, save_profile: Optional[Path] = None):
+    """Logs the monitor's report (drift alerts as warnings) and saves it as a profile if asked."""
+    log_report(monitor.report(), title="Fraud_Data data-quality report")
+    if save_profile is not None:
+        monitor.save(save_profile)
+
+
+@instrument(rows_arg=None)
+def load_ip_index(ip_path: Path, index_path: Optional[Path] = None) -> IpCountryIndex:
+    """
+    Loads the compiled IP -> country index from index_path, building and saving
+    it from ip_path on first use. Without index_path the index is built in memory.
+    A saved index records a fingerprint of the IP table it was built from and
+    is rebuilt when ip_path no longer matches it.
+    """
+    source = source_fingerprint(ip_path) if ip_path.exists() else None
+    if index_path is not None and (index_path / 'countries.json').exists():
+        index = IpCountryIndex.load(index_path)
+        if source is None or index.source == source:
+            if source is None:
+                logger.warning(f"⚠️ {ip_path} not found; using the IP index at {index_path} unverified")
+            logger.info(f"Loading IP index from {index_path}")
+            return index
+        logger.warning(f"⚠️ IP index at {index_path} was built from a different IP table; rebuilding")
+
+    if source is None:
+        raise FileNotFoundError(f"IP data not found at {ip_path}")
+    ip_df = read_table(ip_path, schema=IP_COUNTRY_SCHEMA)
+    logger.info(f"Loaded IP_Data: {ip_df.shape}")
+    index = IpCountryIndex.from_frame(ip_df)
+    if index_path is not None:
+        index.save(index_path, source=source)
+    return index
+
+
+@instrument(rows_arg=None)
 def load_and_clean_fraud_data(
     fraud_path: Path,
-    ip_path: Path
+    ip_path: Path,
+    ip_index_path: Optional[Path] = None,
+    window_features: bool = False,
+    pool: Optional[Executor] = None,
+    partitions: int = 1,
+    cache: Optional[StageCache] = None
 ) -> pd.DataFrame:
     """
     Full cleaning + feature engineering for Fraud_Data.csv
+
+    With a process pool, the rows are split into user_id hash partitions that
+    are cleaned, mapped and engineered in parallel (see src.parallel).
+    With a stage cache, the cleaned, geo-mapped and engineered frames are
+    reused when their inputs and code are unchanged, and only the stages
+    after the last cache hit run.
     """
     logger.info("Starting Fraud_Data preprocessing pipeline...")
+    cache = cache or StageCache.disabled()
 
-    # 1. Load Data with Error Handling
     try:
         if not fraud_path.exists():
             raise FileNotFoundError(f"Fraud data not found at {fraud_path}")
-        if not ip_path.exists():
-            raise FileNotFoundError(f"IP data not found at {ip_path}")
 
-        df = pd.read_csv(fraud_path)
-        ip_df = pd.read_csv(ip_path)
-        logger.info(f"Loaded Fraud_Data: {df.shape}, IP_Data: {ip_df.shape}")
+        # The index is derived from the IP table, so key on the table whenever it is there
+        ip_input = ip_path if ip_path.exists() or ip_index_path is None else ip_index_path
+        cleaned_key = cache.key(
+            'fraud_cleaned', inputs=[fraud_path],
+            params={'schema': FRAUD_RAW_SCHEMA, 'window_features': window_features},
+            code=[storage, data_cleaning, velocity] if window_features else [storage, data_cleaning]
+        )
+        geo_key = cache.key(
+            'fraud_geo', inputs=[cleaned_key, ip_input],
+            code=[data_processing, ip_index_module]
+        )
+        engineered_key = cache.key('fraud_engineered', inputs=[geo_key], code=[data_preprocessing])
 
     except Exception as e:
         logger.error(f"Error loading raw fraud data: {e}")
         raise
 
-    # 2. Schema Validation
-    # Basic check to ensure we have critical columns before processing
-    expected_cols = ['user_id', 'signup_time', 'purchase_time', 'ip_address']
-    validate_schema(df, expected_cols, "Fraud_Data")
+    def load() -> pd.DataFrame:
+        df = read_table(fraud_path, schema=FRAUD_RAW_SCHEMA)
+        logger.info(f"Loaded Fraud_Data: {df.shape}")
+        # Basic check to ensure we have critical columns before processing
+        expected_cols = ['user_id', 'signup_time', 'purchase_time', 'ip_address']
+        validate_schema(df, expected_cols, "Fraud_Data")
+        return df
 
-    # 3. Processing Steps
-    try:
-        df = remove_duplicates(df)
+    def clean() -> pd.DataFrame:
+        df = remove_duplicates(load())
         df = remove_missing_values(df)
-        
+        if window_features:
+            logger.info("Computing windowed velocity features...")
+            df = add_window_features(df)
+        return df
+
+    def geo_map() -> pd.DataFrame:
+        df = cache.fetch('fraud_cleaned', cleaned_key, clean)
         logger.info("Mapping IP addresses to countries...")
-        df = map_ips_to_countries(df, ip_df)
-        
+        return map_ips_to_countries(df, load_ip_index(ip_path, ip_index_path))
+
+    def engineer() -> pd.DataFrame:
+        df = cache.fetch('fraud_geo', geo_key, geo_map)
         logger.info("Engineering features...")
-        df = engineer_features(df)
-        
+        return engineer_features(df)
+
+    def parallel() -> pd.DataFrame:
+        logger.info(f"Processing {partitions} user_id partitions in parallel...")
+        return parallel_fraud_pipeline(load(), load_ip_index(ip_path, ip_index_path), pool,
+                                       n_partitions=partitions)
+
+    try:
+        df = cache.fetch('fraud_engineered', engineered_key, parallel if pool is not None else engineer)
+
     except Exception as e:
         logger.error(f"Error during Fraud_Data transformation: {e}")
         raise
@@ -89,6 +193,42 @@ def load_and_clean_fraud_data(
     return df
 
 
+@instrument(rows_arg=None)
+def stream_and_clean_fraud_data(
+    fraud_path: Path,
+    ip_path: Path,
+    output_path: Path,
+    chunksize: int,
+    ip_index_path: Optional[Path] = None,
+    monitor: Optional[DriftMonitor] = None
+) -> int:
+    """
+    Chunked variant of load_and_clean_fraud_data that writes straight to output_path,
+    updating monitor (if given) with every chunk written.
+    """
+    logger.info(f"Starting Fraud_Data streaming pipeline (chunksize={chunksize:,})...")
+
+    try:
+        if not fraud_path.exists():
+            raise FileNotFoundError(f"Fraud data not found at {fraud_path}")
+
+        header = next(iter_table_chunks(fraud_path, chunksize=1))
+        ip_index = load_ip_index(ip_path, ip_index_path)
+
+    except Exception as e:
+        logger.error(f"Error loading raw fraud data: {e}")
+        raise
+
+    expected_cols = ['user_id', 'signup_time', 'purchase_time', 'ip_address']
+    validate_schema(header, expected_cols, "Fraud_Data")
+
+    rows = stream_fraud_data(fraud_path, ip_index, output_path, chunksize=chunksize, schema=FRAUD_RAW_SCHEMA,
+                             monitor=monitor)
+    logger.info(f"✅ Fraud_Data streaming complete. Rows written: {rows:,}")
+    return rows
+
+
+@instrument(rows_arg=None)
 def load_and_clean_creditcard_data(path: Path) -> pd.DataFrame:
     """
     Minimal cleaning for creditcard.csv
@@ -99,16 +239,16 @@ def load_and_clean_creditcard_data(path: Path) -> pd.DataFrame:
         if not path.exists():
             raise FileNotFoundError(f"Credit card data not found at {path}")
 
-        df = pd.read_csv(path)
+        df = read_table(path, schema=CREDITCARD_SCHEMA)
         logger.info(f"Loaded creditcard.csv: {df.shape}")
         
         # Schema check
         validate_schema(df, ['Time', 'Amount', 'Class'], "creditcard.csv")
 
         # Deduplication
-        initial_rows = df.shape[0]
-        df = df.drop_duplicates()
-        duplicates_removed = initial_rows - df.shape[0]
+        duplicates = duplicate_mask(df)
+        df = df[~duplicates]
+        duplicates_removed = int(duplicates.sum())
         if duplicates_removed > 0:
             logger.info(f"Removed {duplicates_removed} duplicate rows.")
 
@@ -125,10 +265,120 @@ def load_and_clean_creditcard_data(path: Path) -> pd.DataFrame:
     return df
 
 
-def main():
+def process_creditcard_data(path: Path, output_path: Path, cache: Optional[StageCache] = None,
+                            compact: bool = False) -> tuple:
+    """
+    Cleans creditcard.csv (or reuses the cached result) and writes it; runs in
+    a worker process alongside Fraud_Data when --workers is set. Cleaning and
+    dedup always run on float64 values; compact only rounds Time and V1..V28
+    to float32 in the written file.
+    """
+    cache = cache or StageCache.disabled()
+    if not path.exists():
+        raise FileNotFoundError(f"Credit card data not found at {path}")
+    key = cache.key('creditcard_cleaned', inputs=[path], params={'schema': CREDITCARD_SCHEMA},
+                    code=[storage, load_and_clean_creditcard_data])
+    cc_df = cache.fetch('creditcard_cleaned', key, lambda: load_and_clean_creditcard_data(path))
+    write_table(cc_df, output_path, schema=CREDITCARD_COMPACT_SCHEMA if compact else CREDITCARD_SCHEMA)
+    logger.info(f"Saved to {output_path}")
+    return cc_df.shape
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Preprocess the raw fraud datasets.")
+    parser.add_argument(
+        '--chunksize', type=int, default=None,
+        help="Stream Fraud_Data in chunks of this many rows instead of loading it whole."
+    )
+    parser.add_argument(
+        '--input-format', choices=sorted(FORMAT_SUFFIXES), default='csv',
+        help="Format of the raw files in data/raw (default: csv)."
+    )
+    parser.add_argument(
+        '--output-format', choices=sorted(FORMAT_SUFFIXES), default='csv',
+        help="Format of the processed files in data/processed (default: csv)."
+    )
+    parser.add_argument(
+        '--float32-creditcard', action='store_true',
+        help="Write creditcard Time and V1..V28 as float32 (Parquet/Feather output only). "
+             "Halves their size but rounds them to about 7 significant digits."
+    )
+    parser.add_argument(
+        '--ip-index', type=Path, default=None,
+        help="Directory of a compiled IP -> country index; built from the IP table on first use."
+    )
+    parser.add_argument(
+        '--window-features', action='store_true',
+        help="Add 1h/24h/7d transaction counts and time since previous transaction "
+             "per user, device and IP."
+    )
+    parser.add_argument(
+        '--workers', type=int, default=1,
+        help="Worker processes: datasets run concurrently and Fraud_Data is split into "
+             "user_id partitions (default: 1, serial)."
+    )
+    parser.add_argument(
+        '--cache-dir', type=Path, default=project_root / 'data' / 'cache',
+        help="Stage cache directory (default: data/cache)."
+    )
+    parser.add_argument(
+        '--cache-max-gb', type=float, default=DEFAULT_MAX_BYTES / 1024**3,
+        help="Size of the stage cache before least recently used entries are evicted (default: 5)."
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help="Run every stage without reading or writing the stage cache."
+    )
+    parser.add_argument(
+        '--save-profile', type=Path, default=None,
+        help="Save a monitoring profile (streaming sketches) of the engineered Fraud_Data here, "
+             "the reference for drift monitoring (see scripts/serve.py --drift-reference)."
+    )
+    parser.add_argument(
+        '--drift-reference', type=Path, default=None,
+        help="Compare the engineered Fraud_Data against this saved profile and log null-rate, "
+             "PSI / KS drift and unknown-country alerts."
+    )
+    parser.add_argument(
+        '--metrics-json', type=Path, default=None,
+        help="Record wall / CPU time, peak RSS growth and rows in / out per pipeline stage "
+             "and save them here as JSON."
+    )
+    parser.add_argument(
+        '--metrics-prom', type=Path, default=None,
+        help="Save the stage metrics in the Prometheus text format (for the node_exporter textfile collector)."
+    )
+    parser.add_argument(
+        '--profile-dir', type=Path, default=None,
+        help="Also write a profile of each top-level stage to this directory."
+    )
+    parser.add_argument(
+        '--profile-mode', choices=PROFILE_MODES, default='cprofile',
+        help="cprofile: deterministic .prof files (pstats / snakeviz); sample: low-overhead "
+             "stack sampling written as folded stacks (flamegraph.pl / speedscope)."
+    )
+    parser.add_argument(
+        '--invalidate-cache', nargs='*', metavar='STAGE', default=None,
+        help="Delete cached outputs of the given stages (all stages if none given) and exit."
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.window_features and args.workers > 1:
+        parser.error("--window-features needs whole device and IP histories and can't be combined with --workers")
+    if args.window_features and args.chunksize:
+        parser.error("--window-features needs whole entity histories and can't be combined with --chunksize")
+    if args.float32_creditcard and args.output_format == 'csv':
+        parser.error("--float32-creditcard only applies to --output-format parquet or feather")
+    return args
+
+
+def main(argv=None):
     """
     Main execution entry point.
     """
+    args = parse_args(argv)
+
     # Define paths using pathlib
     data_raw = project_root / 'data' / 'raw'
     data_processed = project_root / 'data' / 'processed'
@@ -136,29 +386,77 @@ def main():
     # Ensure output directory exists
     data_processed.mkdir(parents=True, exist_ok=True)
 
+    cache = StageCache(args.cache_dir, max_bytes=int(args.cache_max_gb * 1024**3), enabled=not args.no_cache)
+    if args.invalidate_cache is not None:
+        cache.invalidate(args.invalidate_cache)
+        return
+
+    profiling = args.metrics_json is not None or args.metrics_prom is not None or args.profile_dir is not None
+    recorder = enable_profiling(args.profile_dir, args.profile_mode) if profiling else None
+
+    in_ext = FORMAT_SUFFIXES[args.input_format]
+    out_ext = FORMAT_SUFFIXES[args.output_format]
+
+    pool = process_pool(args.workers) if args.workers > 1 else None
     try:
+        # Credit card data is independent of Fraud_Data; start it first when running in parallel
+        cc_path = data_raw / f'creditcard{in_ext}'
+        cc_output = data_processed / f'creditcard_processed{out_ext}'
+        cc_future = (pool.submit(process_creditcard_data, cc_path, cc_output, cache, args.float32_creditcard)
+                     if pool else None)
+
         # Process Fraud Data
-        fraud_df = load_and_clean_fraud_data(
-            fraud_path=data_raw / 'Fraud_Data.csv',
-            ip_path=data_raw / 'IpAddress_to_Country.csv'
-        )
-        fraud_output = data_processed / 'fraud_data_engineered.csv'
-        fraud_df.to_csv(fraud_output, index=False)
+        fraud_output = data_processed / f'fraud_data_engineered{out_ext}'
+        monitoring = args.save_profile is not None or args.drift_reference is not None
+        monitor = fraud_monitor(args.drift_reference, args.window_features) if monitoring else None
+        if args.chunksize:
+            stream_and_clean_fraud_data(
+                fraud_path=data_raw / f'Fraud_Data{in_ext}',
+                ip_path=data_raw / f'IpAddress_to_Country{in_ext}',
+                output_path=fraud_output,
+                chunksize=args.chunksize,
+                ip_index_path=args.ip_index,
+                monitor=monitor
+            )
+        else:
+            fraud_df = load_and_clean_fraud_data(
+                fraud_path=data_raw / f'Fraud_Data{in_ext}',
+                ip_path=data_raw / f'IpAddress_to_Country{in_ext}',
+                ip_index_path=args.ip_index,
+                window_features=args.window_features,
+                pool=pool,
+                partitions=args.workers,
+                cache=cache
+            )
+            write_table(fraud_df, fraud_output, schema=FRAUD_ENGINEERED_SCHEMA)
+            if monitor is not None:
+                monitor.update(fraud_df)
         logger.info(f"Saved to {fraud_output}")
+        if monitor is not None:
+            report_monitor(monitor, args.save_profile)
 
         # Process Credit Card Data
-        cc_df = load_and_clean_creditcard_data(
-            path=data_raw / 'creditcard.csv'
-        )
-        cc_output = data_processed / 'creditcard_processed.csv'
-        cc_df.to_csv(cc_output, index=False)
-        logger.info(f"Saved to {cc_output}")
+        if cc_future is not None:
+            cc_future.result()
+        else:
+            process_creditcard_data(cc_path, cc_output, cache, args.float32_creditcard)
         
+        if cache.enabled:
+            logger.info(f"Stage cache: {cache.hits} hits, {cache.misses} misses in this process")
         logger.info("🚀 All datasets processed successfully.")
 
     except Exception as e:
         logger.critical(f"Preprocessing pipeline failed: {e}")
         sys.exit(1)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if recorder is not None:
+            recorder.log_summary()
+            if args.metrics_json is not None:
+                recorder.save_json(args.metrics_json)
+            if args.metrics_prom is not None:
+                recorder.save_prometheus(args.metrics_prom)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,68 @@
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+# --- 1. Setup Logging ---
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger(__name__)
+
+# --- 2. Path Setup ---
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.append(str(project_root))
+
+try:
+    from src.scoring import load_scorer
+    from src.serving import create_app, serve
+    from src.ip_index import IpCountryIndex
+    from src.monitoring import DriftMonitor
+except ImportError as e:
+    logger.error(f"Failed to import src modules: {e}")
+    sys.exit(1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve fraud scores over HTTP.")
+    parser.add_argument('--bundle', type=Path, default=project_root / 'models' / 'fraud_xgb',
+                        help="Scoring bundle root (latest version is served) written by src.scoring.save_bundle.")
+    parser.add_argument('--ip-index', type=Path, default=None,
+                        help="Compiled IP index, used to fill 'country' from 'ip_address'.")
+    parser.add_argument('--reason-codes', type=int, default=0,
+                        help="Top contributing features returned with each decision.")
+    parser.add_argument('--drift-reference', type=Path, default=None,
+                        help="Monitoring profile of the training data (scripts/preprocess.py --save-profile); "
+                             "the scored stream is compared against it at GET /monitor.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Loads the bundle and serves it, via uvicorn when installed, otherwise the
+    standard-library HTTP server.
+    """
+    args = parse_args(argv)
+    try:
+        ip_index = IpCountryIndex.load(args.ip_index) if args.ip_index else None
+        monitor = DriftMonitor.load(args.drift_reference).as_reference() if args.drift_reference else None
+        scorer = load_scorer(args.bundle, ip_index=ip_index, reason_codes=args.reason_codes, monitor=monitor)
+    except Exception as e:
+        logger.critical(f"Failed to load scoring bundle: {e}")
+        sys.exit(1)
+
+    try:
+        import uvicorn
+    except ImportError:
+        serve(scorer, host=args.host, port=args.port)
+    else:
+        uvicorn.run(create_app(scorer), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# src/batching.py
+"""
+Asyncio micro-batching in front of a scorer.
+
+Callers await score(record) one transaction at a time. The batcher collects
+requests until max_batch_size are waiting or the oldest has waited
+max_wait_us, scores them with one preprocessing + predict call, and resolves
+each caller's future with its own probability.
+"""
+import asyncio
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.scoring import FraudScorer
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Args:
+        score_batch (Callable): Scores a list of records and returns one probability each,
+            e.g. FraudScorer.score_batch.
+        max_batch_size (int): Largest batch sent to score_batch.
+        max_wait_us (int): Longest time the first request of a batch waits for company.
+        max_in_flight (int): Batches scored concurrently; >1 lets the next batch
+            collect while the previous one is being scored.
+    """
+
+    def __init__(
+        self,
+        score_batch: Callable[[Sequence[Mapping]], np.ndarray],
+        max_batch_size: int = 64,
+        max_wait_us: int = 500,
+        max_in_flight: int = 2
+    ):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        if max_wait_us < 0:
+            raise ValueError(f"max_wait_us must be >= 0, got {max_wait_us}")
+        self._score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1e6
+        self.max_in_flight = max_in_flight
+        self.batches_scored = 0
+        self.rows_scored = 0
+
+        self._pending = deque()
+        self._has_items: Optional[asyncio.Event] = None
+        self._is_full: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._runner: Optional[asyncio.Task] = None
+        self._closing = False
+        self._in_flight = set()
+
+    @classmethod
+    def from_model(cls, preprocessor, model, threshold: float = 0.5, **kwargs) -> "MicroBatcher":
+        """Builds a batcher around the preprocessor / model (or GridSearchCV) from training."""
+        return cls(FraudScorer(preprocessor, model, threshold=threshold).score_batch, **kwargs)
+
+    async def start(self):
+        """Starts the background collection loop on the running event loop."""
+        if self._runner is not None:
+            return
+        self._has_items = asyncio.Event()
+        self._is_full = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='microbatch')
+        self._closing = False
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Scores everything already submitted, then stops the loop.
+
+        New score() calls are refused from here on; the loop dispatches the
+        rest of the queue without waiting for batches to fill and exits once
+        it is empty, and stop() returns after the last batch is scored.
+        """
+        if self._runner is None:
+            return
+        self._closing = True
+        self._has_items.set()
+        self._is_full.set()
+        try:
+            await self._runner
+        finally:
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight, return_exceptions=True)
+            self._executor.shutdown(wait=True)
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def score(self, record: Mapping) -> float:
+        """Queues one record and waits for its fraud probability."""
+        if self._runner is None or self._closing:
+            raise RuntimeError("MicroBatcher is not running; call start() or use 'async with'")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((record, future))
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._is_full.set()
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while not (self._closing and not self._pending):
+            await self._has_items.wait()
+            if len(self._pending) < self.max_batch_size and self.max_wait > 0 and not self._closing:
+                try:
+                    await asyncio.wait_for(self._is_full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = [self._pending.popleft() for _ in range(min(self.max_batch_size, len(self._pending)))]
+            if len(self._pending) < self.max_batch_size:
+                self._is_full.clear()
+            if not self._pending:
+                self._has_items.clear()
+            if not batch:
+                continue
+
+            try:
+                await self._slots.acquire()
+            except asyncio.CancelledError:
+                # Cancelled while holding a batch: its callers would otherwise wait forever
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("MicroBatcher was cancelled before scoring"))
+                raise
+            task = loop.create_task(self._dispatch(loop, batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _dispatch(self, loop, batch):
+        records = [record for record, _ in batch]
+        try:
+            try:
+                results = await loop.run_in_executor(self._executor, self._score_batch, records)
+            except Exception as e:
+                # Re-score one by one so a single bad record only fails its own caller
+                logger.warning(f"Micro-batch of {len(batch)} failed ({e}); scoring rows individually")
+                results = await loop.run_in_executor(self._executor, self._score_each, records)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(float(result))
+            self.batches_scored += 1
+            self.rows_scored += len(batch)
+        except Exception as e:
+            logger.error(f"Error scoring micro-batch of {len(batch)}: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def _score_each(self, records):
+        results = []
+        for record in records:
+            try:
+                results.append(self._score_batch([record])[0])
+            except Exception as e:
+                results.append(e)
+        return results
@@ -0,0 +1,354 @@
+# src/bundle.py
+"""
+Versioned scoring bundles.
+
+A bundle is a directory holding everything the scoring service needs, in
+formats that load without unpickling sklearn objects:
+
+    manifest.json      format version, threshold, feature names, schema hash,
+                       model kind, missing value, library versions
+    preprocessor.json  CompiledPreprocessor columns and category -> column (or code) maps
+    mean.npy/scale.npy numeric scaling vectors (memory-mapped on load)
+    model.ubj          XGBoost booster in its native binary (UBJSON) format
+    linear.npz         coefficients and intercept of a linear model instead
+
+save_bundle writes each bundle to the next version directory under a root
+(root/v0001, root/v0002, ...), renaming it into place only once complete.
+load_bundle reads the latest (or a given) version and checks its schema hash.
+
+XGBoost boosters are loaded through NativeBooster, a ctypes binding to the
+libxgboost shared library that ships with the xgboost package, so a scoring
+process never runs `import xgboost` (which imports sklearn and scipy and
+takes over a second). Predictions come from the same library call
+(XGBoosterPredictFromDense) that Booster.inplace_predict makes.
+"""
+import ctypes
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.scoring import CompiledPreprocessor
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+MANIFEST = 'manifest.json'
+_VERSION_PREFIX = 'v'
+
+_lib = None
+
+
+def _find_libxgboost() -> Optional[Path]:
+    """Path of the xgboost package's shared library, found without importing the package."""
+    spec = importlib.util.find_spec('xgboost')
+    if spec is None or spec.origin is None:
+        return None
+    package = Path(spec.origin).parent
+    names = {'linux': 'libxgboost.so', 'darwin': 'libxgboost.dylib', 'win32': 'xgboost.dll'}
+    name = names.get(sys.platform, 'libxgboost.so')
+    for directory in (package / 'lib', Path(sys.prefix) / 'lib', Path(sys.base_prefix) / 'lib'):
+        if (directory / name).exists():
+            return directory / name
+    return None
+
+
+def _load_lib():
+    global _lib
+    if _lib is None:
+        path = _find_libxgboost()
+        if path is None:
+            raise ImportError("libxgboost shared library not found")
+        lib = ctypes.cdll.LoadLibrary(str(path))
+        lib.XGBGetLastError.restype = ctypes.c_char_p
+        _lib = lib
+    return _lib
+
+
+def _check(status: int):
+    if status != 0:
+        raise RuntimeError(_lib.XGBGetLastError().decode())
+
+
+class NativeBooster:
+    """
+    Minimal XGBoost booster over the C API: loads a saved model and predicts
+    probabilities from dense float arrays. Thread-safe like Booster.inplace_predict.
+
+    Args:
+        path (Path): Model file written by Booster.save_model.
+        missing (float): Missing value the model was trained with.
+    """
+
+    def __init__(self, path: Path, missing: float = np.nan):
+        lib = _load_lib()
+        self.path = Path(path)
+        self.missing = float(missing)
+        self.handle = ctypes.c_void_p()
+        _check(lib.XGBoosterCreate(None, ctypes.c_uint64(0), ctypes.byref(self.handle)))
+        _check(lib.XGBoosterLoadModel(self.handle, str(self.path).encode()))
+        n = ctypes.c_uint64()
+        _check(lib.XGBoosterGetNumFeature(self.handle, ctypes.byref(n)))
+        self._num_features = int(n.value)
+        self._xgb_booster = None
+
+    def __del__(self):
+        if getattr(self, 'handle', None) and _lib is not None:
+            _lib.XGBoosterFree(self.handle)
+            self.handle = None
+
+    def get_booster(self) -> "NativeBooster":
+        return self
+
+    def num_features(self) -> int:
+        return self._num_features
+
+    def copy(self) -> "NativeBooster":
+        """An independent booster loaded from the same model file."""
+        return NativeBooster(self.path, self.missing)
+
+    def set_param(self, params: Dict[str, object]):
+        for key, value in params.items():
+            _check(_lib.XGBoosterSetParam(self.handle, str(key).encode(), str(value).encode()))
+
+    def inplace_predict(self, X: np.ndarray, missing: Optional[float] = None,
+                        validate_features: bool = False) -> np.ndarray:
+        """Probabilities for the rows of a 2-D float array."""
+        X = np.ascontiguousarray(X)
+        if X.dtype not in (np.float32, np.float64):
+            X = X.astype(np.float64)
+        if X.shape[1] != self._num_features:
+            raise ValueError(f"Feature shape mismatch, expected: {self._num_features}, got {X.shape[1]}")
+        missing = self.missing if missing is None else missing
+        config = json.dumps({'type': 0, 'training': False, 'iteration_begin': 0, 'iteration_end': 0,
+                             'missing': float(missing), 'strict_shape': False, 'cache_id': 0})
+        shape = ctypes.POINTER(ctypes.c_uint64)()
+        dims = ctypes.c_uint64()
+        preds = ctypes.POINTER(ctypes.c_float)()
+        _check(_lib.XGBoosterPredictFromDense(
+            self.handle, json.dumps(X.__array_interface__).encode(), config.encode(), None,
+            ctypes.byref(shape), ctypes.byref(dims), ctypes.byref(preds)))
+        out_shape = tuple(int(shape[i]) for i in range(dims.value))
+        return np.ctypeslib.as_array(preds, shape=(int(np.prod(out_shape)),)).copy().reshape(out_shape)
+
+    def to_xgboost(self):
+        """The same model as an xgboost.Booster (imports xgboost), for pred_contribs and friends."""
+        if self._xgb_booster is None:
+            import xgboost as xgb
+
+            self._xgb_booster = xgb.Booster(model_file=str(self.path))
+        return self._xgb_booster
+
+
+class LinearModel:
+    """Coefficients of a binary linear classifier, with the attributes FraudScorer scores from."""
+
+    def __init__(self, coef: np.ndarray, intercept: np.ndarray, classes: np.ndarray):
+        self.coef_ = coef
+        self.intercept_ = intercept
+        self.classes_ = classes
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        p = 1.0 / (1.0 + np.exp(-(np.asarray(X) @ self.coef_[0] + self.intercept_[0])))
+        return np.column_stack([1 - p, p])
+
+
+def _plain(value):
+    """JSON-safe form of a category value (NumPy scalars -> Python scalars)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def schema_hash(preprocessor: CompiledPreprocessor) -> str:
+    """Hash of the input schema: numeric features, categorical features with their categories, output columns."""
+    schema = {
+        'numeric': [[str(name), int(pos)] for name, pos in
+                    zip(preprocessor.numeric_features, preprocessor.numeric_columns)],
+        'categorical': [[str(name), sorted([[str(cat), int(pos)] for cat, pos in mapping.items()],
+                                           key=lambda item: item[1])]
+                        for name, mapping in zip(preprocessor.categorical_features, preprocessor.category_maps)],
+        'feature_names': [str(name) for name in preprocessor.feature_names],
+    }
+    if preprocessor.coded_features:
+        schema['coded'] = [[str(name), int(pos), sorted([[str(cat), int(code)] for cat, code in mapping.items()],
+                                                        key=lambda item: item[1])]
+                           for name, pos, mapping in zip(preprocessor.coded_features, preprocessor.coded_columns,
+                                                         preprocessor.code_maps)]
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+
+def bundle_versions(root: Path) -> List[Path]:
+    """Complete bundle versions under root, oldest first."""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    return sorted(p for p in root.iterdir()
+                  if p.is_dir() and p.name.startswith(_VERSION_PREFIX) and p.name[1:].isdigit()
+                  and (p / MANIFEST).exists())
+
+
+def _library_versions() -> Dict[str, str]:
+    versions = {'numpy': np.__version__}
+    for name in ('xgboost', 'sklearn'):
+        module = sys.modules.get(name)
+        if module is not None:
+            versions[name] = module.__version__
+    return versions
+
+
+def save_bundle(root: Path, preprocessor, model, threshold: float = 0.5) -> Path:
+    """
+    Writes a new bundle version under root.
+
+    Args:
+        root (Path): Bundle root, e.g. models/fraud_xgb.
+        preprocessor: Fitted ColumnTransformer from prepare_data_for_modeling (or a CompiledPreprocessor).
+        model: Fitted XGBClassifier / Booster or binary linear model, or the search
+            object returned by train_xgboost.
+        threshold (float): Decision threshold stored with the bundle.
+
+    Returns:
+        Path: The new version directory.
+
+    Raises:
+        ValueError: If the model is neither XGBoost nor a binary linear model,
+            or doesn't match the preprocessor's width.
+    """
+    try:
+        root = Path(root)
+        if not isinstance(preprocessor, CompiledPreprocessor):
+            preprocessor = CompiledPreprocessor.from_column_transformer(preprocessor)
+        model = getattr(model, 'best_estimator_', model)
+        missing = float(getattr(model, 'missing', np.nan))
+        booster = model.get_booster() if hasattr(model, 'get_booster') else None
+        if booster is None and type(model).__name__ == 'Booster':
+            booster = model
+        if booster is not None:
+            n_model_features = booster.num_features()
+        elif hasattr(model, 'coef_') and getattr(model, 'classes_', np.array([])).shape == (2,):
+            n_model_features = model.coef_.shape[1]
+        else:
+            raise ValueError(f"Cannot bundle a {type(model).__name__}: need an XGBoost or binary linear model")
+        if n_model_features != preprocessor.n_features:
+            raise ValueError(f"Model expects {n_model_features} features, "
+                             f"the preprocessor produces {preprocessor.n_features}")
+
+        existing = bundle_versions(root)
+        number = int(existing[-1].name[1:]) + 1 if existing else 1
+        version = f"{_VERSION_PREFIX}{number:04d}"
+        staging = root / f".{version}.{os.getpid()}.tmp"
+        staging.mkdir(parents=True)
+
+        np.save(staging / 'mean.npy', preprocessor.mean)
+        np.save(staging / 'scale.npy', preprocessor.scale)
+        with open(staging / 'preprocessor.json', 'w') as f:
+            json.dump({
+                'numeric_features': [str(c) for c in preprocessor.numeric_features],
+                'numeric_columns': preprocessor.numeric_columns.tolist(),
+                'categorical_features': [str(c) for c in preprocessor.categorical_features],
+                'category_maps': [[[_plain(cat), int(pos)] for cat, pos in mapping.items()]
+                                  for mapping in preprocessor.category_maps],
+                'coded_features': [str(c) for c in preprocessor.coded_features],
+                'coded_columns': preprocessor.coded_columns.tolist(),
+                'code_maps': [[[_plain(cat), int(code)] for cat, code in mapping.items()]
+                              for mapping in preprocessor.code_maps],
+                'n_features': preprocessor.n_features,
+                'feature_names': [str(c) for c in preprocessor.feature_names],
+            }, f)
+        if booster is not None:
+            booster.save_model(str(staging / 'model.ubj'))
+            kind = 'xgboost'
+        else:
+            np.savez(staging / 'linear.npz', coef=model.coef_, intercept=model.intercept_, classes=model.classes_)
+            kind = 'linear'
+
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'version': version,
+            'model_kind': kind,
+            'missing': None if np.isnan(missing) else missing,
+            'threshold': float(threshold),
+            'n_features': preprocessor.n_features,
+            'feature_names': [str(c) for c in preprocessor.feature_names],
+            'schema_hash': schema_hash(preprocessor),
+            'libraries': _library_versions(),
+        }
+        with open(staging / MANIFEST, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        staging.rename(root / version)
+        logger.info(f"✅ Saved scoring bundle {root / version} (schema {manifest['schema_hash'][:12]})")
+        return root / version
+
+    except Exception as e:
+        logger.error(f"Error in save_bundle: {str(e)}")
+        raise
+
+
+def load_bundle(path: Path, version: Optional[str] = None, native: bool = True) -> dict:
+    """
+    Reads a bundle written by save_bundle.
+
+    Args:
+        path (Path): A bundle root (its latest version is loaded) or a version directory.
+        version (str): Version under the root to load instead, e.g. 'v0003'.
+        native (bool): Load XGBoost models as NativeBooster (no xgboost import)
+            rather than XGBClassifier.
+
+    Returns:
+        dict: 'preprocessor' (CompiledPreprocessor), 'model', 'threshold' and 'manifest'.
+
+    Raises:
+        FileNotFoundError: If there is no bundle at path.
+        ValueError: If the bundle format is unknown or its schema hash doesn't match.
+    """
+    path = Path(path)
+    if version is not None:
+        path = path / version
+    elif not (path / MANIFEST).exists():
+        versions = bundle_versions(path)
+        if not versions:
+            raise FileNotFoundError(f"No scoring bundle found at {path}")
+        path = versions[-1]
+
+    with open(path / MANIFEST) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"Unsupported bundle format {manifest.get('format')} at {path}")
+
+    with open(path / 'preprocessor.json') as f:
+        spec = json.load(f)
+    preprocessor = CompiledPreprocessor(
+        numeric_features=spec['numeric_features'],
+        numeric_columns=spec['numeric_columns'],
+        mean=np.load(path / 'mean.npy', mmap_mode='r'),
+        scale=np.load(path / 'scale.npy', mmap_mode='r'),
+        categorical_features=spec['categorical_features'],
+        category_maps=[{cat: pos for cat, pos in pairs} for pairs in spec['category_maps']],
+        n_features=spec['n_features'],
+        feature_names=spec['feature_names'],
+        coded_features=spec.get('coded_features', []),
+        code_maps=[{cat: code for cat, code in pairs} for pairs in spec.get('code_maps', [])],
+        coded_columns=spec.get('coded_columns', []),
+    )
+    if schema_hash(preprocessor) != manifest['schema_hash']:
+        raise ValueError(f"Schema hash mismatch in {path}: the bundle was modified or is corrupt")
+
+    missing = np.nan if manifest['missing'] is None else manifest['missing']
+    if manifest['model_kind'] == 'xgboost':
+        if native and _find_libxgboost() is not None:
+            model = NativeBooster(path / 'model.ubj', missing=missing)
+        else:
+            from xgboost import XGBClassifier
+
+            model = XGBClassifier(missing=missing)
+            model.load_model(str(path / 'model.ubj'))
+    else:
+        arrays = np.load(path / 'linear.npz')
+        model = LinearModel(arrays['coef'], arrays['intercept'], arrays['classes'])
+    return {'preprocessor': preprocessor, 'model': model, 'threshold': manifest['threshold'],
+            'manifest': manifest}
@@ -0,0 +1,216 @@
+# src/cache.py
+"""
+Content-addressed cache for pipeline stage outputs.
+
+A stage's key hashes everything its output depends on:
+- the content of its input files, or the keys of the upstream stages it consumes
+- its parameters
+- the source code of the functions it runs
+- the pandas / NumPy versions
+
+Keys can be computed without running anything. That lets a pipeline chain
+them (cleaned -> geo-mapped -> engineered) and only execute the stages
+after the last hit. Outputs are stored as Feather files and evicted least
+recently used first once the cache exceeds its size budget.
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from src.storage import read_table, write_table
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 5 * 1024**3
+_FINGERPRINTS = 'fingerprints.json'
+_SUFFIX = '.feather'
+
+
+def code_version(objects: Iterable) -> str:
+    """Hash of the source code of the given modules, functions or classes."""
+    digest = hashlib.sha256()
+    for obj in objects:
+        name = getattr(obj, '__qualname__', obj.__name__)
+        digest.update(f"{getattr(obj, '__module__', '')}.{name}".encode())
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class StageCache:
+    """
+    Args:
+        root (Path): Cache directory, created on first write.
+        max_bytes (int): Total size of cached outputs kept before LRU eviction.
+        enabled (bool): When False, keys are not computed and every stage runs.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_MAX_BYTES, enabled: bool = True):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def disabled(cls) -> "StageCache":
+        """A cache that never stores anything."""
+        return cls(Path(os.devnull), enabled=False)
+
+    def fingerprint(self, path: Path) -> str:
+        """
+        Content hash of a file, or of every file under a directory. Hashes are
+        remembered by (size, mtime), so unchanged inputs are not re-read.
+        """
+        path = Path(path)
+        if path.is_dir():
+            digest = hashlib.sha256()
+            for child in sorted(p for p in path.rglob('*') if p.is_file()):
+                digest.update(str(child.relative_to(path)).encode())
+                digest.update(self.fingerprint(child).encode())
+            return digest.hexdigest()
+        if not path.exists():
+            raise FileNotFoundError(f"Cache input not found: {path}")
+
+        stat = path.stat()
+        known = self._load_fingerprints()
+        entry = known.get(str(path.resolve()))
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['hash']
+        content_hash = _hash_file(path)
+        known[str(path.resolve())] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': content_hash}
+        self._save_fingerprints(known)
+        return content_hash
+
+    def _load_fingerprints(self) -> Dict[str, dict]:
+        try:
+            with open(self.root / _FINGERPRINTS) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_fingerprints(self, known: Dict[str, dict]):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f'{_FINGERPRINTS}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(known, f)
+        os.replace(tmp, self.root / _FINGERPRINTS)
+
+    def key(
+        self,
+        stage: str,
+        inputs: Sequence[Union[Path, str]] = (),
+        params: Optional[dict] = None,
+        code: Sequence = ()
+    ) -> str:
+        """
+        Cache key of a stage output.
+
+        Args:
+            stage (str): Stage name, also used to group entries for invalidation.
+            inputs (sequence): Input files / directories (hashed by content) or
+                keys of upstream stages (str).
+            params (dict, optional): JSON-serializable stage parameters.
+            code (sequence): Modules, functions or classes whose source the output depends on.
+
+        Returns:
+            str: Hex key, or '' when the cache is disabled.
+        """
+        if not self.enabled:
+            return ''
+        parts = {
+            'stage': stage,
+            'inputs': [self.fingerprint(i) if isinstance(i, Path) else str(i) for i in inputs],
+            'params': params or {},
+            'code': code_version(code),
+            'versions': [pd.__version__, np.__version__],
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, stage: str, key: str) -> Path:
+        return self.root / f'{stage}-{key[:32]}{_SUFFIX}'
+
+    def fetch(self, stage: str, key: str, compute: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Returns the cached output for key, or runs compute(), stores its result
+        and evicts old entries if the cache is over budget.
+        """
+        if not self.enabled:
+            return compute()
+        path = self._path(stage, key)
+        if path.exists():
+            try:
+                df = read_table(path)
+                os.utime(path)
+                self.hits += 1
+                logger.info(f"⚡ Cache hit: {stage} ({key[:12]})")
+                return df
+            except Exception as e:
+                logger.warning(f"Unreadable cache entry {path.name} ({e}); recomputing")
+
+        self.misses += 1
+        logger.info(f"Cache miss: {stage} ({key[:12]})")
+        df = compute()
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.stem}.{os.getpid()}.tmp{_SUFFIX}')
+        write_table(df, tmp)
+        os.replace(tmp, path)
+        self.evict()
+        return df
+
+    def entries(self) -> List[Path]:
+        """Cached outputs, least recently used first."""
+        if not self.root.is_dir():
+            return []
+        return sorted((p for p in self.root.glob(f'*{_SUFFIX}') if '.tmp' not in p.name),
+                      key=lambda p: p.stat().st_mtime_ns)
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.entries())
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache fits max_bytes; returns the count."""
+        entries = self.entries()
+        total = sum(p.stat().st_size for p in entries)
+        removed = 0
+        for path in entries:
+            if total <= self.max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            removed += 1
+        if removed:
+            logger.info(f"Evicted {removed} cache entries (cache size now {total / 1024**2:,.1f} MB)")
+        return removed
+
+    def invalidate(self, stages: Optional[Iterable[str]] = None) -> int:
+        """
+        Deletes the cached outputs of the given stages, or of every stage.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        stages = set(stages) if stages else None
+        removed = 0
+        for path in self.entries():
+            if stages is None or path.name.rsplit('-', 1)[0] in stages:
+                path.unlink(missing_ok=True)
+                removed += 1
+        if stages is None and (self.root / _FINGERPRINTS).exists():
+            (self.root / _FINGERPRINTS).unlink()
+        logger.info(f"✅ Invalidated {removed} cache entries in {self.root}")
+        return removed
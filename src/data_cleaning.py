@@ -1,30 +1,203 @@
 # src/data_cleaning.py
 import pandas as pd
+import numpy as np
 import logging
+from pathlib import Path
+from typing import List, Optional, Sequence
+from src.profiling import instrument
 
 logger = logging.getLogger(__name__)
 
-def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+_HASH_MULT = np.uint64(0x100000001B3)
+_OBJECT_BLOCK = 1_000_000
+
+
+def _subset_columns(df: pd.DataFrame, subset: Optional[Sequence[str]]) -> List[str]:
+    if subset is None:
+        return list(df.columns)
+    subset = [subset] if isinstance(subset, str) else list(subset)
+    missing_cols = [col for col in subset if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+    return subset
+
+
+def row_hashes(df: pd.DataFrame, subset: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    One 64-bit hash per row over the subset columns (all columns by default),
+    built column by column with vectorized hashing. Floats are canonicalized
+    first so -0.0 / 0.0 and all NaNs hash alike, as DataFrame.duplicated
+    treats them as equal.
+
+    Returns:
+        np.ndarray: uint64 hashes, one per row.
+    """
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    for col in _subset_columns(df, subset):
+        values = df[col]
+        if values.dtype.kind == 'f':
+            canonical = values.to_numpy() + 0.0
+            nan = np.isnan(canonical)
+            if nan.any():
+                canonical[nan] = np.nan
+            values = pd.Series(canonical, copy=False)
+        hashes *= _HASH_MULT
+        if values.dtype == object:
+            # Hashing strings builds a temporary copy of them; bound it to one block
+            for start in range(0, len(values), _OBJECT_BLOCK):
+                block = values.iloc[start:start + _OBJECT_BLOCK]
+                hashes[start:start + _OBJECT_BLOCK] ^= pd.util.hash_pandas_object(block, index=False).to_numpy()
+        else:
+            hashes ^= pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return hashes
+
+
+def duplicate_mask(
+    df: pd.DataFrame,
+    subset: Optional[Sequence[str]] = None,
+    hashes: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Marks rows that repeat an earlier row, like df.duplicated(subset) (first
+    occurrence kept), from one row hash per row instead of full-row
+    comparisons. Rows flagged by hash are checked against their first
+    occurrence, so a hash collision can never drop a distinct row.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        subset (sequence, optional): Columns that identify a duplicate; all by default.
+        hashes (np.ndarray, optional): Precomputed row_hashes(df, subset).
+
+    Returns:
+        np.ndarray: Boolean mask, True for duplicates.
+    """
+    columns = _subset_columns(df, subset)
+    if hashes is None:
+        hashes = row_hashes(df, columns)
+    # A stable sort groups equal hashes with each group's first occurrence leading it
+    order = np.argsort(hashes, kind='stable')
+    sorted_hashes = hashes[order]
+    repeat = np.zeros(len(order), dtype=bool)
+    repeat[1:] = sorted_hashes[1:] == sorted_hashes[:-1]
+    del sorted_hashes
+    duplicates = np.zeros(len(order), dtype=bool)
+    duplicates[order[repeat]] = True
+
+    repeats = np.flatnonzero(repeat)
+    if len(repeats):
+        group_starts = np.flatnonzero(~repeat)
+        dup_pos = order[repeats]
+        orig_pos = order[group_starts[np.searchsorted(group_starts, repeats, side='right') - 1]]
+        for col in columns:
+            a = df[col].iloc[dup_pos].to_numpy()
+            b = df[col].iloc[orig_pos].to_numpy()
+            same = (a == b) | (pd.isna(a) & pd.isna(b))
+            if not same.all():
+                logger.warning("Row hash collision detected; falling back to exact duplicate detection")
+                return df.duplicated(subset=columns).to_numpy()
+    return duplicates
+
+
+class RowHashDeduplicator:
+    """
+    Remembers 64-bit row hashes across chunks or partitions, so duplicate rows
+    can be dropped without keeping previously seen rows in memory.
+
+    Hashes are stored as sorted uint64 runs (8 bytes per unique row). Runs of
+    similar size are merged as they accumulate, so lookups stay logarithmic.
+    The seen set can be saved and loaded to carry it across runs.
+
+    Args:
+        subset (sequence, optional): Columns that identify a duplicate; all by default.
+    """
+
+    def __init__(self, subset: Optional[Sequence[str]] = None):
+        self.subset = subset
+        self._runs: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs)
+
+    def _seen(self, hashes: np.ndarray) -> np.ndarray:
+        seen = np.zeros(len(hashes), dtype=bool)
+        for run in self._runs:
+            pos = np.searchsorted(run, hashes)
+            pos[pos == len(run)] = 0
+            seen |= run[pos] == hashes
+        return seen
+
+    def _add(self, hashes: np.ndarray):
+        run = np.sort(hashes)
+        while self._runs and len(self._runs[-1]) <= len(run):
+            run = np.sort(np.concatenate([self._runs.pop(), run]))
+        self._runs.append(run)
+
+    def mask_new(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Returns a boolean mask marking the rows of df not seen in this or any
+        previous chunk (first occurrence wins, as in DataFrame.drop_duplicates).
+        Within df, duplicates are exact; across chunks they are matched by hash.
+        """
+        hashes = row_hashes(df, self.subset)
+        keep = ~duplicate_mask(df, self.subset, hashes=hashes)
+        if self._runs:
+            keep &= ~self._seen(hashes)
+        if keep.any():
+            self._add(hashes[keep])
+        return keep
+
+    def save(self, path: Path):
+        """Writes the seen hashes to a .npy file."""
+        hashes = np.sort(np.concatenate(self._runs)) if self._runs else np.empty(0, dtype=np.uint64)
+        self._runs = [hashes] if len(hashes) else []
+        np.save(Path(path), hashes)
+
+    @classmethod
+    def load(cls, path: Path, subset: Optional[Sequence[str]] = None) -> "RowHashDeduplicator":
+        """Restores a seen set written by save()."""
+        dedup = cls(subset=subset)
+        hashes = np.load(Path(path))
+        if len(hashes):
+            dedup._runs = [hashes]
+        return dedup
+
+
+@instrument()
+def remove_duplicates(
+    df: pd.DataFrame,
+    subset: Optional[Sequence[str]] = None,
+    deduplicator: Optional[RowHashDeduplicator] = None
+) -> pd.DataFrame:
     """
     Removes duplicate rows from a DataFrame and logs a summary report.
+
+    Each row is hashed once and the hashes are reused for counting and
+    dropping, instead of comparing full rows twice.
     
     Args:
         df (pd.DataFrame): The input DataFrame.
+        subset (sequence, optional): Columns that identify a duplicate; all by default.
+        deduplicator (RowHashDeduplicator, optional): Seen set shared across chunks or
+            partitions; rows already seen in earlier calls are dropped too.
         
     Returns:
         pd.DataFrame: The DataFrame with duplicates removed.
         
     Raises:
-        ValueError: If input is not a pandas DataFrame.
+        ValueError: If input is not a pandas DataFrame or subset columns are missing.
     """
     try:
         if not isinstance(df, pd.DataFrame):
             raise ValueError("Input must be a pandas DataFrame")
         
         initial_rows = len(df)
-        num_duplicates = df.duplicated().sum()
+        if deduplicator is not None:
+            keep = deduplicator.mask_new(df)
+        else:
+            keep = ~duplicate_mask(df, subset)
+        num_duplicates = initial_rows - int(keep.sum())
         
-        df_cleaned = df.drop_duplicates().reset_index(drop=True)
+        df_cleaned = df[keep].reset_index(drop=True)
         final_rows = len(df_cleaned)
         
         logger.info(f"Initial Row Count: {initial_rows:,}")
@@ -43,6 +216,7 @@ def remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
         raise
 
 
+@instrument()
 def remove_missing_values(df: pd.DataFrame) -> pd.DataFrame:
     """
     Removes rows with missing values from the DataFrame and logs a summary.
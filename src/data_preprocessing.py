@@ -1,16 +1,22 @@
 # src/data_preprocessing.py
 import pandas as pd
 import numpy as np
-from sklearn.compose import ColumnTransformer
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from sklearn.pipeline import Pipeline
 import logging
+from typing import Optional
+
+from src.feature_store import VelocityFeatureStore
+from src.profiling import instrument
 
 
 # Initialize logger for this module
 logger = logging.getLogger(__name__)
 
-def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
+@instrument()
+def engineer_features(
+    df: pd.DataFrame,
+    user_aggregates: Optional[pd.DataFrame] = None,
+    feature_store: Optional[VelocityFeatureStore] = None
+) -> pd.DataFrame:
     """
     Applies feature engineering operations to the cleaned Fraud_Data dataframe.
     
@@ -24,6 +30,12 @@ def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
     
     Args:
         df (pd.DataFrame): Cleaned dataframe with required columns.
+        user_aggregates (pd.DataFrame, optional): Precomputed per-user totals indexed by
+            user_id with 'user_txn_count' and 'user_total_spent' columns. Used when df is
+            only a chunk of the dataset; by default the totals are computed from df itself.
+        feature_store (VelocityFeatureStore, optional): Incremental store that df is added
+            to; user totals then cover every batch applied so far, without regrouping
+            earlier batches.
     
     Returns:
         pd.DataFrame: DataFrame with new engineered features.
@@ -35,6 +47,9 @@ def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
         if not isinstance(df, pd.DataFrame):
             raise ValueError("Input must be a pandas DataFrame")
         
+        if user_aggregates is not None and feature_store is not None:
+            raise ValueError("Pass either user_aggregates or feature_store, not both")
+
         required_cols = ['signup_time', 'purchase_time', 'user_id', 'purchase_value']
         missing_cols = [col for col in required_cols if col not in df.columns]
         if missing_cols:
@@ -55,8 +70,17 @@ def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
         df['time_since_signup'] = (df['purchase_time'] - df['signup_time']).dt.total_seconds() / 3600
         
         # Velocity features
-        df['user_txn_count'] = df.groupby('user_id')['user_id'].transform('count')
-        df['user_total_spent'] = df.groupby('user_id')['purchase_value'].transform('sum')
+        if feature_store is not None:
+            feature_store.update(df)
+            totals = feature_store.lookup(df, 'user_id')
+            df['user_txn_count'] = totals['user_txn_count']
+            df['user_total_spent'] = totals['user_total_spent']
+        elif user_aggregates is None:
+            df['user_txn_count'] = df.groupby('user_id')['user_id'].transform('count')
+            df['user_total_spent'] = df.groupby('user_id')['purchase_value'].transform('sum')
+        else:
+            df['user_txn_count'] = df['user_id'].map(user_aggregates['user_txn_count'])
+            df['user_total_spent'] = df['user_id'].map(user_aggregates['user_total_spent'])
         df['user_avg_purchase'] = df['user_total_spent'] / df['user_txn_count']
         
         # Drop original identifiers and timestamps (as intended)
@@ -77,18 +101,25 @@ def engineer_features(df: pd.DataFrame) -> pd.DataFrame:
 
 
 
-def build_preprocessor(df: pd.DataFrame):
+def build_preprocessor(df: pd.DataFrame, sparse: bool = False):
     """
     Builds a sklearn ColumnTransformer for scaling numeric + one-hot encoding categorical features.
     Excludes target column ('class' or 'Class').
+
+    With sparse=True the transformer outputs a float32 CSR matrix instead of a
+    dense array; feature names stay available from get_feature_names_out().
     """
+    # sklearn is imported here so feature engineering alone doesn't pay for it
+    from sklearn.compose import ColumnTransformer
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
     # Auto-detect feature types (exclude target)
     target_candidates = ['class', 'Class']
     target = next((col for col in target_candidates if col in df.columns), None)
 
     feature_df = df.drop(columns=[target]) if target else df
 
-    numeric_features = feature_df.select_dtypes(include=['int64', 'float64']).columns.tolist()
+    numeric_features = feature_df.select_dtypes(include='number').columns.tolist()
     categorical_features = feature_df.select_dtypes(include=['object', 'category']).columns.tolist()
 
     print(f"Numeric features ({len(numeric_features)}): {numeric_features}")
@@ -97,9 +128,11 @@ def build_preprocessor(df: pd.DataFrame):
     preprocessor = ColumnTransformer(
         transformers=[
             ('num', StandardScaler(), numeric_features),
-            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features)
+            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=sparse,
+                                  dtype=np.float32 if sparse else np.float64), categorical_features)
         ],
-        remainder='drop'
+        remainder='drop',
+        sparse_threshold=1.0 if sparse else 0.0
     )
 
     return preprocessor
@@ -2,61 +2,45 @@
 import pandas as pd
 import numpy as np
 import logging
+from typing import Union
+
+from src.ip_index import IpCountryIndex
+from src.profiling import instrument
 
 
 # Initialize logger for this module
 logger = logging.getLogger(__name__)
-def map_ips_to_countries(fraud_df: pd.DataFrame, ip_df: pd.DataFrame) -> pd.DataFrame:
+@instrument()
+def map_ips_to_countries(
+    fraud_df: pd.DataFrame,
+    ip_df: Union[pd.DataFrame, IpCountryIndex]
+) -> pd.DataFrame:
     """
     Maps IP addresses in the fraud dataset to countries using the IP lookup table.
-    Handles integer overflow, sorting, and out-of-range IPs.
+    Handles integer overflow and out-of-range IPs, and keeps the input row order.
 
     Args:
         fraud_df (pd.DataFrame): The dataframe containing 'ip_address'.
-        ip_df (pd.DataFrame): The dataframe mapping IP ranges to countries.
+        ip_df (pd.DataFrame | IpCountryIndex): The dataframe mapping IP ranges to
+            countries, or an index already compiled from it (see src.ip_index).
 
     Returns:
-        pd.DataFrame: fraud_df with a new 'country' column.
+        pd.DataFrame: fraud_df with 'ip_address' replaced by a categorical 'country' column.
     """
-    # 1. Type Casting to prevent Integer Overflow (Negative numbers issue)
-    # We use .copy() to ensure we don't modify the original dataframes outside the function unintentionally
-    fraud_df = fraud_df.copy()
-    ip_df = ip_df.copy()
-
-    logger.info("Converting IP addresses to int64...")
-    fraud_df['ip_address'] = fraud_df['ip_address'].astype('float').astype('int64')
-    ip_df['lower_bound_ip_address'] = ip_df['lower_bound_ip_address'].astype('float').astype('int64')
-    ip_df['upper_bound_ip_address'] = ip_df['upper_bound_ip_address'].astype('float').astype('int64')
-
-    # 2. Sort (Required for merge_asof)
-    ip_df = ip_df.sort_values('lower_bound_ip_address')
-    fraud_df = fraud_df.sort_values('ip_address')
-
-    # 3. Perform the range merge
-    print("Merging IP data (this may take a moment)...")
-    fraud_df = pd.merge_asof(
-        fraud_df,
-        ip_df,
-        left_on='ip_address',
-        right_on='lower_bound_ip_address',
-        direction='backward'
-    )
-
-    # 4. Cleanup Logic
-    # Case A: Gap or Above Max (IP > matched upper bound)
-    is_above_upper_bound = fraud_df['ip_address'] > fraud_df['upper_bound_ip_address']
-    
-    # Case B: Below Min (No match found, resulting in NaN)
-    is_country_nan = fraud_df['country'].isnull()
-
-    # Assign 'Unknown'
-    n_unknowns = (is_above_upper_bound | is_country_nan).sum()
-    fraud_df.loc[is_above_upper_bound | is_country_nan, 'country'] = 'Unknown'
-
-    # Drop the extra bound columns
-    fraud_df.drop(columns=['lower_bound_ip_address', 'upper_bound_ip_address','ip_address'], inplace=True)
+    if 'ip_address' not in fraud_df.columns:
+        raise ValueError("Missing required columns: ['ip_address']")
+
+    # 1. Compile the range table (pass an IpCountryIndex to reuse one across calls)
+    index = ip_df if isinstance(ip_df, IpCountryIndex) else IpCountryIndex.from_frame(ip_df)
+
+    # 2. Range lookup via binary search over the sorted lower bounds
+    country = index.lookup_countries(fraud_df['ip_address'].to_numpy())
 
+    # 3. Replace the raw IP with the country (original row order is preserved)
+    fraud_df = fraud_df.drop(columns=['ip_address'])
+    fraud_df['country'] = country
+
+    n_unknowns = int((country.codes == index.unknown_code).sum())
     logger.info(f"✅ Mapping complete. Found {n_unknowns:,} IPs with unknown countries.")
-    
-    return fraud_df
 
+    return fraud_df
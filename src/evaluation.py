@@ -1,39 +1,369 @@
 # src/evaluation.py
-from sklearn.metrics import classification_report, confusion_matrix, precision_recall_curve, auc
-import matplotlib.pyplot as plt
-from sklearn.metrics import precision_score, recall_score, f1_score
+"""
+Single-pass model evaluation.
 
-def evaluate_model(model, X_test, y_test, dataset_name, model_name):
+A model scores the test set once. The probabilities are sorted once and the
+true / false positive counts at every distinct threshold come from one
+cumulative sum, so the PR curve, AUC-PR, confusion matrices at any
+threshold, F1 and cost-weighted optimal thresholds are all cheap array
+lookups on the same counts. A sample is flagged when its probability is at
+or above the threshold, as in FraudScorer.
+
+Bootstrap confidence intervals reuse the same sort: a resample only changes
+how many times each sample counts, so each bootstrap row is a weighted
+cumulative sum over the one sorted order, computed for a block of resamples
+at a time.
+
+Plots are optional and never block: evaluate_model shows them with
+plt.show(block=False), and evaluate_models draws each one on its own Figure
+and only saves it, so it can run headless. matplotlib is only imported when
+a plot is drawn; with FRAUD_HEADLESS=1 (see src.plotting) nothing is shown
+and plots are only saved.
+"""
+import logging
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.plotting import headless, pyplot
+from src.profiling import instrument
+
+logger = logging.getLogger(__name__)
+
+# numpy 2 renamed trapz to trapezoid
+_trapezoid = getattr(np, 'trapezoid', None) or np.trapz
+
+
+def threshold_curve(y_true, y_prob) -> Dict[str, np.ndarray]:
+    """
+    True / false positive counts at every distinct threshold, from one sort.
+
+    Returns:
+        dict: 'thresholds' (decreasing), 'tp' and 'fp' (samples flagged at
+        prob >= threshold), 'n_pos' and 'n_neg'.
+
+    Raises:
+        ValueError: If y_true and y_prob differ in length or are empty.
+    """
+    y_true = np.asarray(y_true).ravel() == 1
+    y_prob = np.asarray(y_prob, dtype=np.float64).ravel()
+    if len(y_true) != len(y_prob) or len(y_true) == 0:
+        raise ValueError(f"Got {len(y_true)} labels and {len(y_prob)} scores")
+
+    # Same ordering and tie handling as sklearn's precision_recall_curve
+    order = np.argsort(y_prob, kind='mergesort')[::-1]
+    y_prob = y_prob[order]
+    y_true = y_true[order]
+    last_of_value = np.r_[np.flatnonzero(np.diff(y_prob)), len(y_prob) - 1]
+    tp = np.cumsum(y_true, dtype=np.float64)[last_of_value]
+    fp = 1 + last_of_value - tp
+    return {'thresholds': y_prob[last_of_value], 'tp': tp, 'fp': fp,
+            'n_pos': float(y_true.sum()), 'n_neg': float(len(y_true) - y_true.sum())}
+
+
+def pr_curve(curve: Dict[str, np.ndarray]):
+    """(precision, recall, thresholds) in precision_recall_curve's order and end point."""
+    tp, fp = curve['tp'], curve['fp']
+    flagged = tp + fp
+    precision = np.divide(tp, flagged, out=np.zeros_like(tp), where=flagged != 0)
+    recall = tp / curve['n_pos'] if curve['n_pos'] else np.ones_like(tp)
+    return np.r_[precision[::-1], 1], np.r_[recall[::-1], 0], curve['thresholds'][::-1]
+
+
+def pr_auc(curve: Dict[str, np.ndarray]) -> float:
+    """Area under the PR curve, as sklearn's auc(recall, precision) over precision_recall_curve."""
+    precision, recall, _ = pr_curve(curve)
+    # Trapezoids over recall, which only moves one way (what auc() computes)
+    return float(abs(_trapezoid(precision, recall)))
+
+
+def counts_at(curve: Dict[str, np.ndarray], thresholds) -> Dict[str, np.ndarray]:
+    """
+    Confusion matrix counts at any thresholds (scalar or array), flagging
+    prob >= threshold, by binary search in the curve.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    k = np.searchsorted(-curve['thresholds'], -thresholds, side='right')
+    tp = np.where(k > 0, curve['tp'][np.maximum(k - 1, 0)], 0.0)
+    fp = np.where(k > 0, curve['fp'][np.maximum(k - 1, 0)], 0.0)
+    return {'tp': tp, 'fp': fp, 'fn': curve['n_pos'] - tp, 'tn': curve['n_neg'] - fp}
+
+
+def _ratio(num, den):
+    num, den = np.asarray(num, dtype=np.float64), np.asarray(den, dtype=np.float64)
+    return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den != 0)
+
+
+def best_thresholds(curve: Dict[str, np.ndarray], cost_fp: float = 1.0, cost_fn: float = 1.0) -> dict:
+    """
+    Thresholds maximizing F1 and minimizing cost_fp * FP + cost_fn * FN,
+    over every distinct threshold (and flagging nothing, for the cost).
+    """
+    tp, fp, n_pos = curve['tp'], curve['fp'], curve['n_pos']
+    f1 = _ratio(2 * tp, tp + fp + n_pos)
+    best_f1 = int(np.argmax(f1))
+
+    cost = cost_fp * fp + cost_fn * (n_pos - tp)
+    best_cost = int(np.argmin(cost))
+    if cost_fn * n_pos < cost[best_cost]:
+        cost_threshold, min_cost = np.inf, cost_fn * n_pos
+    else:
+        cost_threshold, min_cost = curve['thresholds'][best_cost], cost[best_cost]
+    return {'Best-F1 Threshold': float(curve['thresholds'][best_f1]), 'Best F1': float(f1[best_f1]),
+            'Cost-Optimal Threshold': float(cost_threshold), 'Min Cost': float(min_cost)}
+
+
+def bootstrap_metrics(
+    y_true,
+    y_prob,
+    n_boot: int = 1000,
+    threshold: float = 0.5,
+    random_state: Optional[int] = None,
+    stratify: bool = False,
+    indices: Optional[np.ndarray] = None,
+    max_memory_mb: int = 64
+) -> Dict[str, np.ndarray]:
+    """
+    AUC-PR, precision and recall (at threshold) of n_boot bootstrap resamples.
+
+    Resample indices are drawn as a (block, n) matrix, turned into per-sample
+    counts in sorted-score order, and every resample's curve comes from a
+    weighted cumulative sum, so nothing is re-sorted. Blocks are sized to
+    keep the working arrays within max_memory_mb.
+
+    Args:
+        stratify (bool): Resample positives and negatives separately, so every
+            resample keeps the test set's class counts.
+        indices (np.ndarray): Explicit (n_boot, n) resample indices instead of random ones.
+
+    Returns:
+        dict: 'AUC-PR', 'Precision' and 'Recall' arrays of length n_boot (NaN
+        for a resample without positives, where they are undefined).
+    """
+    y_true = np.asarray(y_true).ravel() == 1
+    y_prob = np.asarray(y_prob, dtype=np.float64).ravel()
+    n = len(y_true)
+    if len(y_prob) != n or n == 0:
+        raise ValueError(f"Got {n} labels and {len(y_prob)} scores")
+    if indices is not None:
+        indices = np.asarray(indices)
+        n_boot = len(indices)
+
+    order = np.argsort(y_prob, kind='mergesort')[::-1]
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    positive_sorted = y_true[order]
+    sorted_prob = y_prob[order]
+    last_of_value = np.r_[np.flatnonzero(np.diff(sorted_prob)), n - 1]
+    k = int(np.searchsorted(-sorted_prob[last_of_value], -threshold, side='right'))
+    positives, negatives = np.flatnonzero(y_true), np.flatnonzero(~y_true)
+    rng = np.random.default_rng(random_state)
+
+    # Index, count and two cumulative-sum matrices of int64 per block
+    block = max(1, (max_memory_mb << 20) // (32 * n))
+    out = {name: np.empty(n_boot) for name in ('AUC-PR', 'Precision', 'Recall')}
+    for start in range(0, n_boot, block):
+        size = min(block, n_boot - start)
+        if indices is not None:
+            idx = indices[start:start + size]
+        elif stratify:
+            idx = np.hstack([positives[rng.integers(0, len(positives), (size, len(positives)))],
+                             negatives[rng.integers(0, len(negatives), (size, len(negatives)))]])
+        else:
+            idx = rng.integers(0, n, (size, n))
+        flat = (rank[idx] + (np.arange(size) * n)[:, None]).ravel()
+        weights = np.bincount(flat, minlength=size * n).reshape(size, n)
+        del idx, flat
+
+        flagged = np.cumsum(weights, axis=1)[:, last_of_value]
+        weights *= positive_sorted
+        tp = np.cumsum(weights, axis=1)[:, last_of_value].astype(np.float64)
+        del weights
+        n_pos = tp[:, -1:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Thresholds above a resample's top score flag nothing: they collapse onto (0, 1)
+            precision = np.where(flagged > 0, tp / np.maximum(flagged, 1), 1.0)
+            recall = tp / n_pos
+            previous_recall = np.hstack([np.zeros((size, 1)), recall[:, :-1]])
+            previous_precision = np.hstack([np.ones((size, 1)), precision[:, :-1]])
+            area = ((recall - previous_recall) * (precision + previous_precision) / 2).sum(axis=1)
+            rows = slice(start, start + size)
+            out['AUC-PR'][rows] = area
+            out['Recall'][rows] = recall[:, k - 1] if k else np.where(n_pos[:, 0] > 0, 0.0, np.nan)
+            out['Precision'][rows] = (tp[:, k - 1] / np.maximum(flagged[:, k - 1], 1)) if k else 0.0
+    return out
+
+
+def confidence_intervals(samples: Dict[str, np.ndarray], alpha: float = 0.05) -> Dict[str, float]:
+    """Percentile intervals of bootstrap_metrics output: '<metric> CI Low' / '<metric> CI High'."""
+    intervals = {}
+    for name, values in samples.items():
+        low, high = np.nanpercentile(values, [100 * alpha / 2, 100 * (1 - alpha / 2)])
+        intervals[f'{name} CI Low'] = float(low)
+        intervals[f'{name} CI High'] = float(high)
+    return intervals
+
+
+def evaluate_scores(y_true, y_prob, threshold: float = 0.5, cost_fp: float = 1.0, cost_fn: float = 1.0,
+                    n_boot: int = 0, alpha: float = 0.05, random_state: Optional[int] = 42) -> dict:
+    """
+    Every metric of a set of scores from one threshold_curve.
+
+    Args:
+        n_boot (int): Bootstrap resamples for (1 - alpha) confidence intervals
+            of AUC-PR, precision and recall (0 to skip them).
+
+    Returns:
+        dict: AUC-PR, F1-Score, Precision, Recall and the confusion counts at
+        threshold, the best-F1 and cost-optimal thresholds, any confidence
+        intervals, and the curve itself.
+    """
+    curve = threshold_curve(y_true, y_prob)
+    counts = {name: float(v) for name, v in counts_at(curve, threshold).items()}
+    tp, fp, fn = counts['tp'], counts['fp'], counts['fn']
+    result = {
+        'AUC-PR': pr_auc(curve),
+        'F1-Score': float(_ratio(2 * tp, 2 * tp + fp + fn)),
+        'Precision': float(_ratio(tp, tp + fp)),
+        'Recall': float(_ratio(tp, tp + fn)),
+        'Threshold': float(threshold),
+        **{name.upper(): int(v) for name, v in counts.items()},
+        **best_thresholds(curve, cost_fp, cost_fn),
+    }
+    if n_boot > 0:
+        samples = bootstrap_metrics(y_true, y_prob, n_boot, threshold, random_state=random_state)
+        result.update(confidence_intervals(samples, alpha))
+    result['curve'] = curve
+    return result
+
+
+def format_report(result: dict) -> str:
+    """classification_report-style table built from the confusion counts."""
+    tn, fp, fn, tp = (result[k] for k in ('TN', 'FP', 'FN', 'TP'))
+    rows = [('0', tn, tn + fn, tn + fp), ('1', tp, tp + fp, tp + fn)]
+    lines = [f"{'':>12} {'precision':>9} {'recall':>9} {'f1-score':>9} {'support':>9}", ""]
+    for label, hits, flagged, support in rows:
+        precision, recall = float(_ratio(hits, flagged)), float(_ratio(hits, support))
+        f1 = float(_ratio(2 * precision * recall, precision + recall))
+        lines.append(f"{label:>12} {precision:>9.2f} {recall:>9.2f} {f1:>9.2f} {support:>9}")
+    total = tn + fp + fn + tp
+    lines += ["", f"{'accuracy':>12} {'':>9} {'':>9} {float(_ratio(tn + tp, total)):>9.2f} {total:>9}"]
+    return "\n".join(lines)
+
+
+def plot_pr_curve(result: dict, title: str, ax=None):
+    """Draws a result's PR curve on ax (a new pyplot axes by default) and returns the axes."""
+    if ax is None:
+        _, ax = pyplot().subplots(figsize=(6, 4))
+    precision, recall, _ = pr_curve(result['curve'])
+    ax.plot(recall, precision, label=f"AUC = {result['AUC-PR']:.3f}")
+    ax.set_title(title)
+    ax.legend()
+    return ax
+
+
+def _save_plot(result: dict, title: str, save_dir: str) -> str:
+    """Renders the PR curve on a standalone Figure (no pyplot state, safe off the main thread)."""
+    from matplotlib.figure import Figure
+
+    os.makedirs(save_dir, exist_ok=True)
+    fig = Figure(figsize=(6, 4))
+    plot_pr_curve(result, title, ax=fig.add_subplot())
+    fig.tight_layout()
+    safe_title = re.sub(r'[^\w\s-]', '', title).strip().lower().replace(' ', '_')
+    path = os.path.join(save_dir, f"{safe_title}.png")
+    fig.savefig(path)
+    return path
+
+
+def _summary(result: dict, dataset_name: str, model_name: str) -> dict:
+    return {"Dataset": dataset_name, "Model": model_name,
+            **{k: v for k, v in result.items() if k != 'curve'}}
+
+
+@instrument(rows_arg='X_test')
+def evaluate_model(model, X_test, y_test, dataset_name, model_name, threshold=0.5,
+                   cost_fp=1.0, cost_fn=1.0, plot=True, save_dir=None, n_boot=1000):
     """
     Evaluates model and returns a dictionary of metrics for comparison.
+
+    The test set is scored once (predict_proba). Precision, recall, F1 and
+    the report are taken at threshold; the best-F1 and cost-optimal
+    thresholds (cost_fp per false positive, cost_fn per missed fraud) come
+    from the same pass.
+
+    Args:
+        plot (bool): Show the PR curve without blocking (skipped when headless).
+        save_dir (str): Also save the PR curve as a PNG there.
+        n_boot (int): Bootstrap resamples for 95% confidence intervals (0 to skip).
     """
-    y_pred = model.predict(X_test)
     y_prob = model.predict_proba(X_test)[:, 1]
-    
-    # Calculate metrics
-    precision, recall, _ = precision_recall_curve(y_test, y_prob)
-    pr_auc = auc(recall, precision)
-    f1 = f1_score(y_test, y_pred)
-    prec = precision_score(y_test, y_pred)
-    rec = recall_score(y_test, y_pred)
-    
+    result = evaluate_scores(y_test, y_prob, threshold, cost_fp, cost_fn, n_boot=n_boot)
+    title = f'PR Curve: {dataset_name} - {model_name}'
+
     print(f"\n=== {dataset_name} - {model_name} Evaluation ===")
-    print(f"AUC-PR: {pr_auc:.4f}")
-    print("\nClassification Report:")
-    print(classification_report(y_test, y_pred))
-    
-    # Plot PR Curve (Optional: Can comment out if cluttering)
-    plt.figure(figsize=(6, 4))
-    plt.plot(recall, precision, label=f'AUC = {pr_auc:.3f}')
-    plt.title(f'PR Curve: {dataset_name} - {model_name}')
-    plt.legend()
-    plt.show()
-
-    return {
-        "Dataset": dataset_name,
-        "Model": model_name,
-        "AUC-PR": pr_auc,
-        "F1-Score": f1,
-        "Precision": prec,
-        "Recall": rec
-    }
\ No newline at end of file
+    if n_boot > 0:
+        print(f"AUC-PR: {result['AUC-PR']:.4f} (95% CI {result['AUC-PR CI Low']:.4f}-{result['AUC-PR CI High']:.4f})")
+    else:
+        print(f"AUC-PR: {result['AUC-PR']:.4f}")
+    print(f"\nClassification Report (threshold {threshold}):")
+    print(format_report(result))
+    print(f"Best F1 {result['Best F1']:.4f} at threshold {result['Best-F1 Threshold']:.4f}; "
+          f"minimum cost {result['Min Cost']:,.0f} at threshold {result['Cost-Optimal Threshold']:.4f}")
+
+    if plot and not headless():
+        plot_pr_curve(result, title)
+        pyplot().show(block=False)
+    if save_dir is not None:
+        _save_plot(result, title, save_dir)
+
+    return _summary(result, dataset_name, model_name)
+
+
+def evaluate_models(
+    jobs: Iterable[Sequence],
+    threshold: float = 0.5,
+    cost_fp: float = 1.0,
+    cost_fn: float = 1.0,
+    n_jobs: Optional[int] = None,
+    save_dir: Optional[str] = None,
+    n_boot: int = 1000,
+    alpha: float = 0.05
+) -> pd.DataFrame:
+    """
+    Evaluates many models / datasets concurrently, without printing or showing anything.
+
+    Args:
+        jobs: (model, X_test, y_test, dataset_name, model_name) tuples.
+        n_jobs (int): Evaluation threads (one per job by default); scoring and
+            sorting release the GIL.
+        save_dir (str): Save each PR curve as a PNG there.
+        n_boot (int): Bootstrap resamples for the (1 - alpha) confidence interval
+            columns (0 to skip them).
+
+    Returns:
+        pd.DataFrame: One row of evaluate_model metrics per job, in job order.
+    """
+    jobs = list(jobs)
+
+    def run(job):
+        model, X_test, y_test, dataset_name, model_name = job
+        result = evaluate_scores(y_test, model.predict_proba(X_test)[:, 1], threshold, cost_fp, cost_fn,
+                                 n_boot=n_boot, alpha=alpha)
+        if save_dir is not None:
+            _save_plot(result, f'PR Curve: {dataset_name} - {model_name}', save_dir)
+        return _summary(result, dataset_name, model_name)
+
+    try:
+        with ThreadPoolExecutor(max_workers=n_jobs or max(len(jobs), 1)) as pool:
+            rows = list(pool.map(run, jobs))
+        logger.info(f"✅ Evaluated {len(rows)} models")
+        return pd.DataFrame(rows)
+
+    except Exception as e:
+        logger.error(f"Error in evaluate_models: {str(e)}")
+        raise
@@ -1,15 +1,23 @@
 # src/explainability.py
+"""
+Feature names, importances and SHAP force plots for the fitted models.
+
+shap and matplotlib are imported by the functions that draw, so importing
+this module (e.g. for get_feature_names) is cheap. With FRAUD_HEADLESS=1
+plots are only saved; IPython is used only when a shell is already running
+(see src.plotting).
+"""
 import os
 import re
 import pandas as pd
 import numpy as np
-import shap
-import matplotlib.pyplot as plt
-from sklearn.exceptions import NotFittedError
-from IPython.display import display 
+from src.plotting import display, headless, pyplot
 
 def get_feature_names(preprocessor):
     """Extracts feature names from ColumnTransformer"""
+    # A fitted ColumnTransformer means sklearn is already loaded
+    from sklearn.exceptions import NotFittedError
+
     output_features = []
     
     # Loop through transformers
@@ -41,7 +49,7 @@ def get_feature_names(preprocessor):
     return output_features
 
 
-def plot_feature_importance(model, feature_names, title="Feature Importance", top_n=10):
+def plot_feature_importance(model, feature_names, title="Feature Importance", top_n=10, save_path=None, show=None):
     """
     Plots built-in feature importance from XGBoost.
     Args:
@@ -49,18 +57,35 @@ def plot_feature_importance(model, feature_names, title="Feature Importance", to
         feature_names: List of feature names
         title: Title for the plot (string)
         top_n: Number of top features to show (int)
+        save_path: Also save the plot there, e.g. a .png (string)
+        show: Show the plot with pyplot; None (default) shows unless headless (bool)
+    Returns:
+        The matplotlib Figure, or None if the model has no built-in importances.
     """
     if hasattr(model, 'feature_importances_'):
         importances = model.feature_importances_
         indices = np.argsort(importances)[::-1]
-        
-        plt.figure(figsize=(10, 6))
-        plt.title(title)
-        plt.bar(range(top_n), importances[indices[:top_n]], align="center")
-        plt.xticks(range(top_n), [feature_names[i] for i in indices[:top_n]], rotation=45, ha='right')
-        plt.xlim([-1, top_n])
-        plt.tight_layout()
-        plt.show()
+
+        show = not headless() if show is None else show
+        if show:
+            fig = pyplot().figure(figsize=(10, 6))
+        else:
+            # A standalone Figure stays out of pyplot's state and needs no GUI backend
+            from matplotlib.figure import Figure
+            fig = Figure(figsize=(10, 6))
+        ax = fig.add_subplot()
+        ax.set_title(title)
+        ax.bar(range(top_n), importances[indices[:top_n]], align="center")
+        ax.set_xticks(range(top_n), [feature_names[i] for i in indices[:top_n]], rotation=45, ha='right')
+        ax.set_xlim([-1, top_n])
+        fig.tight_layout()
+        if save_path is not None:
+            os.makedirs(os.path.dirname(save_path) or '.', exist_ok=True)
+            fig.savefig(save_path)
+            print(f"✅ Feature importance plot saved to: {os.path.abspath(save_path)}")
+        if show:
+            pyplot().show()
+        return fig
     else:
         print("Model does not support built-in feature importance.")
 
@@ -84,17 +109,24 @@ def get_prediction_indices(y_true, y_pred):
     }
 
 
-def plot_shap_force(idx, explainer, data_df, title, save_dir="../outputs/shap"):
+def plot_shap_force(idx, explainer, data_df, title, save_dir="../outputs/shap", shap_cache=None, show=None):
     """
     Plots and saves a SHAP force plot for a specific observation.
     
     Args:
         idx (int): Index of the observation to explain.
-        explainer: The SHAP explainer object.
+        explainer: The SHAP explainer object (unused when shap_cache is given).
         data_df (pd.DataFrame): The feature data (must be a DataFrame with column names).
         title (str): Title to print before the plot.
         save_dir (str): Directory to save the HTML file (relative to notebook).
+        shap_cache (ShapCache): Optional src.shap_cache.ShapCache; the row's values
+            are read from it (and computed into it only if missing), e.g. after
+            shap_cache.explain(data_df, rows=indices['FP']) for the whole review queue.
+        show (bool): Display the plot in the running IPython shell; None (default)
+            displays unless headless. Outside IPython the plot is only saved.
     """
+    import shap
+
     print(f"--- {title} (Index: {idx}) ---")
 
     if not isinstance(data_df, pd.DataFrame):
@@ -103,12 +135,17 @@ def plot_shap_force(idx, explainer, data_df, title, save_dir="../outputs/shap"):
     # 1. Create the directory if it doesn't exist
     os.makedirs(save_dir, exist_ok=True)
 
-    # 2. Calculate SHAP values
-    shap_val_single = explainer.shap_values(data_df.iloc[[idx]])
+    # 2. Calculate SHAP values (or read them from the batch cache)
+    if shap_cache is not None:
+        shap_val_single = shap_cache.explain(data_df, rows=[idx])
+        expected_value = shap_cache.expected_value
+    else:
+        shap_val_single = explainer.shap_values(data_df.iloc[[idx]])
+        expected_value = explainer.expected_value
 
     # 3. Generate the interactive plot
     plot = shap.force_plot(
-        explainer.expected_value,
+        expected_value,
         shap_val_single[0],
         data_df.iloc[[idx]],
         matplotlib=False,
@@ -128,4 +165,4 @@ def plot_shap_force(idx, explainer, data_df, title, save_dir="../outputs/shap"):
     except Exception as e:
         print(f"❌ Error saving file: {e}")
 
-    display(plot)
+    display(plot, show)
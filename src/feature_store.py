@@ -0,0 +1,312 @@
+# src/feature_store.py
+"""
+Incremental velocity feature store.
+
+Keeps a running transaction count, total spend and last-seen time per entity
+key (user_id, and optionally device_id / ip_address) in compact NumPy arrays
+indexed through a key -> slot dictionary. New transactions are applied in
+O(batch), so the same state can feed training batches and a live scorer, and
+it can be snapshotted to disk instead of being rebuilt from the full history.
+"""
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Feature-name prefix for each supported entity column
+ENTITY_PREFIXES = {'user_id': 'user', 'device_id': 'device', 'ip_address': 'ip'}
+_NO_TIME = np.iinfo(np.int64).min
+# Snapshot directories hold numbered versions; this file names the current one
+_CURRENT = 'CURRENT'
+
+
+class _EntityTable:
+    """Growable per-key count / total / last-time arrays for one entity column."""
+
+    def __init__(self, capacity: int = 1024):
+        self.slots: Dict[object, int] = {}
+        self.keys = []
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.total = np.zeros(capacity, dtype=np.float64)
+        self.last_time = np.full(capacity, _NO_TIME, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _grow(self, size: int):
+        capacity = len(self.count)
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        extra = capacity - len(self.count)
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.total = np.concatenate([self.total, np.zeros(extra, dtype=np.float64)])
+        self.last_time = np.concatenate([self.last_time, np.full(extra, _NO_TIME, dtype=np.int64)])
+
+    def slots_for(self, keys: Iterable, create: bool) -> np.ndarray:
+        """Slot per key; new keys get a slot when create is True, else -1."""
+        out = np.empty(len(keys), dtype=np.int64)
+        slots = self.slots
+        for i, key in enumerate(keys):
+            slot = slots.get(key)
+            if slot is None:
+                if not create:
+                    out[i] = -1
+                    continue
+                slot = slots[key] = len(self.keys)
+                self.keys.append(key)
+            out[i] = slot
+        self._grow(len(self.keys))
+        return out
+
+
+def _key_array(entity: str, keys: list) -> np.ndarray:
+    """keys as a numeric or string array that loads without pickle, or ValueError."""
+    array = np.asarray(keys)
+    # Mixed keys either become object arrays or get coerced (e.g. 1 -> '1'); both would not round-trip
+    if array.dtype.kind not in 'biufU' or array.tolist() != list(keys):
+        raise ValueError(f"Cannot snapshot '{entity}' keys: they must be all numbers or all strings")
+    return array
+
+
+class VelocityFeatureStore:
+    """
+    Args:
+        entities (tuple): Entity columns to track, any of ENTITY_PREFIXES.
+        value_col (str): Column summed into '<prefix>_total_spent'.
+        time_col (str): Transaction timestamp column.
+
+    Batches are assumed to arrive in time order: point-in-time features for a
+    batch count everything already in the store as earlier history.
+    """
+
+    def __init__(self, entities=('user_id',), value_col: str = 'purchase_value',
+                 time_col: str = 'purchase_time'):
+        unknown = [e for e in entities if e not in ENTITY_PREFIXES]
+        if unknown:
+            raise ValueError(f"Unsupported entities: {unknown}. Supported: {sorted(ENTITY_PREFIXES)}")
+        self.entities = tuple(entities)
+        self.value_col = value_col
+        self.time_col = time_col
+        self.integer_values = True
+        self._tables = {entity: _EntityTable() for entity in self.entities}
+
+    def __len__(self) -> int:
+        return sum(len(t) for t in self._tables.values())
+
+    def _check(self, df: pd.DataFrame):
+        required_cols = list(self.entities) + [self.value_col]
+        missing_cols = [col for col in required_cols if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+        null_keys = [col for col in self.entities if df[col].isnull().any()]
+        if null_keys:
+            raise ValueError(f"Null entity keys in: {null_keys}")
+        if not pd.api.types.is_integer_dtype(df[self.value_col]):
+            self.integer_values = False
+
+    def _times(self, df: pd.DataFrame) -> np.ndarray:
+        if self.time_col not in df.columns:
+            return np.full(len(df), _NO_TIME, dtype=np.int64)
+        return pd.to_datetime(df[self.time_col]).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+    def _update_entity(self, entity: str, codes: np.ndarray, uniques, values: np.ndarray, times: np.ndarray):
+        table = self._tables[entity]
+        slots = table.slots_for(uniques, create=True)
+        table.count[slots] += np.bincount(codes, minlength=len(uniques))
+        table.total[slots] += np.bincount(codes, weights=values, minlength=len(uniques))
+        latest = np.full(len(uniques), _NO_TIME, dtype=np.int64)
+        np.maximum.at(latest, codes, times)
+        table.last_time[slots] = np.maximum(table.last_time[slots], latest)
+
+    def update(self, df: pd.DataFrame):
+        """
+        Adds a batch of transactions to the running totals in O(len(df)).
+
+        Raises:
+            ValueError: If an entity or the value column is missing.
+        """
+        self._check(df)
+        values = df[self.value_col].to_numpy(dtype=np.float64)
+        times = self._times(df)
+        for entity in self.entities:
+            codes, uniques = pd.factorize(df[entity], sort=False)
+            self._update_entity(entity, codes, uniques, values, times)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Point-in-time features for a batch, then adds the batch to the store.
+
+        Each row sees the entity's history up to and including itself (ordered
+        by time_col), never later transactions, so the output can be used as
+        leakage-free training features.
+
+        Returns:
+            pd.DataFrame: '<prefix>_txn_count', '<prefix>_total_spent' and
+            '<prefix>_avg_purchase' per entity, aligned to df.index.
+        """
+        self._check(df)
+        values = df[self.value_col].to_numpy(dtype=np.float64)
+        times = self._times(df)
+        order = np.argsort(times, kind='stable')
+        features = {}
+        for entity in self.entities:
+            prefix = ENTITY_PREFIXES[entity]
+            table = self._tables[entity]
+            codes, uniques = pd.factorize(df[entity], sort=False)
+            prior = table.slots_for(uniques, create=False)[codes]
+            seen = prior >= 0
+            base_count = np.where(seen, table.count[np.maximum(prior, 0)], 0)
+            base_total = np.where(seen, table.total[np.maximum(prior, 0)], 0.0)
+
+            # Running totals within the batch, in time order
+            grouped = pd.Series(values[order]).groupby(codes[order])
+            running_count = np.empty(len(df), dtype=np.int64)
+            running_total = np.empty(len(df), dtype=np.float64)
+            running_count[order] = grouped.cumcount().to_numpy() + 1
+            running_total[order] = grouped.cumsum().to_numpy()
+
+            count = base_count + running_count
+            total = base_total + running_total
+            features[f'{prefix}_txn_count'] = count
+            features[f'{prefix}_total_spent'] = total.astype(np.int64) if self.integer_values else total
+            features[f'{prefix}_avg_purchase'] = total / count
+
+            self._update_entity(entity, codes, uniques, values, times)
+        return pd.DataFrame(features, index=df.index)
+
+    def totals(self, entity: str = 'user_id') -> pd.DataFrame:
+        """
+        Current totals for every key of an entity, indexed by key, in the layout
+        engineer_features(user_aggregates=...) expects.
+        """
+        table = self._tables[entity]
+        prefix = ENTITY_PREFIXES[entity]
+        n = len(table)
+        total = table.total[:n]
+        return pd.DataFrame({
+            f'{prefix}_txn_count': table.count[:n].copy(),
+            f'{prefix}_total_spent': total.astype(np.int64) if self.integer_values else total.copy(),
+        }, index=pd.Index(table.keys, name=entity))
+
+    def lookup(self, df: pd.DataFrame, entity: str = 'user_id') -> pd.DataFrame:
+        """
+        Current count and total spend for the entity keys in df, aligned to
+        df.index, in O(len(df)). Keys never seen get a count of 0.
+        """
+        table = self._tables[entity]
+        prefix = ENTITY_PREFIXES[entity]
+        codes, uniques = pd.factorize(df[entity], sort=False)
+        slots = table.slots_for(uniques, create=False)[codes]
+        seen = slots >= 0
+        slots = np.maximum(slots, 0)
+        total = np.where(seen, table.total[slots], 0.0)
+        return pd.DataFrame({
+            f'{prefix}_txn_count': np.where(seen, table.count[slots], 0),
+            f'{prefix}_total_spent': total.astype(np.int64) if self.integer_values else total,
+        }, index=df.index)
+
+    def features_one(self, record: Mapping) -> Dict[str, float]:
+        """
+        Live features for one incoming transaction: stored history plus the
+        transaction itself, matching what apply() would produce for it.
+        Does not modify the store; call update() once the transaction is accepted.
+        """
+        raw = record[self.value_col]
+        value = float(raw)
+        # apply() casts totals to int64 only while every value seen is an integer
+        integer_total = self.integer_values and isinstance(raw, (int, np.integer)) and not isinstance(raw, bool)
+        out = {}
+        for entity in self.entities:
+            prefix = ENTITY_PREFIXES[entity]
+            table = self._tables[entity]
+            slot = table.slots.get(record[entity])
+            count = 1 + (int(table.count[slot]) if slot is not None else 0)
+            total = value + (float(table.total[slot]) if slot is not None else 0.0)
+            out[f'{prefix}_txn_count'] = count
+            out[f'{prefix}_total_spent'] = int(total) if integer_total else total
+            out[f'{prefix}_avg_purchase'] = total / count
+        return out
+
+    def last_seen(self, entity: str, key) -> Optional[pd.Timestamp]:
+        """Timestamp of the entity's latest stored transaction, or None."""
+        table = self._tables[entity]
+        slot = table.slots.get(key)
+        if slot is None or table.last_time[slot] == _NO_TIME:
+            return None
+        return pd.Timestamp(int(table.last_time[slot]))
+
+    def snapshot(self, path: Path):
+        """
+        Writes the store to directory path.
+
+        Each snapshot is a new numbered version directory (one .npz per entity
+        plus metadata). It becomes current only when the CURRENT pointer file
+        is replaced, in one atomic rename, after every file is written; a crash
+        leaves the previous snapshot in place. Older versions are then removed.
+
+        Raises:
+            ValueError: If an entity's keys are not all numbers or all strings
+                (they are stored as plain arrays, without pickle).
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        keys = {entity: _key_array(entity, table.keys) for entity, table in self._tables.items()}
+        versions = sorted(p.name for p in path.iterdir() if p.is_dir() and p.name[:1] == 'v' and p.name[1:].isdigit())
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1:06d}"
+        staging = path / f'{version}.tmp'
+        shutil.rmtree(staging, ignore_errors=True)  # left by a crashed snapshot
+        staging.mkdir()
+        for entity, table in self._tables.items():
+            n = len(table)
+            np.savez(staging / f'{entity}.npz', keys=keys[entity], count=table.count[:n],
+                     total=table.total[:n], last_time=table.last_time[:n])
+        meta = {'entities': list(self.entities), 'value_col': self.value_col,
+                'time_col': self.time_col, 'integer_values': self.integer_values}
+        with open(staging / 'meta.json', 'w') as f:
+            json.dump(meta, f)
+        staging.rename(path / version)
+        with open(path / f'{_CURRENT}.tmp', 'w') as f:
+            f.write(version)
+        os.replace(path / f'{_CURRENT}.tmp', path / _CURRENT)
+        for old in versions:
+            shutil.rmtree(path / old, ignore_errors=True)
+        logger.info(f"✅ Feature store snapshot: {len(self):,} keys written to {path / version}")
+
+    @classmethod
+    def restore(cls, path: Path) -> "VelocityFeatureStore":
+        """
+        Rebuilds a store from a snapshot directory.
+
+        Raises:
+            FileNotFoundError: If path holds no snapshot.
+        """
+        path = Path(path)
+        if (path / _CURRENT).exists():
+            path = path / (path / _CURRENT).read_text().strip()
+        if not (path / 'meta.json').exists():
+            raise FileNotFoundError(f"No feature store snapshot found at {path}")
+        with open(path / 'meta.json') as f:
+            meta = json.load(f)
+        store = cls(entities=meta['entities'], value_col=meta['value_col'], time_col=meta['time_col'])
+        store.integer_values = meta['integer_values']
+        for entity in store.entities:
+            data = np.load(path / f'{entity}.npz')
+            keys = data['keys'].tolist()
+            table = _EntityTable(capacity=max(1024, len(keys)))
+            table.keys = keys
+            table.slots = {key: slot for slot, key in enumerate(keys)}
+            table.count[:len(keys)] = data['count']
+            table.total[:len(keys)] = data['total']
+            table.last_time[:len(keys)] = data['last_time']
+            store._tables[entity] = table
+        logger.info(f"Restored feature store: {len(store):,} keys from {path}")
+        return store
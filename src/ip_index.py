@@ -0,0 +1,196 @@
+# src/ip_index.py
+import bisect
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_COUNTRY = 'Unknown'
+_IPV4_MAX = 2**32 - 1
+_FORMAT_VERSION = 1
+# IPs are bucketed by their top 20 bits; most buckets contain no range start
+_BUCKET_SHIFT = 12
+
+
+class IpCountryIndex:
+    """
+    Sorted IPv4 range index for IP -> country lookups.
+
+    The IpAddress_to_Country table is compiled once into contiguous uint32
+    lower/upper bound arrays and a per-range country code array. A bucket table
+    over the top 20 bits of the address records where each bucket starts in the
+    lower bounds, so an IP whose bucket holds no range start resolves in O(1);
+    the rest fall back to an O(log n) searchsorted. Lookups keep the caller's
+    row order and work equally for a batch or one address. IPs outside every
+    range map to 'Unknown'.
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, codes: np.ndarray, countries: List[str],
+                 bucket_start: np.ndarray = None):
+        self.lower = lower
+        self.upper = upper
+        self.codes = codes
+        if bucket_start is None:
+            bucket_edges = np.arange(2**(32 - _BUCKET_SHIFT) + 1, dtype='int64') << _BUCKET_SHIFT
+            bucket_start = np.searchsorted(lower, bucket_edges, side='left').astype('int32')
+        self.bucket_start = bucket_start
+        self.countries = list(countries)
+        # Fingerprint of the table the index was built from (see source_fingerprint), when known
+        self.source = None
+        if UNKNOWN_COUNTRY in self.countries:
+            self.unknown_code = self.countries.index(UNKNOWN_COUNTRY)
+        else:
+            self.unknown_code = len(self.countries)
+            self.countries.append(UNKNOWN_COUNTRY)
+
+    def __len__(self) -> int:
+        return len(self.lower)
+
+    @classmethod
+    def from_frame(cls, ip_df: "pd.DataFrame") -> "IpCountryIndex":
+        """
+        Builds the index from an IpAddress_to_Country dataframe.
+
+        Args:
+            ip_df (pd.DataFrame): Table with 'lower_bound_ip_address',
+                'upper_bound_ip_address' and 'country' columns.
+
+        Returns:
+            IpCountryIndex: The compiled index.
+
+        Raises:
+            ValueError: If required columns are missing.
+        """
+        import pandas as pd
+
+        required_cols = ['lower_bound_ip_address', 'upper_bound_ip_address', 'country']
+        missing_cols = [col for col in required_cols if col not in ip_df.columns]
+        if missing_cols:
+            raise ValueError(f"Missing required columns: {missing_cols}")
+
+        lower = ip_df['lower_bound_ip_address'].to_numpy(dtype='float64').astype('int64')
+        upper = ip_df['upper_bound_ip_address'].to_numpy(dtype='float64').astype('int64')
+        order = np.argsort(lower, kind='stable')
+        codes, countries = pd.factorize(ip_df['country'].to_numpy()[order])
+
+        index = cls(
+            lower=np.ascontiguousarray(np.clip(lower[order], 0, _IPV4_MAX).astype('uint32')),
+            upper=np.ascontiguousarray(np.clip(upper[order], 0, _IPV4_MAX).astype('uint32')),
+            codes=np.ascontiguousarray(codes.astype('int32')),
+            countries=[str(c) for c in countries]
+        )
+        logger.info(f"Built IP index: {len(index):,} ranges, {len(index.countries) - 1} countries")
+        return index
+
+    def save(self, path: Path, source: Optional[str] = None):
+        """
+        Writes the index as .npy arrays plus a JSON country list under directory path.
+
+        Args:
+            path (Path): Index directory.
+            source (str, optional): source_fingerprint() of the IP table it was built
+                from, so a later run can tell whether the index is stale.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / 'lower.npy', self.lower)
+        np.save(path / 'upper.npy', self.upper)
+        np.save(path / 'codes.npy', self.codes)
+        np.save(path / 'buckets.npy', self.bucket_start)
+        with open(path / 'countries.json', 'w') as f:
+            json.dump({'version': _FORMAT_VERSION, 'countries': self.countries, 'source': source}, f)
+        self.source = source
+        logger.info(f"Saved IP index to {path}")
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "IpCountryIndex":
+        """
+        Loads an index written by save(). Arrays are memory-mapped by default, so
+        several processes can share one copy through the page cache.
+
+        Raises:
+            FileNotFoundError: If path does not contain a saved index.
+        """
+        path = Path(path)
+        meta_path = path / 'countries.json'
+        if not meta_path.exists():
+            raise FileNotFoundError(f"No IP index found at {path}")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        mmap_mode = 'r' if mmap else None
+
+        def _load(name):
+            # Plain ndarray views over the mapping skip np.memmap's per-access overhead
+            return np.load(path / name, mmap_mode=mmap_mode).view(np.ndarray)
+
+        index = cls(
+            lower=_load('lower.npy'),
+            upper=_load('upper.npy'),
+            codes=_load('codes.npy'),
+            countries=meta['countries'],
+            bucket_start=_load('buckets.npy')
+        )
+        index.source = meta.get('source')
+        return index
+
+    def lookup(self, ips) -> np.ndarray:
+        """
+        Vectorized lookup.
+
+        Args:
+            ips (array-like): IPv4 addresses as integers or floats (floats are truncated).
+
+        Returns:
+            np.ndarray: int32 country codes (positions in self.countries), in input order.
+        """
+        ips = np.asarray(ips, dtype='float64').astype('int64')
+        in_range = (ips >= 0) & (ips <= _IPV4_MAX)
+        ips = np.where(in_range, ips, 0)
+
+        # Ranges starting before the IP's bucket; exact unless the bucket holds a range start
+        bucket = ips >> _BUCKET_SHIFT
+        start = self.bucket_start[bucket]
+        pos = start.astype('int64') - 1
+        ambiguous = np.flatnonzero(self.bucket_start[bucket + 1] != start)
+        if len(ambiguous):
+            pos[ambiguous] = np.searchsorted(self.lower, ips[ambiguous].astype('uint32'), side='right') - 1
+
+        found = in_range & (pos >= 0)
+        pos = np.maximum(pos, 0)
+        found &= ips <= self.upper[pos]
+        return np.where(found, self.codes[pos], self.unknown_code).astype('int32')
+
+    def lookup_countries(self, ips) -> "pd.Categorical":
+        """Vectorized lookup returning country names as a Categorical."""
+        import pandas as pd
+
+        return pd.Categorical.from_codes(self.lookup(ips), categories=self.countries)
+
+    def lookup_one(self, ip: Union[int, float]) -> str:
+        """Scalar lookup for online scoring."""
+        ip = int(ip)
+        if ip < 0 or ip > _IPV4_MAX:
+            return UNKNOWN_COUNTRY
+        bucket = ip >> _BUCKET_SHIFT
+        lo, hi = int(self.bucket_start[bucket]), int(self.bucket_start[bucket + 1])
+        pos = bisect.bisect_right(self.lower, ip, lo, hi) - 1 if hi > lo else lo - 1
+        if pos < 0 or ip > self.upper[pos]:
+            return UNKNOWN_COUNTRY
+        return self.countries[self.codes[pos]]
+
+
+def source_fingerprint(path: Path) -> str:
+    """Content hash of an IpAddress_to_Country file, recorded in saved indexes."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -1,31 +1,111 @@
 # src/model_preprocessing.py
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
-from imblearn.over_sampling import SMOTE
-from imblearn.combine import SMOTETomek
 from imblearn.under_sampling import RandomUnderSampler
 from sklearn.model_selection import train_test_split
+from src.profiling import instrument
+from src.resampling import smote, smote_tomek
 import logging
 
 logger = logging.getLogger(__name__)
 
+ENCODINGS = ("onehot", "native")
+
+
+class CategoryCodeEncoder(TransformerMixin, BaseEstimator):
+    """
+    Encodes each categorical column as one integer code over a vocabulary
+    frozen at fit time: the known categories of a column get codes
+    0..K-1 (in sorted order, as OneHotEncoder orders them) and anything
+    else, unseen categories and missing values alike, gets the reserved
+    code K. Output is float64, so it stacks with the scaled numeric block.
+    """
+
+    def fit(self, X, y=None):
+        X = pd.DataFrame(X)
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = X.shape[1]
+        self.categories_ = [np.unique(X[col].dropna().to_numpy(dtype=object)) for col in X.columns]
+        return self
+
+    def transform(self, X):
+        X = pd.DataFrame(X)
+        codes = np.empty(X.shape, dtype=np.float64)
+        for j, categories in enumerate(self.categories_):
+            column = pd.Categorical(X.iloc[:, j].to_numpy(dtype=object), categories=categories).codes
+            codes[:, j] = np.where(column < 0, len(categories), column)
+        return codes
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_in_ if input_features is None else input_features, dtype=object)
+
+
+def category_dtypes(preprocessor) -> dict:
+    """
+    {output column: pandas CategoricalDtype} for the code columns of a
+    preprocessor built with encoding="native" (empty for one-hot). Each
+    dtype lists codes 0..K, the reserved unknown code included, so XGBoost
+    (enable_categorical=True) sees the same categories in every frame.
+    """
+    dtypes = {}
+    for name, transformer, _ in preprocessor.transformers_:
+        if isinstance(transformer, CategoryCodeEncoder):
+            for col, categories in zip(transformer.get_feature_names_out(), transformer.categories_):
+                dtypes[f"{name}__{col}"] = pd.CategoricalDtype(np.arange(len(categories) + 1))
+    return dtypes
+
+
+def to_frame(values, preprocessor, index=None) -> pd.DataFrame:
+    """Wraps preprocessor output as a DataFrame with its feature names and categorical code columns."""
+    frame = pd.DataFrame(values, columns=preprocessor.get_feature_names_out(), index=index)
+    dtypes = category_dtypes(preprocessor)
+    return frame.astype({col: dtype for col, dtype in dtypes.items()}) if dtypes else frame
+
+
+@instrument()
 def prepare_data_for_modeling(
     X: pd.DataFrame,
     y: pd.Series,
     dataset_name: str = "Dataset",
     imbalance_technique: str = "smote",
     test_size: float = 0.2,
-    random_state: int = 42
+    random_state: int = 42,
+    sparse: bool = False,
+    neighbor_backend: str = "auto",
+    n_jobs: int = 1,
+    encoding: str = "onehot"
 ):
     """
     Complete preprocessing + imbalance handling pipeline with robust error handling.
+
+    With sparse=True the train/test matrices stay float32 CSR from the
+    ColumnTransformer through resampling (instead of dense DataFrames), so
+    high-cardinality one-hot columns cost memory only for their non-zeros.
+    Feature names are then available from preprocessor.get_feature_names_out().
+
+    SMOTE / SMOTETomek run through src.resampling, with neighbor_backend
+    ('auto', 'brute' or 'kdtree'; auto picks the KD-tree for dense input of up to
+    32 columns) for the neighbour searches on n_jobs threads.
+
+    encoding="native" encodes each categorical column as a single integer
+    code column (CategoryCodeEncoder) of pandas 'category' dtype instead of
+    one-hot columns, for XGBoost with enable_categorical=True (see
+    train_xgboost). SMOTE then copies those codes from the row it
+    interpolates from rather than interpolating them.
     """
     try:
         if not isinstance(X, pd.DataFrame) or not isinstance(y, pd.Series):
             raise ValueError("X must be DataFrame and y must be Series")
         if len(X) != len(y):
             raise ValueError(f"X and y length mismatch: {len(X)} vs {len(y)}")
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding: {encoding} (expected one of {ENCODINGS})")
+        if encoding == "native" and sparse:
+            raise ValueError("encoding='native' produces dense code columns; it cannot be combined with sparse=True")
         
         print(f"\n=== Preparing {dataset_name} for Modeling ===")
         
@@ -37,44 +117,60 @@ def prepare_data_for_modeling(
         logger.info(f"Stratified split completed: Train {X_train.shape}, Test {X_test.shape}")
         
         # Preprocessor
-        numeric_features = X_train.select_dtypes(include=['int64', 'float64']).columns.tolist()
+        numeric_features = X_train.select_dtypes(include='number').columns.tolist()
         categorical_features = X_train.select_dtypes(include=['object', 'category']).columns.tolist()
         
+        if encoding == "native":
+            categorical_encoder = CategoryCodeEncoder()
+        else:
+            categorical_encoder = OneHotEncoder(handle_unknown='ignore', sparse_output=sparse,
+                                                dtype=np.float32 if sparse else np.float64)
         preprocessor = ColumnTransformer(
             transformers=[
                 ('num', StandardScaler(), numeric_features),
-                ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features)
+                ('cat', categorical_encoder, categorical_features)
             ],
-            remainder='drop'
+            remainder='drop',
+            sparse_threshold=1.0 if sparse else 0.0
         )
         
-        logger.info(f"Preprocessor configured: {len(numeric_features)} numeric, {len(categorical_features)} categorical")
+        logger.info(f"Preprocessor configured: {len(numeric_features)} numeric, "
+                    f"{len(categorical_features)} categorical ({encoding})")
         
         X_train_processed = preprocessor.fit_transform(X_train)
         X_test_processed = preprocessor.transform(X_test)
         
         feature_names = preprocessor.get_feature_names_out()
-        X_train_processed = pd.DataFrame(X_train_processed, columns=feature_names, index=X_train.index)
-        X_test_processed = pd.DataFrame(X_test_processed, columns=feature_names, index=X_test.index)
+        if sparse:
+            X_train_processed = sp.csr_matrix(X_train_processed, dtype=np.float32)
+            X_test_processed = sp.csr_matrix(X_test_processed, dtype=np.float32)
+            density = X_train_processed.nnz / max(1, np.prod(X_train_processed.shape))
+            logger.info(f"Sparse design matrix: {len(feature_names)} features, {density:.2%} non-zero")
+        else:
+            X_train_processed = to_frame(X_train_processed, preprocessor, index=X_train.index)
+            X_test_processed = to_frame(X_test_processed, preprocessor, index=X_test.index)
         
         # Imbalance handling
         print(f"Applying {imbalance_technique.upper()}...")
         logger.info(f"Applying imbalance technique: {imbalance_technique}")
         
+        resample_args = dict(random_state=random_state, backend=neighbor_backend, n_jobs=n_jobs)
+        if encoding == "native":
+            dtypes = category_dtypes(preprocessor)
+            resample_args['categorical'] = [feature_names.tolist().index(col) for col in dtypes]
         if imbalance_technique == "smote":
-            balancer = SMOTE(random_state=random_state)
+            X_train_bal, y_train_bal = smote(X_train_processed, y_train, **resample_args)
         elif imbalance_technique == "undersample":
-            balancer = RandomUnderSampler(random_state=random_state)
+            X_train_bal, y_train_bal = RandomUnderSampler(random_state=random_state).fit_resample(
+                X_train_processed, y_train)
         elif imbalance_technique == "smotetomek":
-            balancer = SMOTETomek(random_state=random_state)
+            X_train_bal, y_train_bal = smote_tomek(X_train_processed, y_train, **resample_args)
         elif imbalance_technique == "none":
             logger.info("No resampling applied.")
             return X_train_processed, y_train, X_test_processed, y_test, preprocessor
         else:
             raise ValueError(f"Unknown imbalance_technique: {imbalance_technique}")
         
-        X_train_bal, y_train_bal = balancer.fit_resample(X_train_processed, y_train)
-        
         logger.info("Class distribution BEFORE balancing:")
         logger.info(pd.Series(y_train).value_counts(normalize=True).round(4).to_dict())
         logger.info("Class distribution AFTER balancing:")
@@ -1,43 +1,197 @@
 # src/modeling.py
+"""
+Model training entry points.
+
+xgboost, scikit-learn and the search / shard modules built on them are
+imported inside the functions that use them, so importing this module stays
+cheap. Logging is configured by the calling script or notebook, not here.
+"""
 import logging
-from sklearn.linear_model import LogisticRegression
-from xgboost import XGBClassifier
-from sklearn.model_selection import GridSearchCV, StratifiedKFold
+import tempfile
+from pathlib import Path
+import numpy as np
+from src.profiling import instrument
 
-# Configure Logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@instrument()
 def train_logistic_regression(X_train, y_train, random_state=42):
+    from sklearn.linear_model import LogisticRegression
+
     logger.info("Training Logistic Regression baseline...")
     model = LogisticRegression(max_iter=1000, random_state=random_state)
     model.fit(X_train, y_train)
     logger.info("Logistic Regression training complete.")
     return model
 
-def train_xgboost(X_train, y_train, param_grid, cv=5, random_state=42):
+@instrument()
+def train_xgboost(
+    X_train,
+    y_train,
+    param_grid,
+    cv=5,
+    random_state=42,
+    strategy='halving',
+    n_jobs=None,
+    trial_dir=None
+):
     """
-    Trains XGBoost using GridSearchCV and returns the full Grid object.
+    Tunes XGBoost over param_grid and returns the search object
+    (best_estimator_, best_params_, best_score_, cv_results_).
+
+    strategy='halving' runs src.search.successive_halving_search: candidates
+    are screened on growing subsamples of each fold with early stopping, and
+    completed trials are recorded in trial_dir (if given) so an interrupted
+    search resumes. strategy='grid' runs src.search.grid_search, the
+    exhaustive GridSearchCV equivalent.
+
+    Either way each fold's XGBoost matrices are built once and shared by all
+    candidates. n_jobs cores (all by default) are split explicitly between
+    concurrent fits and XGBoost threads per fit, instead of running
+    n_jobs=-1 folds that each also use every core.
+
+    X_train may be a scipy sparse matrix. XGBoost treats entries a sparse
+    matrix doesn't store as missing, so the model is then trained with
+    missing=0.0: zeros mean the same thing whether a row arrives sparse or
+    dense at prediction time.
+
+    With prepare_data_for_modeling(..., encoding="native") the categorical
+    code columns are 'category' dtype and are trained as XGBoost categorical
+    features (enable_categorical=True), one column per source feature.
     """
+    import scipy.sparse as sp
+    from src.search import grid_search, successive_halving_search
+
+    missing = 0.0 if sp.issparse(X_train) else np.nan
+    if strategy == 'halving':
+        logger.info("Starting XGBoost successive-halving search...")
+        return successive_halving_search(
+            X_train, y_train, param_grid, cv=cv, random_state=random_state,
+            n_jobs=n_jobs, trial_dir=trial_dir, missing=missing
+        )
+    if strategy != 'grid':
+        raise ValueError(f"Unknown search strategy: {strategy}")
+
     logger.info("Starting XGBoost hyperparameter tuning...")
-    
-    xgb = XGBClassifier(
+    return grid_search(
+        X_train, y_train, param_grid, cv=cv, random_state=random_state,
+        n_jobs=n_jobs, trial_dir=trial_dir, missing=missing
+    )
+
+def _shard_matrix(shard_dir, missing, max_bin, n_folds=0, exclude_fold=None, external_memory=False, cache_dir=None):
+    import xgboost as xgb
+    from src.shards import ShardIterator
+
+    it = ShardIterator(
+        shard_dir, n_folds=n_folds, exclude_fold=exclude_fold,
+        cache_prefix=str(Path(cache_dir) / 'xgb') if external_memory else None
+    )
+    if external_memory:
+        return xgb.DMatrix(it, missing=missing)
+    return xgb.QuantileDMatrix(it, missing=missing, max_bin=max_bin)
+
+
+def _shard_estimator(params, missing, random_state):
+    from xgboost import XGBClassifier
+
+    return XGBClassifier(
         random_state=random_state,
         eval_metric='aucpr',
-        scale_pos_weight=1 
+        scale_pos_weight=1,
+        tree_method='hist',
+        missing=missing,
+        **params
     )
-    
-    grid = GridSearchCV(
-        estimator=xgb, 
-        param_grid=param_grid, 
-        cv=StratifiedKFold(n_splits=cv), 
-        scoring='average_precision', 
-        n_jobs=-1,
-        verbose=1
-    )
-    
-    grid.fit(X_train, y_train)
-    logger.info(f"Best XGBoost Params: {grid.best_params_}")
-    
-    # RETURN THE FULL GRID OBJECT (not just the model)
-    return grid
\ No newline at end of file
+
+
+@instrument()
+def train_xgboost_external(
+    shard_dir,
+    param_grid,
+    cv=5,
+    random_state=42,
+    external_memory=False,
+    max_bin=256
+):
+    """
+    Trains XGBoost out of core from a shard directory (src.shards), with the
+    same grid search as train_xgboost, and returns a GridSearchCV-like result.
+
+    Shards are streamed through a DataIter, so raw features are never fully
+    in memory. By default each fit builds a QuantileDMatrix, which holds the
+    quantized training set (about one byte per stored value). With
+    external_memory=True a paged DMatrix is built instead, with its pages in
+    a temporary directory under shard_dir. With XGBoost 2.0 on CPU this is
+    much slower and not smaller (see benchmarks/bench_external.py). It is
+    meant for training sets whose quantized form does not fit in RAM either.
+
+    Folds are stratified like StratifiedKFold, with rows of each class dealt
+    round-robin in shard order. Each fold is scored by AUC-PR on its held-out
+    rows, streamed shard by shard.
+
+    Args:
+        shard_dir (Path): Directory written by src.shards.write_shards / ShardWriter.
+        param_grid (dict): XGBClassifier parameter grid, as for train_xgboost.
+        cv (int): Number of folds.
+        random_state (int): Seed.
+        external_memory (bool): Page the training matrix to disk.
+        max_bin (int): Histogram bins for QuantileDMatrix.
+
+    Returns:
+        SearchResult: best_estimator_ is an XGBClassifier refit on all shards.
+    """
+    import xgboost as xgb
+    from sklearn.metrics import average_precision_score
+    from sklearn.model_selection import ParameterGrid
+    from src.search import SearchResult
+    from src.shards import iter_shards, read_manifest
+
+    logger.info("Starting out-of-core XGBoost hyperparameter tuning...")
+    manifest = read_manifest(shard_dir)
+    if manifest['n_rows'] == 0:
+        raise ValueError(f"No training rows in {shard_dir}")
+    missing = 0.0 if manifest['sparse'] else np.nan
+    candidates = list(ParameterGrid(param_grid))
+    logger.info(f"Fitting {cv} folds for each of {len(candidates)} candidates, "
+                f"totalling {cv * len(candidates)} fits on {manifest['n_rows']:,} rows")
+
+    search = SearchResult(param_grid, cv)
+    with tempfile.TemporaryDirectory(prefix='xgb-pages-', dir=shard_dir) as cache_dir:
+        split_scores = np.zeros((len(candidates), cv))
+        for k in range(cv):
+            dtrain = _shard_matrix(shard_dir, missing, max_bin, cv, k, external_memory, cache_dir)
+            for i, params in enumerate(candidates):
+                estimator = _shard_estimator(params, missing, random_state)
+                booster = xgb.train(estimator.get_xgb_params(), dtrain,
+                                    num_boost_round=estimator.get_num_boosting_rounds())
+                y_true, y_score = [], []
+                for X, y, folds in iter_shards(shard_dir, cv):
+                    held_out = folds == k
+                    if held_out.any():
+                        y_true.append(y[held_out])
+                        y_score.append(booster.inplace_predict(X[held_out], missing=missing))
+                split_scores[i, k] = average_precision_score(np.concatenate(y_true), np.concatenate(y_score))
+            del dtrain
+
+        search.cv_results_ = {
+            'params': candidates,
+            **{f'split{k}_test_score': split_scores[:, k] for k in range(cv)},
+            'mean_test_score': split_scores.mean(axis=1),
+            'std_test_score': split_scores.std(axis=1),
+            'rank_test_score': (np.argsort(np.argsort(-split_scores.mean(axis=1), kind='stable')) + 1).astype(np.int32),
+        }
+        search.best_index_ = int(np.argmax(search.cv_results_['mean_test_score']))
+        search.best_params_ = candidates[search.best_index_]
+        search.best_score_ = float(search.cv_results_['mean_test_score'][search.best_index_])
+
+        # Refit the best candidate on every shard
+        dtrain = _shard_matrix(shard_dir, missing, max_bin, external_memory=external_memory, cache_dir=cache_dir)
+        estimator = _shard_estimator(search.best_params_, missing, random_state)
+        booster = xgb.train(estimator.get_xgb_params(), dtrain,
+                            num_boost_round=estimator.get_num_boosting_rounds())
+        del dtrain
+        estimator.load_model(booster.save_raw('json'))
+        search.best_estimator_ = estimator
+
+    logger.info(f"Best XGBoost Params: {search.best_params_}")
+    return search
@@ -0,0 +1,609 @@
+# src/monitoring.py
+"""
+Streaming data-quality and drift monitoring on fixed-memory sketches.
+
+Every monitored feature is summarized by a sketch that updates in O(1) per
+row (or one vectorized pass per batch), merges with another sketch of the
+same feature by adding counts, and serializes to a few kilobytes:
+
+    NumericSketch      log-bucketed histogram with relative accuracy alpha
+                       (as DDSketch): quantiles, and PSI / KS against a
+                       reference on the same bucket grid
+    CategoricalSketch  counts over a frozen vocabulary (plus an 'other'
+                       bucket) and a HyperLogLog of distinct values
+    HyperLogLog        distinct-value estimate in 2**precision registers
+
+A DriftMonitor holds one sketch per feature for the live stream and,
+optionally, the sketches of a training reference (a saved profile). Its
+report has the null rate, PSI and KS drift, unseen-category and
+unknown-country rates of each feature, plus the alerts that crossed their
+thresholds. Monitors of different workers or threads merge into one.
+
+Only NumPy is needed to update, merge and report, so the scoring service
+(src.scoring) can monitor its stream without importing pandas.
+"""
+import base64
+import hashlib
+import json
+import logging
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FORMAT = 1
+PSI_ALERT = 0.2
+KS_ALERT = 0.1
+NULL_RATE_ALERT = 0.05
+_PSI_BINS = 10
+_PSI_FLOOR = 1e-4
+_NUMERIC_KINDS = 'biuf'
+
+
+def _token(value) -> str:
+    """Canonical string of a value, so 3, 3.0 and np.int32(3) hash alike."""
+    if type(value) is str:
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+        return repr(float(value))
+    return str(value)
+
+
+def _hash64(value) -> int:
+    """Process-independent 64-bit hash (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(_token(value).encode(), digest_size=8).digest(), 'little')
+
+
+def _is_null(value) -> bool:
+    # pandas' NA has no truth value, so it is recognized by type (pandas is not imported here)
+    return value is None or type(value).__name__ == 'NAType' or value != value
+
+
+class HyperLogLog:
+    """
+    Distinct-count sketch with 2**precision one-byte registers
+    (relative error about 1.04 / sqrt(2**precision); 1.6% at precision 12).
+
+    Args:
+        precision (int): Register index bits, 4 to 16.
+    """
+
+    def __init__(self, precision: int = 12, registers: Optional[np.ndarray] = None):
+        if not 4 <= precision <= 16:
+            raise ValueError(f"precision must be between 4 and 16, got {precision}")
+        self.precision = int(precision)
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8) if registers is None else registers
+
+    def _slot(self, h: int):
+        width = 64 - self.precision
+        rest = h & ((1 << width) - 1)
+        return h >> width, width - rest.bit_length() + 1
+
+    def add_hash(self, h: int):
+        index, rank = self._slot(h)
+        if self.registers[index] < rank:
+            self.registers[index] = rank
+
+    def add(self, value):
+        self.add_hash(_hash64(value))
+
+    def add_hashes(self, hashes: np.ndarray):
+        """Adds a batch of 64-bit hashes (uint64 array)."""
+        if len(hashes) == 0:
+            return
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.intp)
+        rest = hashes & np.uint64((1 << width) - 1)
+        # bit_length of each remainder, without a float round trip
+        bits = np.zeros(len(rest), dtype=np.int64)
+        for shift in (32, 16, 8, 4, 2, 1):
+            high = rest >= np.uint64(1 << shift)
+            bits[high] += shift
+            rest = np.where(high, rest >> np.uint64(shift), rest)
+        bits += (rest > 0)
+        np.maximum.at(self.registers, index, (width - bits + 1).astype(np.uint8))
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog of precision {other.precision} into {self.precision}")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return float(raw)
+
+    def to_dict(self) -> dict:
+        return {'precision': self.precision, 'registers': base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HyperLogLog":
+        registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return cls(data['precision'], registers)
+
+
+class NumericSketch:
+    """
+    Histogram over logarithmic buckets: |x| in (min_value * gamma**(k-1),
+    min_value * gamma**k] falls in bucket k of its sign, with
+    gamma = (1 + alpha) / (1 - alpha), so any quantile is recovered within
+    relative error alpha. Values below min_value in magnitude share a zero
+    bucket and values beyond max_value are clamped into the last bucket.
+
+    Buckets are laid out in value order (negatives, zero, positives), so a
+    cumulative sum is the empirical CDF and two sketches with the same
+    parameters compare bucket by bucket.
+
+    Args:
+        relative_accuracy (float): alpha.
+        min_value (float): Smallest magnitude told apart from zero.
+        max_value (float): Largest magnitude with its own bucket.
+    """
+
+    kind = 'numeric'
+
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 1e-6, max_value: float = 1e12):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be in (0, 1), got {relative_accuracy}")
+        self.relative_accuracy = float(relative_accuracy)
+        self.min_value = float(min_value)
+        self.max_value = float(max_value)
+        self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self._per_sign = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 1
+        self._log_min = math.log(min_value)
+        self._inv_log_gamma = 1.0 / self._log_gamma
+        self.counts: List[int] = [0] * (2 * self._per_sign + 1)
+        self.nulls = 0
+        self.total = 0.0
+
+    @property
+    def count(self) -> int:
+        """Non-null values seen."""
+        return sum(self.counts)
+
+    def _array(self) -> np.ndarray:
+        return np.asarray(self.counts, dtype=np.int64)
+
+    def _bucket(self, x: float) -> int:
+        magnitude = abs(x)
+        if magnitude < self.min_value:
+            return self._per_sign
+        if magnitude == math.inf:
+            # math.ceil(inf) raises; the vectorized update() clamps it into the outermost bucket too
+            k = self._per_sign - 1
+        else:
+            k = min(math.ceil((math.log(magnitude) - self._log_min) * self._inv_log_gamma), self._per_sign - 1)
+        return self._per_sign + 1 + k if x > 0 else self._per_sign - 1 - k
+
+    def update_one(self, value):
+        if _is_null(value):
+            self.nulls += 1
+            return
+        x = float(value)
+        self.counts[self._bucket(x)] += 1
+        self.total += x
+
+    def update(self, values):
+        # Nullable pandas columns (Int64, Float64) hold NA, which only to_numpy maps to NaN
+        x = (values.to_numpy(dtype=np.float64, na_value=np.nan) if hasattr(values, 'to_numpy')
+             else np.asarray(values, dtype=np.float64))
+        valid = ~np.isnan(x)
+        self.nulls += int(len(x) - valid.sum())
+        x = x[valid]
+        magnitude = np.abs(x)
+        k = np.ceil(np.log(np.maximum(magnitude, self.min_value) / self.min_value) / self._log_gamma)
+        k = np.minimum(k, self._per_sign - 1).astype(np.intp)
+        buckets = np.where(x > 0, self._per_sign + 1 + k, self._per_sign - 1 - k)
+        buckets[magnitude < self.min_value] = self._per_sign
+        self.counts = (self._array() + np.bincount(buckets, minlength=len(self.counts))).tolist()
+        self.total += float(x.sum())
+
+    def _check_compatible(self, other: "NumericSketch"):
+        if (other.relative_accuracy, other.min_value, other.max_value) != \
+                (self.relative_accuracy, self.min_value, self.max_value):
+            raise ValueError("Numeric sketches have different bucket parameters")
+
+    def merge(self, other: "NumericSketch"):
+        self._check_compatible(other)
+        self.counts = (self._array() + other._array()).tolist()
+        self.nulls += other.nulls
+        self.total += other.total
+
+    def empty(self) -> "NumericSketch":
+        return NumericSketch(self.relative_accuracy, self.min_value, self.max_value)
+
+    def _value(self, bucket: np.ndarray) -> np.ndarray:
+        k = np.abs(bucket - self._per_sign) - 1
+        magnitude = 2 * self.min_value * np.exp(k * self._log_gamma) / (1 + math.exp(self._log_gamma))
+        return np.where(bucket == self._per_sign, 0.0, np.sign(bucket - self._per_sign) * magnitude)
+
+    def quantiles(self, qs: Sequence[float]) -> List[float]:
+        """Estimated quantiles (NaN when the sketch is empty)."""
+        n = self.count
+        if n == 0:
+            return [float('nan')] * len(qs)
+        cumulative = np.cumsum(self._array())
+        ranks = np.asarray(qs, dtype=np.float64) * (n - 1)
+        return self._value(np.searchsorted(cumulative, ranks, side='right')).tolist()
+
+    def ks(self, reference: "NumericSketch") -> float:
+        """Kolmogorov-Smirnov statistic against reference, at bucket resolution."""
+        self._check_compatible(reference)
+        if self.count == 0 or reference.count == 0:
+            return float('nan')
+        mine = np.cumsum(self._array()) / self.count
+        theirs = np.cumsum(reference._array()) / reference.count
+        return float(np.abs(mine - theirs).max())
+
+    def psi(self, reference: "NumericSketch", n_bins: int = _PSI_BINS) -> float:
+        """Population stability index over the reference's n_bins quantile bins."""
+        self._check_compatible(reference)
+        if self.count == 0 or reference.count == 0:
+            return float('nan')
+        expected_counts = reference._array()
+        before = (np.cumsum(expected_counts) - expected_counts) / reference.count
+        bins = np.minimum((before * n_bins).astype(np.intp), n_bins - 1)
+        expected = np.bincount(bins, weights=expected_counts, minlength=n_bins) / reference.count
+        actual = np.bincount(bins, weights=self._array(), minlength=n_bins) / self.count
+        return _psi(actual, expected)
+
+    def to_dict(self) -> dict:
+        counts = self._array()
+        nonzero = np.flatnonzero(counts)
+        return {'kind': self.kind, 'relative_accuracy': self.relative_accuracy, 'min_value': self.min_value,
+                'max_value': self.max_value, 'nulls': self.nulls, 'total': self.total,
+                'buckets': nonzero.tolist(), 'counts': counts[nonzero].tolist()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NumericSketch":
+        sketch = cls(data['relative_accuracy'], data['min_value'], data['max_value'])
+        for bucket, tally in zip(data['buckets'], data['counts']):
+            sketch.counts[bucket] = int(tally)
+        sketch.nulls = int(data['nulls'])
+        sketch.total = float(data['total'])
+        return sketch
+
+
+class CategoricalSketch:
+    """
+    Counts per category over a vocabulary of at most max_categories values,
+    an 'other' count for anything outside it, and a HyperLogLog of distinct
+    values. The vocabulary grows with the first categories seen unless it is
+    frozen; a live sketch compared to a reference uses the reference's
+    vocabulary, frozen, so its 'other' count is the unseen-category count.
+
+    Args:
+        vocabulary (list, optional): Initial categories.
+        frozen (bool): Never add categories to the vocabulary.
+        max_categories (int): Vocabulary size limit.
+        unknown_value (optional): A category counted separately as 'unknown'
+            (e.g. 'Unknown', the country of IPs outside every range).
+        precision (int): HyperLogLog precision.
+    """
+
+    kind = 'categorical'
+
+    def __init__(self, vocabulary: Optional[Iterable] = None, frozen: bool = False, max_categories: int = 1024,
+                 unknown_value=None, precision: int = 12):
+        self.frozen = bool(frozen)
+        self.max_categories = int(max_categories)
+        self.unknown_value = unknown_value
+        self.vocabulary: List = []
+        self._index: Dict[str, int] = {}
+        self._slots: List[tuple] = []
+        # A plain list: per-row increments are several times cheaper than on a NumPy array
+        self.counts: List[int] = []
+        self.other = 0
+        self.nulls = 0
+        self.unknown = 0
+        self.distinct = HyperLogLog(precision)
+        for value in vocabulary or ():
+            self._add_category(value)
+
+    @property
+    def count(self) -> int:
+        """Non-null values seen."""
+        return sum(self.counts) + self.other
+
+    def _add_category(self, value) -> Optional[int]:
+        if len(self.vocabulary) >= self.max_categories:
+            return None
+        position = len(self.vocabulary)
+        self.vocabulary.append(value)
+        self.counts.append(0)
+        self._index[_token(value)] = position
+        self._slots.append(self.distinct._slot(_hash64(value)))
+        return position
+
+    def _count(self, position: int, tally: int):
+        seen = self.counts[position]
+        self.counts[position] = seen + tally
+        if not seen:
+            # A category's register only needs raising the first time it is counted
+            index, rank = self._slots[position]
+            if self.distinct.registers[index] < rank:
+                self.distinct.registers[index] = rank
+
+    def update_one(self, value):
+        if _is_null(value):
+            self.nulls += 1
+            return
+        if value == self.unknown_value:
+            self.unknown += 1
+        position = self._index.get(_token(value))
+        if position is None and not self.frozen:
+            position = self._add_category(value)
+        if position is None:
+            self.other += 1
+            self.distinct.add_hash(_hash64(value))
+        else:
+            self._count(position, 1)
+
+    def update(self, values):
+        # One step per distinct value: pandas value_counts for a Series, Counter otherwise
+        tallies = (values.value_counts(dropna=False, sort=False) if hasattr(values, 'value_counts')
+                   else Counter(values)).items()
+        hashes = []
+        for value, tally in tallies:
+            if not tally:
+                continue
+            if _is_null(value):
+                self.nulls += int(tally)
+                continue
+            if value == self.unknown_value:
+                self.unknown += int(tally)
+            position = self._index.get(_token(value))
+            if position is None and not self.frozen:
+                position = self._add_category(value)
+            if position is None:
+                self.other += int(tally)
+                hashes.append(_hash64(value))
+            else:
+                self._count(position, int(tally))
+        self.distinct.add_hashes(np.array(hashes, dtype=np.uint64))
+
+    def merge(self, other: "CategoricalSketch"):
+        self.distinct.merge(other.distinct)
+        for value, tally in zip(other.vocabulary, other.counts):
+            if not tally:
+                continue
+            position = self._index.get(_token(value))
+            if position is None and not self.frozen:
+                position = self._add_category(value)
+            if position is None:
+                self.other += tally
+            else:
+                self._count(position, tally)
+        self.other += other.other
+        self.nulls += other.nulls
+        self.unknown += other.unknown
+
+    def empty(self) -> "CategoricalSketch":
+        """A zeroed sketch over this vocabulary, frozen."""
+        return CategoricalSketch(self.vocabulary, True, self.max_categories, self.unknown_value,
+                                 self.distinct.precision)
+
+    def psi(self, reference: "CategoricalSketch") -> float:
+        """Population stability index over the reference's categories plus 'other'."""
+        if self.count == 0 or reference.count == 0:
+            return float('nan')
+        expected = np.append(reference.counts, reference.other) / reference.count
+        actual = np.zeros(len(expected))
+        for value, tally in zip(self.vocabulary, self.counts):
+            position = reference._index.get(_token(value))
+            actual[len(expected) - 1 if position is None else position] += tally
+        actual[-1] += self.other
+        return _psi(actual / self.count, expected)
+
+    def to_dict(self) -> dict:
+        return {'kind': self.kind, 'vocabulary': [v.item() if isinstance(v, np.generic) else v
+                                                 for v in self.vocabulary],
+                'frozen': self.frozen, 'max_categories': self.max_categories,
+                'unknown_value': self.unknown_value, 'counts': list(self.counts),
+                'other': self.other, 'nulls': self.nulls, 'unknown': self.unknown,
+                'distinct': self.distinct.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CategoricalSketch":
+        sketch = cls(data['vocabulary'], data['frozen'], data['max_categories'], data['unknown_value'])
+        sketch.counts = [int(c) for c in data['counts']]
+        sketch.other = int(data['other'])
+        sketch.nulls = int(data['nulls'])
+        sketch.unknown = int(data['unknown'])
+        sketch.distinct = HyperLogLog.from_dict(data['distinct'])
+        return sketch
+
+
+_SKETCHES = {cls.kind: cls for cls in (NumericSketch, CategoricalSketch)}
+
+
+def _psi(actual: np.ndarray, expected: np.ndarray) -> float:
+    actual = np.maximum(actual, _PSI_FLOOR)
+    expected = np.maximum(expected, _PSI_FLOOR)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _rate(part: int, whole: int) -> float:
+    return part / whole if whole else float('nan')
+
+
+class DriftMonitor:
+    """
+    Per-feature sketches of a stream, optionally compared to a reference.
+
+    Build the training profile with for_columns / from_dtypes and update(),
+    save() it, and monitor live data with DriftMonitor.load(path).as_reference().
+
+    Args:
+        sketches (dict): {feature: NumericSketch | CategoricalSketch} of the stream.
+        reference (dict, optional): {feature: sketch} of the reference data.
+    """
+
+    def __init__(self, sketches: Mapping[str, object], reference: Optional[Mapping[str, object]] = None):
+        self.sketches = dict(sketches)
+        self.reference = dict(reference) if reference is not None else None
+        self.rows = 0
+        self._plan = list(self.sketches.items())
+
+    @classmethod
+    def for_columns(cls, numeric: Sequence[str] = (), categorical: Sequence[str] = (),
+                    unknown_values: Optional[Mapping[str, object]] = None, **sketch_args) -> "DriftMonitor":
+        """
+        An empty monitor of the given columns.
+
+        Args:
+            numeric (list): Numeric columns.
+            categorical (list): Categorical (or high-cardinality ID) columns.
+            unknown_values (dict, optional): {column: value counted as unknown}.
+            **sketch_args: relative_accuracy / min_value / max_value for the numeric sketches.
+        """
+        unknown_values = unknown_values or {}
+        sketches = {col: NumericSketch(**sketch_args) for col in numeric}
+        sketches.update({col: CategoricalSketch(unknown_value=unknown_values.get(col)) for col in categorical})
+        return cls(sketches)
+
+    @classmethod
+    def from_dtypes(cls, dtypes: Mapping[str, object], exclude: Sequence[str] = (),
+                    unknown_values: Optional[Mapping[str, object]] = None, **sketch_args) -> "DriftMonitor":
+        """
+        An empty monitor of every column of a schema ({column: dtype}, such as
+        src.storage.FRAUD_ENGINEERED_SCHEMA or DataFrame.dtypes): numeric dtypes
+        get numeric sketches, 'category' / 'object' / 'string' categorical ones;
+        datetimes and excluded columns are skipped.
+        """
+        numeric, categorical = [], []
+        for col, dtype in dict(dtypes).items():
+            if col in exclude:
+                continue
+            name = str(dtype)
+            if name in ('category', 'object', 'string', 'str', 'bool', 'boolean'):
+                categorical.append(col)
+            elif not name.startswith('datetime') and np.dtype(name.lower()).kind in _NUMERIC_KINDS:
+                numeric.append(col)
+        return cls.for_columns(numeric, categorical, unknown_values, **sketch_args)
+
+    def update(self, frame):
+        """Adds a batch: a DataFrame, or a mapping of column -> values (missing columns count as nulls)."""
+        n = len(frame) if hasattr(frame, 'columns') else len(next(iter(frame.values()), ()))
+        for col, sketch in self._plan:
+            if col in frame:
+                sketch.update(frame[col])
+            else:
+                sketch.nulls += n
+        self.rows += n
+
+    def update_one(self, record: Mapping):
+        """Adds one row given as a {feature: value} mapping (missing features count as nulls)."""
+        for col, sketch in self._plan:
+            sketch.update_one(record.get(col))
+        self.rows += 1
+
+    def merge(self, other: "DriftMonitor") -> "DriftMonitor":
+        """Adds the stream sketches of other (a monitor of the same features) into this one."""
+        if set(other.sketches) != set(self.sketches):
+            raise ValueError("Cannot merge monitors of different features")
+        for col, sketch in self.sketches.items():
+            sketch.merge(other.sketches[col])
+        self.rows += other.rows
+        return self
+
+    def empty(self) -> "DriftMonitor":
+        """A zeroed monitor with the same features and reference (e.g. one per thread or worker)."""
+        return DriftMonitor({col: sketch.empty() for col, sketch in self.sketches.items()}, self.reference)
+
+    def as_reference(self) -> "DriftMonitor":
+        """An empty monitor that compares the stream against what this monitor has seen."""
+        return DriftMonitor({col: sketch.empty() for col, sketch in self.sketches.items()}, self.sketches)
+
+    def report(self, psi_alert: float = PSI_ALERT, ks_alert: float = KS_ALERT,
+               null_rate_alert: float = NULL_RATE_ALERT) -> dict:
+        """
+        Data-quality and drift summary.
+
+        Returns:
+            dict: 'rows', 'features' ({feature: metrics}) and 'alerts' (list of
+            messages for PSI / KS above their thresholds and null or unknown
+            rates more than null_rate_alert above the reference's).
+        """
+        features, alerts = {}, []
+        for col, sketch in self.sketches.items():
+            seen = sketch.count + sketch.nulls
+            metrics = {'count': sketch.count, 'null_rate': _rate(sketch.nulls, seen)}
+            if isinstance(sketch, NumericSketch):
+                metrics['mean'] = _rate(sketch.total, sketch.count)
+                metrics.update(zip(('p01', 'p50', 'p99'), sketch.quantiles([0.01, 0.5, 0.99])))
+            else:
+                metrics['distinct'] = round(sketch.distinct.estimate())
+                metrics['unseen_rate'] = _rate(sketch.other, sketch.count)
+                if sketch.unknown_value is not None:
+                    metrics['unknown_rate'] = _rate(sketch.unknown, sketch.count)
+
+            reference = (self.reference or {}).get(col)
+            if reference is not None:
+                metrics['psi'] = sketch.psi(reference)
+                if metrics['psi'] > psi_alert:
+                    alerts.append(f"{col}: PSI {metrics['psi']:.3f} > {psi_alert}")
+                if isinstance(sketch, NumericSketch):
+                    metrics['ks'] = sketch.ks(reference)
+                    if metrics['ks'] > ks_alert:
+                        alerts.append(f"{col}: KS {metrics['ks']:.3f} > {ks_alert}")
+                rates = [('null_rate', reference.nulls, reference.count + reference.nulls)]
+                if 'unknown_rate' in metrics:
+                    rates.append(('unknown_rate', reference.unknown, reference.count))
+                for name, part, whole in rates:
+                    baseline = _rate(part, whole)
+                    metrics[f"reference_{name}"] = baseline
+                    if metrics[name] - baseline > null_rate_alert:
+                        alerts.append(f"{col}: {name} {metrics[name]:.2%} vs {baseline:.2%} in the reference")
+            features[col] = metrics
+        return {'rows': self.rows, 'features': features, 'alerts': alerts}
+
+    def to_dict(self) -> dict:
+        data = {'format': PROFILE_FORMAT, 'rows': self.rows,
+                'sketches': {col: sketch.to_dict() for col, sketch in self.sketches.items()}}
+        if self.reference is not None:
+            data['reference'] = {col: sketch.to_dict() for col, sketch in self.reference.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DriftMonitor":
+        if data.get('format') != PROFILE_FORMAT:
+            raise ValueError(f"Unsupported monitoring profile format {data.get('format')}")
+
+        def build(sketches):
+            return {col: _SKETCHES[spec['kind']].from_dict(spec) for col, spec in sketches.items()}
+
+        monitor = cls(build(data['sketches']), build(data['reference']) if 'reference' in data else None)
+        monitor.rows = int(data['rows'])
+        return monitor
+
+    def save(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        logger.info(f"✅ Saved monitoring profile of {len(self.sketches)} features ({self.rows:,} rows) to {path}")
+
+    @classmethod
+    def load(cls, path: Path) -> "DriftMonitor":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def log_report(report: dict, title: str = "Drift report"):
+    """Logs a report() summary line per feature and a warning per alert."""
+    logger.info(f"{title}: {report['rows']:,} rows, {len(report['alerts'])} alert(s)")
+    for col, metrics in report['features'].items():
+        parts = [f"{name}={value:.4g}" for name, value in metrics.items()
+                 if name in ('null_rate', 'psi', 'ks', 'unseen_rate', 'unknown_rate')]
+        logger.info(f"  {col}: {', '.join(parts)}")
+    for alert in report['alerts']:
+        logger.warning(f"⚠️ Drift alert: {alert}")
@@ -0,0 +1,265 @@
+# src/parallel.py
+"""
+Process-parallel Fraud_Data preprocessing.
+
+Rows are partitioned by a hash of user_id, so every per-user aggregate and
+every set of duplicate rows is confined to one partition, and each worker can
+clean, geo-map and feature-engineer its partition independently. Columns reach
+the workers, and results come back, through shared memory blocks rather than
+pickles; the partition results are merged back into the original row order,
+so the output is identical to the serial pipeline.
+"""
+import logging
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import duplicate_mask
+from src.data_processing import map_ips_to_countries
+from src.data_preprocessing import engineer_features
+from src.ip_index import IpCountryIndex
+from src.profiling import instrument
+
+logger = logging.getLogger(__name__)
+
+# (shared memory block name, dtype string, shape)
+BlockSpec = Tuple[str, str, Tuple[int, ...]]
+
+
+def _read_block(block: BlockSpec, rows: Optional[np.ndarray] = None) -> np.ndarray:
+    """Copies a shared array (or the given rows of it) into process memory."""
+    name, dtype, shape = block
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        out = view.copy() if rows is None else view[rows]
+        del view
+        return out
+    finally:
+        shm.close()
+
+
+class SharedFrame:
+    """
+    A DataFrame's columns copied into named shared memory blocks.
+
+    Numeric, boolean and datetime columns are shared as-is, categoricals as
+    their codes and string columns as factorized codes plus a fixed-width
+    array of the unique values, so only small metadata (the spec) has to be
+    pickled to hand the frame to another process. Any other column is pickled.
+
+    The creating process owns the blocks: close() releases them, and
+    collect() lets the receiving process read and release them instead.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._blocks: List[shared_memory.SharedMemory] = []
+        index = df.index
+        self.spec = {
+            'length': len(df),
+            'index': None if isinstance(index, pd.RangeIndex) else self.share(index.to_numpy()),
+            'columns': [(name, self._encode(df[name])) for name in df.columns],
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def share(self, array: np.ndarray) -> BlockSpec:
+        """Copies an array into a new block owned by this frame and returns its spec."""
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        self._blocks.append(shm)
+        return shm.name, array.dtype.str, array.shape
+
+    def _encode(self, series: pd.Series) -> dict:
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            return {'kind': 'category', 'codes': self.share(series.cat.codes.to_numpy()),
+                    'categories': dtype.categories, 'ordered': dtype.ordered}
+        if dtype == object:
+            codes, uniques = pd.factorize(series, sort=False)
+            if pd.api.types.infer_dtype(uniques, skipna=False) == 'string':
+                uniques = np.asarray(uniques, dtype=str) if len(uniques) else np.array([], dtype='U1')
+                return {'kind': 'strings', 'codes': self.share(codes), 'uniques': self.share(uniques)}
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biufmM':
+            return {'kind': 'array', 'values': self.share(series.to_numpy())}
+        return {'kind': 'pickled', 'values': series.to_numpy()}
+
+    def close(self, unlink: bool = True):
+        """Detaches from the blocks, and frees them unless another process will collect them."""
+        for shm in self._blocks:
+            shm.close()
+            if unlink:
+                shm.unlink()
+        self._blocks = []
+
+    @staticmethod
+    def read(spec: dict, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Rebuilds the frame (or the given row positions of it) from a spec.
+        Without a shared index, the index is the row positions.
+        """
+        if rows is None:
+            rows = np.arange(spec['length'])
+        index = rows if spec['index'] is None else _read_block(spec['index'], rows)
+        columns = {}
+        for name, enc in spec['columns']:
+            kind = enc['kind']
+            if kind == 'category':
+                dtype = pd.CategoricalDtype(enc['categories'], ordered=enc['ordered'])
+                values = pd.Categorical.from_codes(_read_block(enc['codes'], rows), dtype=dtype)
+            elif kind == 'strings':
+                codes = _read_block(enc['codes'], rows)
+                uniques = np.append(_read_block(enc['uniques']).astype(object), np.nan)
+                values = uniques[codes]
+            elif kind == 'array':
+                values = _read_block(enc['values'], rows)
+            else:
+                values = enc['values'][rows]
+            columns[name] = values
+        return pd.DataFrame(columns, index=pd.Index(index))
+
+    @staticmethod
+    def collect(spec: dict) -> pd.DataFrame:
+        """Reads a frame shared by another process and frees its blocks."""
+        try:
+            return SharedFrame.read(spec)
+        finally:
+            SharedFrame.release(spec)
+
+    @staticmethod
+    def release(spec: dict):
+        """Frees the blocks of a frame shared by another process without reading it."""
+        for block in SharedFrame._blocks_of(spec):
+            shm = shared_memory.SharedMemory(name=block[0])
+            shm.close()
+            shm.unlink()
+
+    @staticmethod
+    def _blocks_of(spec: dict) -> List[BlockSpec]:
+        blocks = [spec['index']] if spec['index'] is not None else []
+        for _, enc in spec['columns']:
+            blocks += [enc[key] for key in ('codes', 'uniques', 'values')
+                       if key in enc and enc['kind'] != 'pickled']
+        return blocks
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Process pool for the parallel pipeline. The shared memory resource tracker
+    is started first so every worker reports to the parent's tracker, and
+    blocks a worker hands back are not treated as leaked when it exits.
+    """
+    resource_tracker.ensure_running()
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def hash_partitions(keys: pd.Series, n_partitions: int) -> np.ndarray:
+    """Partition number (0..n_partitions-1) of each row, stable across processes and runs."""
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return (hashes % np.uint64(n_partitions)).astype(np.int32)
+
+
+def _fraud_partition(frame_spec: dict, partitions: BlockSpec, partition: int,
+                     ip_index_path: str) -> Tuple[Optional[dict], Dict[str, int]]:
+    """
+    Worker: cleans, geo-maps and feature-engineers one user_id partition.
+    Keeps the same rows as remove_duplicates + remove_missing_values (first
+    occurrence of each row, then rows without nulls) and the original row
+    positions as the index, so the parent can restore the serial order.
+    """
+    rows = np.flatnonzero(_read_block(partitions) == partition)
+    part = SharedFrame.read(frame_spec, rows)
+    duplicates = duplicate_mask(part)
+    keep = ~duplicates & part.notna().all(axis=1).to_numpy()
+    stats = {'rows': len(part), 'duplicates': int(duplicates.sum()), 'kept': int(keep.sum())}
+    part = part[keep]
+    if part.empty:
+        return None, stats
+
+    part = map_ips_to_countries(part, IpCountryIndex.load(ip_index_path))
+    part = engineer_features(part)
+    result = SharedFrame(part)
+    result.close(unlink=False)
+    return result.spec, stats
+
+
+@instrument()
+def parallel_fraud_pipeline(
+    df: pd.DataFrame,
+    ip_index: IpCountryIndex,
+    executor: Executor,
+    n_partitions: int
+) -> pd.DataFrame:
+    """
+    Deduplicates, drops missing values, maps IPs and engineers features for
+    Fraud_Data across worker processes.
+
+    Args:
+        df (pd.DataFrame): Raw Fraud_Data.
+        ip_index (IpCountryIndex): Compiled IP -> country index; workers memory-map a saved copy.
+        executor (Executor): Process pool to run the partitions on (see process_pool).
+        n_partitions (int): Number of user_id hash partitions, typically the worker count.
+
+    Returns:
+        pd.DataFrame: The same frame the serial pipeline produces, in the same row order.
+
+    Raises:
+        ValueError: If user_id is missing or n_partitions is not positive.
+    """
+    try:
+        if 'user_id' not in df.columns:
+            raise ValueError("Missing required columns: ['user_id']")
+        if n_partitions < 1:
+            raise ValueError(f"n_partitions must be positive, got {n_partitions}")
+
+        with tempfile.TemporaryDirectory() as index_dir, SharedFrame(df) as shared:
+            ip_index.save(Path(index_dir))
+            partitions = shared.share(hash_partitions(df['user_id'], n_partitions))
+            futures = [executor.submit(_fraud_partition, shared.spec, partitions, p, index_dir)
+                       for p in range(n_partitions)]
+            # Wait for every partition, so none is still creating result blocks when one fails
+            results, error = [], None
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    error = error or e
+            specs = [spec for spec, _ in results if spec is not None]
+            if error is not None:
+                for spec in specs:
+                    SharedFrame.release(spec)
+                raise error
+
+        frames = []
+        try:
+            for spec in specs:
+                frames.append(SharedFrame.collect(spec))
+        finally:
+            # collect() frees its own spec even when reading fails; free the ones after it
+            for spec in specs[len(frames) + 1:]:
+                SharedFrame.release(spec)
+        duplicates = sum(stats['duplicates'] for _, stats in results)
+        kept = sum(stats['kept'] for _, stats in results)
+        logger.info(f"Initial Row Count: {len(df):,}")
+        logger.info(f"Duplicate Rows Found: {duplicates:,}")
+        logger.info(f"Rows After Cleaning: {kept:,} ({n_partitions} partitions)")
+
+        if not frames:
+            return engineer_features(map_ips_to_countries(df.iloc[:0], ip_index))
+        merged = pd.concat(frames).sort_index(kind='stable').reset_index(drop=True)
+        logger.info(f"✅ Parallel Fraud_Data pipeline complete: {len(merged):,} rows")
+        return merged
+
+    except Exception as e:
+        logger.error(f"Error in parallel_fraud_pipeline: {str(e)}")
+        raise
@@ -0,0 +1,57 @@
+# src/plotting.py
+"""
+Headless-aware access to matplotlib and IPython display.
+
+The evaluation and explainability modules import matplotlib through these
+helpers on first use instead of at module import. Set FRAUD_HEADLESS=1 for
+batch jobs, CI and servers: pyplot is switched to the non-interactive Agg
+backend and nothing is shown, so plots are only saved. IPython is never
+imported here; display() only hands an object to an IPython shell that is
+already running (a notebook or the IPython REPL).
+"""
+import logging
+import os
+import sys
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_TRUE = ('1', 'true', 'yes', 'on')
+
+
+def headless() -> bool:
+    """True when FRAUD_HEADLESS is set to 1 / true / yes / on."""
+    return os.environ.get('FRAUD_HEADLESS', '').strip().lower() in _TRUE
+
+
+def ipython_shell():
+    """The running IPython shell, or None. Does not import IPython."""
+    ipython = sys.modules.get('IPython')
+    return ipython.get_ipython() if ipython is not None else None
+
+
+def pyplot():
+    """Imports and returns matplotlib.pyplot, on the Agg backend when headless."""
+    if headless():
+        import matplotlib
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def display(obj, show: Optional[bool] = None) -> bool:
+    """
+    Displays obj in the running IPython shell.
+
+    Args:
+        obj: Anything IPython can render (e.g. a SHAP force plot).
+        show (bool): False never displays; None (default) displays unless headless.
+
+    Returns:
+        bool: Whether obj was displayed (never outside an IPython shell).
+    """
+    if show is False or (show is None and headless()) or ipython_shell() is None:
+        return False
+    from IPython.display import display as ipython_display
+    ipython_display(obj)
+    return True
@@ -0,0 +1,391 @@
+# src/profiling.py
+"""
+Stage-level instrumentation for the preprocessing and training pipeline.
+
+Functions decorated with @instrument (and blocks wrapped in `with stage(...)`)
+record wall time, CPU time, peak RSS growth and rows in / out per call into
+the process-wide StageRecorder. Recording is off until enable_profiling() is
+called; until then a decorated function costs one attribute check per call.
+
+Results export as JSON (to_dict / save_json) and in the Prometheus text
+format (prometheus / save_prometheus, e.g. for node_exporter's textfile
+collector). With a profile_dir, the outermost stage on each thread also
+dumps a profile: a cProfile file (.prof, for pstats or snakeviz), or in
+'sample' mode the folded stacks of a wall-clock sampler (.folded, for
+flamegraph.pl or speedscope), which costs far less than cProfile on
+call-heavy code.
+
+Peak RSS is the kernel's high-water mark (VmHWM), reset at every stage start
+through /proc/self/clear_refs; where that is not possible the growth of the
+process peak is reported instead. CPU time and RSS are process-wide, so they
+include native threads (BLAS, XGBoost) and any stages running concurrently
+on other threads. Stages that run inside worker processes are recorded by
+the worker's own recorder and not merged back.
+"""
+import cProfile
+import functools
+import inspect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ('cprofile', 'sample')
+METRIC_PREFIX = 'fraud_pipeline_stage'
+_MB = 1024 ** 2
+_STATUS = '/proc/self/status'
+_CLEAR_REFS = '/proc/self/clear_refs'
+
+
+def _memory() -> tuple:
+    """(current RSS, peak RSS since the last reset) in bytes; NaN where unknown."""
+    rss = peak = float('nan')
+    try:
+        fd = os.open(_STATUS, os.O_RDONLY)
+        try:
+            status = os.read(fd, 1 << 14)
+        finally:
+            os.close(fd)
+        start = status.index(b'VmHWM:') + 6
+        peak = int(status[start:status.index(b'kB', start)]) * 1024
+        start = status.index(b'VmRSS:') + 6
+        rss = int(status[start:status.index(b'kB', start)]) * 1024
+    except (OSError, ValueError):
+        try:
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            peak = maxrss if sys.platform == 'darwin' else maxrss * 1024
+        except ImportError:
+            pass
+    return rss, peak
+
+
+def _reset_peak() -> bool:
+    """Resets VmHWM to the current RSS (Linux); False when not permitted."""
+    try:
+        with open(_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _rows(obj) -> Optional[int]:
+    """Row count of a frame / array (or of the first element of a tuple), else None."""
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    shape = getattr(obj, 'shape', None)
+    return int(shape[0]) if shape else None
+
+
+class _Sampler(threading.Thread):
+    """Wall-clock sampler of one thread's Python stack, kept as folded stacks."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name='stage-sampler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != __file__:  # leave out the @instrument wrappers
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def enable(self):
+        self.start()
+
+    def disable(self):
+        self._done.set()
+        self.join()
+
+    def dump_stats(self, path: Path):
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class _NullStage:
+    """What stage() returns while recording is off: a no-op context manager."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """An open stage; set rows_out before the block ends to record it."""
+
+    def __init__(self, recorder: "StageRecorder", name: str, rows_in: Optional[int]):
+        self.recorder = recorder
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        recorder = self.recorder
+        stack = recorder._stack()
+        self.parent = stack[-1].name if stack else None
+        rss, peak = _memory()
+        with recorder._lock:
+            # The high-water mark is about to be reset: fold it into every open stage first
+            for other in recorder._open:
+                other.peak = max(other.peak, peak)
+            if recorder.resets_peak:
+                _reset_peak()
+            recorder._open.add(self)
+        self.rss = rss
+        self.base = rss if recorder.resets_peak else peak
+        self.peak = self.base
+        stack.append(self)
+        self.profiler = recorder._start_profile() if recorder.profile_dir is not None and len(stack) == 1 else None
+        self.cpu = time.process_time()
+        self.wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        recorder = self.recorder
+        profile = recorder._stop_profile(self.profiler, self.name) if self.profiler is not None else None
+        recorder._stack().pop()
+        _, peak = _memory()
+        with recorder._lock:
+            recorder._open.discard(self)
+            record = {
+                'stage': self.name, 'parent': self.parent, 'wall_s': wall, 'cpu_s': cpu,
+                'rss_start_mb': self.rss / _MB, 'peak_rss_delta_mb': (max(self.peak, peak) - self.base) / _MB,
+                'rows_in': self.rows_in, 'rows_out': self.rows_out, 'ok': exc_type is None,
+            }
+            if profile is not None:
+                record['profile'] = str(profile)
+            recorder.records.append(record)
+        return False
+
+
+class StageRecorder:
+    """
+    Collects one record per stage call.
+
+    Args:
+        enabled (bool): Record stages; when False, stage() and @instrument are no-ops.
+        profile_dir (Path, optional): Write a profile of every outermost stage here.
+        profile_mode (str): 'cprofile' (deterministic) or 'sample' (folded stacks).
+        sample_interval (float): Seconds between stack samples in 'sample' mode.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        profile_dir: Optional[Path] = None,
+        profile_mode: str = 'cprofile',
+        sample_interval: float = 0.005
+    ):
+        if profile_mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile_mode: {profile_mode} (expected one of {PROFILE_MODES})")
+        if sample_interval <= 0:
+            raise ValueError(f"sample_interval must be positive, got {sample_interval}")
+        self.enabled = enabled
+        self.profile_dir = Path(profile_dir) if profile_dir is not None else None
+        self.profile_mode = profile_mode
+        self.sample_interval = sample_interval
+        self.records: List[dict] = []
+        self.resets_peak = enabled and _reset_peak()
+        self._open = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiles = 0
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _start_profile(self):
+        if self.profile_mode == 'cprofile':
+            profiler = cProfile.Profile()
+        else:
+            profiler = _Sampler(threading.get_ident(), self.sample_interval)
+        profiler.enable()
+        return profiler
+
+    def _stop_profile(self, profiler, name: str) -> Path:
+        profiler.disable()
+        with self._lock:
+            self._profiles += 1
+            number = self._profiles
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        suffix = 'prof' if self.profile_mode == 'cprofile' else 'folded'
+        path = self.profile_dir / f"{name}-{os.getpid()}-{number}.{suffix}"
+        profiler.dump_stats(path)
+        return path
+
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        """
+        Context manager recording the enclosed block as one call of stage name.
+
+        Example:
+            with recorder.stage('merge', rows_in=len(df)) as current:
+                df = merge(df)
+                current.rows_out = len(df)
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, rows_in)
+
+    def summary(self) -> Dict[str, dict]:
+        """Per-stage totals: calls, wall / CPU seconds, largest peak RSS growth and rows in / out."""
+        stages = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            totals = stages.setdefault(record['stage'], {
+                'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_delta_mb': 0.0, 'rows_in': 0, 'rows_out': 0
+            })
+            totals['calls'] += 1
+            totals['wall_s'] += record['wall_s']
+            totals['cpu_s'] += record['cpu_s']
+            totals['peak_rss_delta_mb'] = max(totals['peak_rss_delta_mb'], record['peak_rss_delta_mb'])
+            totals['rows_in'] += record['rows_in'] or 0
+            totals['rows_out'] += record['rows_out'] or 0
+        return stages
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            records = list(self.records)
+        return {'pid': os.getpid(), 'stages': self.summary(), 'records': records}
+
+    def save_json(self, path: Path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), indent=2))
+        logger.info(f"✅ Saved stage metrics to {path}")
+
+    def prometheus(self, prefix: str = METRIC_PREFIX) -> str:
+        """The stage totals in the Prometheus text exposition format."""
+        metrics = [
+            ('calls_total', 'counter', "Stage calls.", 'calls', 1),
+            ('wall_seconds_total', 'counter', "Wall-clock time spent in the stage.", 'wall_s', 1),
+            ('cpu_seconds_total', 'counter', "Process CPU time spent in the stage.", 'cpu_s', 1),
+            ('peak_rss_delta_bytes', 'gauge', "Largest RSS growth above the stage's starting RSS.",
+             'peak_rss_delta_mb', _MB),
+            ('rows_in_total', 'counter', "Rows passed into the stage.", 'rows_in', 1),
+            ('rows_out_total', 'counter', "Rows returned by the stage.", 'rows_out', 1),
+        ]
+        stages = self.summary()
+        lines = []
+        for suffix, kind, help_text, key, scale in metrics:
+            name = f"{prefix}_{suffix}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for stage_name, totals in stages.items():
+                label = stage_name.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                lines.append(f'{name}{{stage="{label}"}} {totals[key] * scale:.17g}')
+        return '\n'.join(lines) + '\n'
+
+    def save_prometheus(self, path: Path, prefix: str = METRIC_PREFIX):
+        """Writes prometheus() to path atomically, as the textfile collector expects."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_text(self.prometheus(prefix))
+        os.replace(tmp, path)
+        logger.info(f"✅ Saved Prometheus stage metrics to {path}")
+
+    def log_summary(self):
+        stages = self.summary()
+        if not stages:
+            return
+        logger.info(f"{'stage':<32} {'calls':>5} {'wall s':>8} {'cpu s':>8} {'+RSS MB':>8} {'rows in':>11} {'rows out':>11}")
+        for name, t in sorted(stages.items(), key=lambda item: -item[1]['wall_s']):
+            logger.info(f"{name:<32} {t['calls']:>5} {t['wall_s']:>8.2f} {t['cpu_s']:>8.2f} "
+                        f"{t['peak_rss_delta_mb']:>8.1f} {t['rows_in']:>11,} {t['rows_out']:>11,}")
+
+
+_RECORDER = StageRecorder(enabled=False)
+
+
+def get_recorder() -> StageRecorder:
+    """The process-wide recorder used by stage() and @instrument."""
+    return _RECORDER
+
+
+def enable_profiling(
+    profile_dir: Optional[Path] = None,
+    profile_mode: str = 'cprofile',
+    sample_interval: float = 0.005
+) -> StageRecorder:
+    """Starts recording stages into a fresh process-wide recorder and returns it."""
+    global _RECORDER
+    _RECORDER = StageRecorder(True, profile_dir, profile_mode, sample_interval)
+    return _RECORDER
+
+
+def disable_profiling() -> StageRecorder:
+    """Stops recording; returns the recorder with what it collected."""
+    _RECORDER.enabled = False
+    return _RECORDER
+
+
+def stage(name: str, rows_in: Optional[int] = None):
+    """StageRecorder.stage on the process-wide recorder."""
+    return _RECORDER.stage(name, rows_in)
+
+
+def instrument(name: Optional[str] = None, rows_arg: Union[int, str, None] = 0) -> Callable:
+    """
+    Decorator recording every call of the function as a stage.
+
+    Args:
+        name (str, optional): Stage name (default: the function's name).
+        rows_arg (int, str or None): Position or name of the argument whose
+            rows are counted as rows in (None: no such argument); rows out come
+            from the return value (its first element for tuples). Either is
+            None when it has no shape.
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+        params = list(inspect.signature(fn).parameters)
+        position = params.index(rows_arg) if isinstance(rows_arg, str) else rows_arg
+        keyword = params[position] if position is not None and position < len(params) else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            recorder = _RECORDER
+            if not recorder.enabled:
+                return fn(*args, **kwargs)
+            if position is None:
+                data = None
+            else:
+                data = args[position] if len(args) > position else kwargs.get(keyword)
+            with recorder.stage(label, _rows(data)) as current:
+                result = fn(*args, **kwargs)
+                current.rows_out = _rows(result)
+            return result
+
+        return wrapper
+
+    return decorate
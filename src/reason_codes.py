@@ -0,0 +1,93 @@
+# src/reason_codes.py
+"""
+Top-k reason codes for scored transactions.
+
+Per-column contributions (XGBoost's native pred_contribs, or coef * x for a
+linear model, both in log-odds) are summed back to the raw input features:
+the one-hot columns of a categorical feature add up to that feature's
+contribution, since SHAP values are additive. The k largest contributions
+towards fraud are the transaction's reason codes.
+"""
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class ReasonCoder:
+    """
+    Maps encoded columns to source features and ranks their contributions.
+
+    Args:
+        feature_groups (list): (source feature, encoded column positions) pairs.
+        n_columns (int): Width of the encoded row.
+    """
+
+    def __init__(self, feature_groups: Sequence[Tuple[str, Sequence[int]]], n_columns: int):
+        self.features = [name for name, _ in feature_groups]
+        self.n_columns = int(n_columns)
+        # Column -> feature indicator, so grouping a batch is one matrix product
+        self.indicator = np.zeros((self.n_columns, len(self.features)), dtype=np.float32)
+        for g, (_, columns) in enumerate(feature_groups):
+            self.indicator[list(columns), g] = 1.0
+        if (self.indicator.sum(axis=1) != 1).any():
+            raise ValueError("Every encoded column must belong to exactly one source feature")
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor) -> "ReasonCoder":
+        """From a fitted ColumnTransformer or a CompiledPreprocessor (src.scoring)."""
+        from src.scoring import CompiledPreprocessor
+
+        if not isinstance(preprocessor, CompiledPreprocessor):
+            preprocessor = CompiledPreprocessor.from_column_transformer(preprocessor)
+        groups = [(name, [int(pos)]) for name, pos in
+                  zip(preprocessor.numeric_features, preprocessor.numeric_columns)]
+        groups += [(name, sorted(mapping.values())) for name, mapping in
+                   zip(preprocessor.categorical_features, preprocessor.category_maps)]
+        groups += [(name, [int(pos)]) for name, pos in
+                   zip(preprocessor.coded_features, preprocessor.coded_columns)]
+        return cls(groups, preprocessor.n_features)
+
+    @classmethod
+    def from_feature_names(cls, feature_names: Sequence[str], categorical_features: Sequence[str]) -> "ReasonCoder":
+        """
+        From encoded column names such as get_feature_names (src.explainability)
+        returns: a column named '<categorical feature>_<category>' belongs to that
+        feature (the longest matching name wins), any other column is its own feature.
+        """
+        by_length = sorted(categorical_features, key=len, reverse=True)
+        groups: Dict[str, List[int]] = {}
+        for pos, name in enumerate(feature_names):
+            source = next((c for c in by_length if str(name).startswith(f"{c}_")), str(name))
+            groups.setdefault(source, []).append(pos)
+        return cls(list(groups.items()), len(feature_names))
+
+    def aggregate(self, contributions: np.ndarray) -> np.ndarray:
+        """(n, n_columns) column contributions (a trailing bias column is dropped) -> (n, n_features)."""
+        contributions = np.asarray(contributions, dtype=np.float32)
+        if contributions.shape[1] == self.n_columns + 1:
+            contributions = contributions[:, :-1]
+        if contributions.shape[1] != self.n_columns:
+            raise ValueError(f"Expected {self.n_columns} contribution columns, got {contributions.shape[1]}")
+        return contributions @ self.indicator
+
+    def top_k(self, contributions: np.ndarray, k: int = 3) -> List[List[Dict[str, object]]]:
+        """
+        The k source features pushing each row's score furthest towards fraud.
+
+        Returns:
+            list: Per row, up to k {'feature', 'contribution'} dicts, largest first.
+        """
+        grouped = self.aggregate(contributions)
+        k = min(k, grouped.shape[1])
+        if k <= 0:
+            return [[] for _ in range(len(grouped))]
+        top = np.argpartition(-grouped, k - 1, axis=1)[:, :k]
+        values = np.take_along_axis(grouped, top, axis=1)
+        order = np.argsort(-values, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        return [[{'feature': self.features[j], 'contribution': float(v)} for j, v in zip(row_j, row_v)]
+                for row_j, row_v in zip(top.tolist(), values.tolist())]
@@ -0,0 +1,464 @@
+# src/search.py
+"""
+Hyperparameter search for XGBoost: successive halving, and an exhaustive
+grid search with the same machinery.
+
+Every candidate of the parameter grid is first evaluated on a small budget
+(a fraction of each training fold's rows, or of its boosting rounds). Only the
+best 1/factor of candidates move on to the next rung, where the budget grows
+by factor, until the last rung runs the survivors on the full budget. Each
+fit stops early once AUC-PR stops improving on an early-stopping set carved
+out of its training fold (a stratified EARLY_STOPPING_FRACTION slice, of
+which each rung uses a same-fraction subsample); the validation fold is only
+used to score the trial, so the choice of round never sees the rows it is
+scored on.
+
+Trials (candidate x rung x fold) run on a thread pool. The thread budget is
+split explicitly: a few trials run concurrently, each with its share of the
+cores as XGBoost threads. Completed trials are appended to a JSON-lines
+file, so a rerun with the same data and settings resumes where the last
+one stopped. Each fold's XGBoost matrices are built once per rung and
+shared by every candidate (FoldMatrixCache).
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import xgboost as xgb
+from sklearn.metrics import average_precision_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from xgboost import XGBClassifier
+
+from src.profiling import instrument
+
+logger = logging.getLogger(__name__)
+
+TRIALS_FILE = 'trials.jsonl'
+# Share of each training fold held out for early stopping
+EARLY_STOPPING_FRACTION = 0.15
+
+
+class SearchResult:
+    """
+    Result of a search run outside GridSearchCV (successive halving,
+    train_xgboost_external), exposing the attributes the notebooks use:
+    best_estimator_, best_params_, best_score_ and cv_results_.
+    """
+
+    def __init__(self, param_grid, cv):
+        self.param_grid = param_grid
+        self.cv = cv
+        self.cv_results_ = None
+        self.best_index_ = None
+        self.best_params_ = None
+        self.best_score_ = None
+        self.best_estimator_ = None
+        self.refit_seconds_ = None
+        self.fold_matrix_stats_ = None
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def thread_budget(n_jobs: Optional[int] = None, max_concurrent: int = 1) -> Tuple[int, int]:
+    """
+    Splits n_jobs cores (all usable cores by default) between concurrent
+    trials and XGBoost threads per trial, so their product never exceeds n_jobs.
+
+    Returns:
+        (int, int): Concurrent trials, threads per trial.
+    """
+    total = available_cpus() if n_jobs is None or n_jobs < 1 else n_jobs
+    workers = max(1, min(total, max_concurrent))
+    return workers, max(1, total // workers)
+
+
+def data_fingerprint(X, y) -> str:
+    """Content hash of a training set, so cached trials are only reused for the same data."""
+    digest = hashlib.sha256()
+    if isinstance(X, pd.DataFrame):
+        from src.data_cleaning import row_hashes
+
+        digest.update(json.dumps([str(c) for c in X.columns]).encode())
+        digest.update(row_hashes(X).tobytes())
+    elif sp.issparse(X):
+        X = sp.csr_matrix(X)
+        for part in (X.data, X.indices, X.indptr):
+            digest.update(np.ascontiguousarray(part).tobytes())
+    else:
+        digest.update(np.ascontiguousarray(X).tobytes())
+    digest.update(str(getattr(X, 'shape', '')).encode())
+    digest.update(np.ascontiguousarray(np.asarray(y)).tobytes())
+    return digest.hexdigest()
+
+
+class TrialStore:
+    """
+    Completed trial results keyed by a hash of everything they depend on,
+    persisted as one JSON line per trial. Without a directory, results are
+    only kept in memory.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        self.path = Path(directory) / TRIALS_FILE if directory is not None else None
+        self._results: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a line cut short by an interruption
+                    self._results[record['key']] = record
+            logger.info(f"Loaded {len(self._results):,} completed trials from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @staticmethod
+    def key(**parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._results.get(key)
+
+    def put(self, key: str, result: dict):
+        record = {'key': key, **result}
+        with self._lock:
+            self._results[key] = record
+            if self.path is not None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(record) + '\n')
+
+
+def _take(X, rows: np.ndarray):
+    return X.iloc[rows] if isinstance(X, pd.DataFrame) else X[rows]
+
+
+def _has_categories(X) -> bool:
+    """True for a DataFrame with 'category' columns (encoding="native" in src.model_preprocessing)."""
+    return isinstance(X, pd.DataFrame) and any(isinstance(dtype, pd.CategoricalDtype) for dtype in X.dtypes)
+
+
+def _estimator(params: dict, missing: float, random_state: int, n_jobs: int,
+               enable_categorical: bool = False) -> XGBClassifier:
+    return XGBClassifier(
+        random_state=random_state,
+        eval_metric='aucpr',
+        scale_pos_weight=1,
+        tree_method='hist',
+        missing=missing,
+        n_jobs=n_jobs,
+        enable_categorical=enable_categorical,
+        **params
+    )
+
+
+class FoldMatrixCache:
+    """
+    XGBoost matrices of each CV fold (subsample), built once and shared by
+    every candidate evaluated on it: a QuantileDMatrix of the training rows,
+    and DMatrix objects of the early-stopping rows (None without early
+    stopping) and of the validation rows.
+
+    Entries are plain references. Trials hold them while they run; clear(),
+    or dropping the cache when the search returns, lets reference counting
+    free the XGBoost matrices.
+
+    Args:
+        X: Training features (DataFrame, array or scipy sparse matrix).
+        y (np.ndarray): Training labels.
+        missing (float): Missing-value marker.
+        nthread (int): Threads used to build each matrix.
+        enabled (bool): When False, every trial builds its own matrices.
+
+    'category' columns of a DataFrame X are passed to XGBoost as categorical
+    features (enable_categorical).
+    """
+
+    def __init__(self, X, y: np.ndarray, missing: float, nthread: int = 1, enabled: bool = True):
+        self.X = X
+        self.y = y
+        self.missing = missing
+        self.nthread = nthread
+        self.enabled = enabled
+        self.enable_categorical = _has_categories(X)
+        self.builds = 0
+        self.hits = 0
+        self.build_seconds = 0.0
+        self._entries: Dict[tuple, tuple] = {}
+        self._locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _build(self, train_rows, stop_rows, valid_rows, max_bin):
+        start = time.perf_counter()
+        X, y, missing, nthread = self.X, self.y, self.missing, self.nthread
+        options = dict(missing=missing, nthread=nthread, enable_categorical=self.enable_categorical)
+        dtrain = xgb.QuantileDMatrix(_take(X, train_rows), y[train_rows], max_bin=max_bin, **options)
+        # Plain DMatrix: per-round evaluation on a QuantileDMatrix is an order of magnitude slower
+        dvalid = xgb.DMatrix(_take(X, valid_rows), y[valid_rows], **options)
+        dstop = None if stop_rows is None else xgb.DMatrix(_take(X, stop_rows), y[stop_rows], **options)
+        with self._lock:
+            self.builds += 1
+            self.build_seconds += time.perf_counter() - start
+        return dtrain, dstop, dvalid
+
+    def get(self, key: tuple, train_rows, stop_rows, valid_rows, max_bin: int = 256):
+        """
+        Returns (dtrain, dstop, dvalid) for key, building them on first use.
+        Concurrent callers for the same key wait for a single build.
+        """
+        if not self.enabled:
+            return self._build(train_rows, stop_rows, valid_rows, max_bin)
+        key = (*key, max_bin)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = self._build(train_rows, stop_rows, valid_rows, max_bin)
+            else:
+                with self._lock:
+                    self.hits += 1
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._locks.clear()
+
+
+def _run_trial(matrices: FoldMatrixCache, key, train_rows, stop_rows, valid_rows, params, rounds,
+               early_stopping_rounds, random_state, nthread) -> dict:
+    estimator = _estimator(params, matrices.missing, random_state, nthread)
+    xgb_params = estimator.get_xgb_params()
+    dtrain, dstop, dvalid = matrices.get(key, train_rows, stop_rows, valid_rows,
+                                         max_bin=xgb_params.get('max_bin') or 256)
+    if early_stopping_rounds:
+        booster = xgb.train(xgb_params, dtrain, num_boost_round=rounds, evals=[(dstop, 'valid')],
+                            early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+        best_rounds = booster.best_iteration + 1
+    else:
+        booster = xgb.train(xgb_params, dtrain, num_boost_round=rounds)
+        best_rounds = rounds
+    scores = booster.predict(dvalid, iteration_range=(0, best_rounds))
+    return {'score': float(average_precision_score(matrices.y[valid_rows], scores)), 'rounds': int(best_rounds)}
+
+
+def _early_stopping_split(train: np.ndarray, y: np.ndarray, fraction: float, rng) -> Tuple[np.ndarray, np.ndarray]:
+    """Splits a training fold into (fit rows, early-stopping rows), stratified by class."""
+    labels = y[train]
+    stop = [rng.choice(train[labels == label], size=round(fraction * np.sum(labels == label)), replace=False)
+            for label in np.unique(labels)]
+    stop = np.sort(np.concatenate(stop))
+    return np.setdiff1d(train, stop, assume_unique=True), stop
+
+
+def n_rungs(n_candidates: int, factor: int) -> int:
+    """Rungs needed to halve n_candidates down to one."""
+    return 1 + max(0, math.ceil(math.log(n_candidates, factor) - 1e-9)) if n_candidates > 1 else 1
+
+
+def _run_search(X, y, param_grid, cv, random_state, factor, rungs, resource, min_fraction,
+                early_stopping_rounds, n_jobs, trial_dir, missing, cache_folds) -> SearchResult:
+    y = np.asarray(y)
+    if missing is None:
+        missing = 0.0 if sp.issparse(X) else np.nan
+    candidates = list(ParameterGrid(param_grid))
+    if rungs is None:
+        rungs = n_rungs(len(candidates), factor)
+    workers, nthread = thread_budget(n_jobs, max_concurrent=len(candidates) * cv)
+    logger.info(f"{len(candidates)} candidates, {rungs} rung(s), "
+                f"{workers} concurrent trials x {nthread} XGBoost threads")
+
+    rng = np.random.default_rng(random_state)
+    # (fit rows, early-stopping rows or None, validation rows) per fold
+    folds = [(*(_early_stopping_split(train, y, EARLY_STOPPING_FRACTION, rng) if early_stopping_rounds
+                else (train, None)), valid)
+             for train, valid in StratifiedKFold(n_splits=cv).split(np.zeros(len(y)), y)]
+    # Each fold's fit / early-stopping rows in one fixed random order; rung subsamples are nested prefixes
+    orders = [(fit[rng.permutation(len(fit))], None if stop is None else stop[rng.permutation(len(stop))])
+              for fit, stop, _ in folds]
+    store = TrialStore(trial_dir)
+    fingerprint = data_fingerprint(X, y)
+    common = {'data': fingerprint, 'cv': cv, 'random_state': random_state,
+              'early_stopping_rounds': early_stopping_rounds, 'missing': str(missing),
+              'early_stopping_fraction': EARLY_STOPPING_FRACTION if early_stopping_rounds else None}
+    matrices = FoldMatrixCache(X, y, missing, nthread=nthread, enabled=cache_folds)
+
+    rows: List[dict] = []
+    survivors = list(range(len(candidates)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for rung in range(rungs):
+            fraction = max(min_fraction, float(factor) ** (rung - rungs + 1)) if rung < rungs - 1 else 1.0
+            n_train = [len(fit) for fit, _, _ in folds]
+            n_stop = [0 if stop is None else len(stop) for _, stop, _ in folds]
+            if resource == 'n_samples':
+                n_train = [max(1, math.ceil(n * fraction)) for n in n_train]
+                n_stop = [min(n, max(1, math.ceil(n * fraction))) for n in n_stop]
+            jobs, results = {}, {}
+            for i in survivors:
+                params = candidates[i]
+                max_rounds = _estimator(params, missing, random_state, 1).get_num_boosting_rounds()
+                rounds = max(1, math.ceil(max_rounds * fraction)) if resource == 'n_estimators' else max_rounds
+                for k, (fit, stop, valid) in enumerate(folds):
+                    key = store.key(params=params, fold=k, rows=n_train[k], stop_rows=n_stop[k], rounds=rounds, **common)
+                    cached = store.get(key)
+                    if cached is not None:
+                        results[i, k] = cached
+                        continue
+                    train_rows = fit if n_train[k] == len(fit) else np.sort(orders[k][0][:n_train[k]])
+                    stop_rows = stop if stop is None or n_stop[k] == len(stop) else np.sort(orders[k][1][:n_stop[k]])
+                    jobs[i, k] = (key, executor.submit(
+                        _run_trial, matrices, (k, n_train[k], n_stop[k]), train_rows, stop_rows, valid,
+                        params, rounds, early_stopping_rounds, random_state, nthread))
+            try:
+                for (i, k), (key, future) in jobs.items():
+                    results[i, k] = future.result()
+                    store.put(key, results[i, k])
+            except BaseException:
+                # Completed trials are already recorded; don't start the rest
+                for _, future in jobs.values():
+                    future.cancel()
+                raise
+            # The next rung uses larger subsamples; nothing built for this one is reused
+            matrices.clear()
+
+            mean_scores = {}
+            budget = int(np.mean(n_train)) if resource == 'n_samples' else fraction
+            for i in survivors:
+                scores = np.array([results[i, k]['score'] for k in range(cv)])
+                mean_scores[i] = scores.mean()
+                rows.append({
+                    'iter': rung, 'n_resources': budget, 'candidate': i, 'params': candidates[i],
+                    **{f'split{k}_test_score': scores[k] for k in range(cv)},
+                    'mean_test_score': scores.mean(), 'std_test_score': scores.std(),
+                    'mean_best_rounds': float(np.mean([results[i, k]['rounds'] for k in range(cv)])),
+                })
+            logger.info(f"Rung {rung}: {len(survivors)} candidates at {resource} fraction {fraction:.3f} "
+                        f"({len(jobs)} trials run, {len(survivors) * cv - len(jobs)} cached)")
+            ranked = sorted(survivors, key=lambda i: -mean_scores[i])
+            survivors = ranked[:max(1, math.ceil(len(survivors) / factor))]
+    if cache_folds:
+        logger.info(f"Fold matrices: {matrices.builds} built in {matrices.build_seconds:.1f} s, "
+                    f"{matrices.hits} reused")
+
+    search = SearchResult(param_grid, cv)
+    search.fold_matrix_stats_ = {'builds': matrices.builds, 'hits': matrices.hits,
+                                 'build_seconds': matrices.build_seconds}
+    del matrices
+    search.cv_results_ = {key: np.array([row[key] for row in rows]) if key != 'params' else [row[key] for row in rows]
+                          for key in rows[0]}
+    # Candidates that reached later rungs rank ahead, as in sklearn's halving search
+    order = sorted(range(len(rows)), key=lambda r: (-rows[r]['iter'], -rows[r]['mean_test_score']))
+    ranks = np.empty(len(rows), dtype=np.int32)
+    ranks[order] = np.arange(1, len(rows) + 1)
+    search.cv_results_['rank_test_score'] = ranks
+    search.best_index_ = int(order[0])
+    best = rows[search.best_index_]
+    search.best_params_ = best['params']
+    search.best_score_ = float(best['mean_test_score'])
+
+    refit_params = {**best['params'], 'n_estimators': max(1, round(best['mean_best_rounds']))}
+    start = time.perf_counter()
+    search.best_estimator_ = _estimator(refit_params, missing, random_state, workers * nthread,
+                                        enable_categorical=_has_categories(X)).fit(X, y)
+    search.refit_seconds_ = time.perf_counter() - start
+    logger.info(f"Best XGBoost Params: {search.best_params_} "
+                f"(AUC-PR {search.best_score_:.4f}, refit with {refit_params['n_estimators']} rounds)")
+    return search
+
+
+@instrument()
+def successive_halving_search(
+    X,
+    y,
+    param_grid,
+    cv: int = 5,
+    random_state: int = 42,
+    factor: int = 3,
+    resource: str = 'n_samples',
+    min_fraction: float = 0.05,
+    early_stopping_rounds: int = 20,
+    n_jobs: Optional[int] = None,
+    trial_dir: Optional[Path] = None,
+    missing: Optional[float] = None,
+    cache_folds: bool = True
+) -> SearchResult:
+    """
+    Successive-halving search over an XGBClassifier parameter grid, scored by
+    AUC-PR on stratified folds like train_xgboost's GridSearchCV.
+
+    Args:
+        X: Training features (DataFrame, array or scipy sparse matrix).
+        y: Training labels.
+        param_grid (dict): XGBClassifier parameter grid. n_estimators is the
+            round cap each fit early-stops within.
+        cv (int): Number of stratified folds.
+        random_state (int): Seed for the models and the row subsamples.
+        factor (int): Candidates kept per rung = 1/factor; budget grows by factor.
+        resource (str): 'n_samples' grows the fraction of each training fold
+            used; 'n_estimators' grows the boosting-round cap on full folds.
+        min_fraction (float): Smallest budget fraction of the first rung.
+        early_stopping_rounds (int): Rounds without improvement on the early-stopping
+            slice of the training fold before a fit stops (0 or None to disable).
+        n_jobs (int, optional): Total cores; split between concurrent trials and XGBoost threads.
+        trial_dir (Path, optional): Where completed trials are recorded for resuming.
+        missing (float, optional): Missing-value marker; 0.0 for sparse X, NaN otherwise.
+        cache_folds (bool): Share each rung's fold matrices between candidates.
+
+    Returns:
+        SearchResult: best_estimator_ is refit on all of X with the mean
+        early-stopped round count of the best candidate's final-rung folds.
+    """
+    if resource not in ('n_samples', 'n_estimators'):
+        raise ValueError(f"Unknown resource: {resource}")
+    if factor < 2:
+        raise ValueError("factor must be at least 2")
+    logger.info(f"Successive halving with factor {factor} over {resource}")
+    return _run_search(X, y, param_grid, cv, random_state, factor, None, resource, min_fraction,
+                       early_stopping_rounds, n_jobs, trial_dir, missing, cache_folds)
+
+
+@instrument()
+def grid_search(
+    X,
+    y,
+    param_grid,
+    cv: int = 5,
+    random_state: int = 42,
+    n_jobs: Optional[int] = None,
+    trial_dir: Optional[Path] = None,
+    missing: Optional[float] = None,
+    cache_folds: bool = True
+) -> SearchResult:
+    """
+    Exhaustive search equivalent to GridSearchCV(scoring='average_precision',
+    cv=StratifiedKFold(cv)): every candidate is fit on every full fold for its
+    n_estimators rounds. The fold matrices are built once and shared by all
+    candidates, and trials are recorded in trial_dir like the halving search.
+
+    Returns:
+        SearchResult: best_estimator_ is refit on all of X.
+    """
+    return _run_search(X, y, param_grid, cv, random_state, 2, 1, 'n_samples', 1.0,
+                       None, n_jobs, trial_dir, missing, cache_folds)
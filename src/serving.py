@@ -0,0 +1,120 @@
+# src/serving.py
+"""
+Minimal HTTP front-end for a FraudScorer.
+
+Routes:
+    GET  /health  -> {"status": "ok"}
+    GET  /monitor -> drift report of the scored stream, when the scorer has a
+                     monitor (see FraudScorer.drift_report)
+    POST /score   -> body is one transaction object or a list of them;
+                     returns {"fraud_probability": p, "is_fraud": bool} per transaction,
+                     plus "reason_codes" when the scorer produces them
+
+create_app() returns a plain ASGI callable (run it with any ASGI server, e.g.
+uvicorn). serve() runs the same routes on the standard-library HTTP server for
+local use without extra dependencies.
+"""
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def handle_request(scorer, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+    """
+    Routes one request and returns (status code, JSON-serializable payload).
+    """
+    if path == '/health' and method == 'GET':
+        return 200, {'status': 'ok'}
+    if path == '/monitor' and method == 'GET':
+        if getattr(scorer, 'monitor', None) is None:
+            return 404, {'error': "Drift monitoring is not enabled"}
+        return 200, scorer.drift_report()
+    if path != '/score':
+        return 404, {'error': f"Unknown route: {path}"}
+    if method != 'POST':
+        return 405, {'error': "Use POST for /score"}
+
+    try:
+        payload = json.loads(body or b'null')
+        if isinstance(payload, dict):
+            return 200, scorer.decide(payload)
+        if isinstance(payload, list):
+            return 200, {'results': scorer.decide_batch(payload)}
+        return 400, {'error': "Body must be a transaction object or a list of them"}
+    except (ValueError, KeyError) as e:
+        return 400, {'error': str(e)}
+    except Exception as e:
+        logger.error(f"Error scoring request: {e}")
+        return 500, {'error': "Internal scoring error"}
+
+
+def create_app(scorer):
+    """Wraps a FraudScorer in an ASGI application."""
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+        status, payload = handle_request(scorer, scope['method'], scope['path'], body)
+        response = json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'),
+                        (b'content-length', str(len(response)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': response})
+
+    return app
+
+
+def serve(scorer, host: str = '127.0.0.1', port: int = 8000):
+    """Serves the scorer on the standard-library threading HTTP server (blocking)."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _respond(self, method):
+            length = int(self.headers.get('Content-Length', 0))
+            body = self.rfile.read(length) if length else b''
+            status, payload = handle_request(scorer, method, self.path, body)
+            response = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
+
+        def do_GET(self):
+            self._respond('GET')
+
+        def do_POST(self):
+            self._respond('POST')
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    logger.info(f"🚀 Scoring service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,218 @@
+# src/shap_cache.py
+"""
+Batch TreeSHAP explanations with an on-disk cache.
+
+SHAP values come from XGBoost's own TreeSHAP (Booster.predict with
+pred_contribs=True), computed in chunks, optionally across worker processes
+that each load the model once. Results are appended to a float32 matrix on
+disk, one row per explained transaction, and read back through a memory map.
+
+The cache lives in a directory per model: its key hashes the serialized
+booster and its missing value, so a retrained model never reads another
+model's values. Within it, rows are keyed by row id (the DataFrame index by
+default), so a repeat request for the same rows reads them without touching
+the model. Row ids must identify the same feature row on every call.
+"""
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+_VALUES = 'values.f32'
+_ROW_IDS = 'row_ids.npy'
+_META = 'meta.json'
+
+_worker_booster: Optional[xgb.Booster] = None
+
+
+def _booster(model) -> xgb.Booster:
+    return model.get_booster() if hasattr(model, 'get_booster') else model
+
+
+def model_key(model, missing: float = np.nan) -> str:
+    """Hash of a fitted XGBoost model (sklearn wrapper or Booster) and its missing value."""
+    digest = hashlib.sha256(bytes(_booster(model).save_raw('json')))
+    digest.update(repr(float(missing)).encode())
+    return digest.hexdigest()
+
+
+def _contribs(booster: xgb.Booster, X, missing: float) -> np.ndarray:
+    """SHAP values (without the bias column) of a chunk of rows."""
+    if isinstance(X, pd.DataFrame):
+        X = X.to_numpy(dtype=np.float32)
+    dmatrix = xgb.DMatrix(X, missing=missing)
+    values = booster.predict(dmatrix, pred_contribs=True, validate_features=False)
+    return np.ascontiguousarray(values[:, :-1], dtype=np.float32)
+
+
+def _init_worker(raw: bytes):
+    global _worker_booster
+    _worker_booster = xgb.Booster(model_file=bytearray(raw))
+    _worker_booster.set_param({'nthread': 1})
+
+
+def _worker_contribs(X, missing: float) -> np.ndarray:
+    return _contribs(_worker_booster, X, missing)
+
+
+class ShapCache:
+    """
+    Args:
+        root (Path): Cache root; values are stored under root/<model key>.
+        model: Fitted XGBClassifier or xgb.Booster.
+        missing (float): Missing value the model was trained with
+            (the wrapper's own setting by default).
+    """
+
+    def __init__(self, root: Path, model, missing: Optional[float] = None):
+        if missing is None:
+            missing = getattr(model, 'missing', np.nan)
+        self.model = model
+        self.missing = float(missing)
+        self.key = model_key(model, self.missing)
+        self.directory = Path(root) / self.key[:16]
+        self.hits = 0
+        self.computed = 0
+
+        booster = _booster(model)
+        self.n_features = booster.num_features()
+        self.feature_names = booster.feature_names
+        meta_path = self.directory / _META
+        if meta_path.exists():
+            with open(meta_path) as f:
+                self.expected_value = json.load(f)['expected_value']
+        else:
+            # The bias column is the same for every row: the model's expected margin
+            probe = np.full((1, self.n_features), np.nan, dtype=np.float32)
+            bias = booster.predict(xgb.DMatrix(probe), pred_contribs=True, validate_features=False)
+            self.expected_value = float(bias[0, -1])
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(meta_path, 'w') as f:
+                json.dump({'n_features': self.n_features, 'feature_names': self.feature_names,
+                           'missing': self.missing, 'expected_value': self.expected_value}, f)
+        self._load()
+
+    def _load(self):
+        """Reads the row ids and maps the values (dropping any rows a crash left without ids)."""
+        ids_path = self.directory / _ROW_IDS
+        self.row_ids = np.load(ids_path) if ids_path.exists() else np.empty(0, dtype=np.int64)
+        values_path = self.directory / _VALUES
+        row_bytes = self.n_features * 4
+        if values_path.exists() and values_path.stat().st_size != len(self.row_ids) * row_bytes:
+            os.truncate(values_path, len(self.row_ids) * row_bytes)
+        if len(self.row_ids):
+            self._values = np.memmap(values_path, dtype=np.float32, mode='r',
+                                     shape=(len(self.row_ids), self.n_features))
+        else:
+            self._values = np.empty((0, self.n_features), dtype=np.float32)
+        self._order = np.argsort(self.row_ids, kind='stable')
+        self._sorted = self.row_ids[self._order]
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def slots(self, row_ids: np.ndarray) -> np.ndarray:
+        """Position of each row id in the value matrix, or -1 if it isn't cached."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        if not len(self._sorted):
+            return np.full(len(row_ids), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted, row_ids), len(self._sorted) - 1)
+        return np.where(self._sorted[pos] == row_ids, self._order[pos], -1)
+
+    def get(self, row_ids: Sequence[int]) -> np.ndarray:
+        """
+        Cached SHAP values of the given row ids, in the same order.
+
+        Raises:
+            KeyError: If any row id hasn't been explained yet.
+        """
+        slots = self.slots(row_ids)
+        if (slots < 0).any():
+            raise KeyError(f"{int((slots < 0).sum())} row ids are not in the SHAP cache")
+        return np.asarray(self._values[slots])
+
+    def put(self, row_ids: np.ndarray, values: np.ndarray):
+        """Appends the values of new row ids; the ids are written last, so a crash loses nothing cached before."""
+        row_ids = np.asarray(row_ids, dtype=np.int64)
+        with open(self.directory / _VALUES, 'ab') as f:
+            f.write(np.ascontiguousarray(values, dtype=np.float32).tobytes())
+        tmp = self.directory / f'{_ROW_IDS}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            np.save(f, np.concatenate([self.row_ids, row_ids]))
+        os.replace(tmp, self.directory / _ROW_IDS)
+        self._load()
+
+    def explain(
+        self,
+        X: Union[pd.DataFrame, np.ndarray, sp.spmatrix],
+        rows: Optional[Sequence[int]] = None,
+        row_ids: Optional[Sequence[int]] = None,
+        chunk_size: int = 1024,
+        n_jobs: int = 1
+    ) -> np.ndarray:
+        """
+        SHAP values of the given rows of X, computing only the ones not cached yet.
+
+        Args:
+            X: Preprocessed feature matrix the model was trained on.
+            rows (Sequence[int]): Row positions in X to explain (all rows by default),
+                e.g. the FP / FN indices from get_prediction_indices.
+            row_ids (Sequence[int]): Cache keys of those rows; defaults to X's
+                index for a DataFrame, and to the row positions otherwise.
+            chunk_size (int): Rows per TreeSHAP call.
+            n_jobs (int): Worker processes for chunks that need computing.
+
+        Returns:
+            np.ndarray: (len(rows), n_features) float32 SHAP values in log-odds.
+
+        Raises:
+            ValueError: If X has the wrong number of columns or rows and row_ids differ in length.
+        """
+        try:
+            if X.shape[1] != self.n_features:
+                raise ValueError(f"X has {X.shape[1]} features, the model expects {self.n_features}")
+            rows = np.arange(X.shape[0]) if rows is None else np.asarray(rows, dtype=np.int64)
+            if row_ids is None:
+                row_ids = X.index.to_numpy()[rows] if isinstance(X, pd.DataFrame) else rows
+            row_ids = np.asarray(row_ids, dtype=np.int64)
+            if len(row_ids) != len(rows):
+                raise ValueError(f"Got {len(row_ids)} row ids for {len(rows)} rows")
+
+            # Each missing row id once, in first-seen order
+            _, first = np.unique(row_ids, return_index=True)
+            first = np.sort(first)
+            todo = first[self.slots(row_ids[first]) < 0]
+            self.hits += len(rows) - len(todo)
+            if len(todo):
+                self._compute(X, rows[todo], row_ids[todo], chunk_size, n_jobs)
+            return self.get(row_ids)
+
+        except Exception as e:
+            logger.error(f"Error in ShapCache.explain: {str(e)}")
+            raise
+
+    def _compute(self, X, rows: np.ndarray, row_ids: np.ndarray, chunk_size: int, n_jobs: int):
+        take = (lambda r: X.iloc[r]) if isinstance(X, pd.DataFrame) else (lambda r: X[r])
+        chunks = [rows[s:s + chunk_size] for s in range(0, len(rows), chunk_size)]
+        if n_jobs > 1 and len(chunks) > 1:
+            raw = bytes(_booster(self.model).save_raw('ubj'))
+            with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)),
+                                     initializer=_init_worker, initargs=(raw,)) as pool:
+                futures = [pool.submit(_worker_contribs, take(c), self.missing) for c in chunks]
+                values = [future.result() for future in futures]
+        else:
+            booster = _booster(self.model)
+            values = [_contribs(booster, take(c), self.missing) for c in chunks]
+        self.put(row_ids, np.vstack(values))
+        self.computed += len(rows)
+        logger.info(f"✅ Explained {len(rows):,} rows in {len(chunks)} chunks ({len(self):,} cached)")
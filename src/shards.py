@@ -0,0 +1,201 @@
+# src/shards.py
+"""
+On-disk training shards for out-of-core XGBoost.
+
+A shard directory holds the preprocessed (and resampled) training set split
+into row blocks, plus a manifest.json. Each block is a feature matrix
+(part-NNNNN.X.npy dense / .X.npz CSR) and its labels (part-NNNNN.y.npy).
+ShardIterator feeds the blocks one at a time to XGBoost's DataIter interface,
+so building a QuantileDMatrix (or a paged external-memory DMatrix) never
+needs more than one block of raw features in memory.
+"""
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import xgboost as xgb
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+DEFAULT_ROWS_PER_SHARD = 250_000
+
+
+class ShardWriter:
+    """
+    Appends (X, y) blocks to a shard directory. Blocks may be DataFrames,
+    NumPy arrays or scipy sparse matrices, but all must share one layout
+    (dense or sparse) and column count. Features are stored as float32.
+
+    Args:
+        directory (Path): Shard directory; emptied if it already exists.
+        rows_per_shard (int): Rows per shard file; larger appends are split.
+        feature_names (sequence, optional): Column names recorded in the manifest.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        rows_per_shard: int = DEFAULT_ROWS_PER_SHARD,
+        feature_names: Optional[Sequence[str]] = None
+    ):
+        if rows_per_shard < 1:
+            raise ValueError("rows_per_shard must be at least 1")
+        self.directory = Path(directory)
+        if self.directory.exists():
+            shutil.rmtree(self.directory)
+        self.directory.mkdir(parents=True)
+        self.rows_per_shard = rows_per_shard
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.sparse: Optional[bool] = None
+        self.n_features: Optional[int] = None
+        self._shards: List[dict] = []
+
+    @property
+    def rows_written(self) -> int:
+        return sum(s['rows'] for s in self._shards)
+
+    def append(self, X, y):
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is None:
+                self.feature_names = [str(c) for c in X.columns]
+            X = X.to_numpy(dtype=np.float32)
+        sparse = sp.issparse(X)
+        X = sp.csr_matrix(X, dtype=np.float32) if sparse else np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+        if X.shape[0] != len(y):
+            raise ValueError(f"X has {X.shape[0]:,} rows but y has {len(y):,}")
+        if self.sparse is None:
+            self.sparse, self.n_features = sparse, X.shape[1]
+        elif (sparse, X.shape[1]) != (self.sparse, self.n_features):
+            raise ValueError("All shards must share one layout (dense/sparse) and column count")
+
+        for start in range(0, X.shape[0], self.rows_per_shard):
+            self._write_shard(X[start:start + self.rows_per_shard], y[start:start + self.rows_per_shard])
+
+    def _write_shard(self, X, y):
+        name = f'part-{len(self._shards):05d}'
+        if self.sparse:
+            sp.save_npz(self.directory / f'{name}.X.npz', X, compressed=False)
+        else:
+            np.save(self.directory / f'{name}.X.npy', X)
+        np.save(self.directory / f'{name}.y.npy', y)
+        self._shards.append({'name': name, 'rows': int(X.shape[0])})
+
+    def close(self):
+        manifest = {
+            'sparse': bool(self.sparse),
+            'n_features': self.n_features or 0,
+            'n_rows': self.rows_written,
+            'feature_names': self.feature_names,
+            'shards': self._shards,
+        }
+        with open(self.directory / MANIFEST, 'w') as f:
+            json.dump(manifest, f)
+        logger.info(f"✅ Wrote {self.rows_written:,} training rows to {len(self._shards)} shards in {self.directory}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+
+def write_shards(X, y, directory: Path, rows_per_shard: int = DEFAULT_ROWS_PER_SHARD) -> Path:
+    """
+    Writes a training set (DataFrame, array or sparse matrix) to a shard directory.
+
+    Returns:
+        Path: The shard directory.
+    """
+    with ShardWriter(directory, rows_per_shard) as writer:
+        writer.append(X, y)
+    return writer.directory
+
+
+def read_manifest(directory: Path) -> dict:
+    path = Path(directory) / MANIFEST
+    if not path.exists():
+        raise FileNotFoundError(f"No shard manifest in {directory}")
+    with open(path) as f:
+        return json.load(f)
+
+
+def fold_ids(y: np.ndarray, counts: dict, n_folds: int) -> np.ndarray:
+    """
+    Stratified fold of each row: rows of each class are dealt round-robin in
+    file order. counts carries the per-class running totals between shards, so
+    consecutive calls over all shards give every fold the same class balance.
+    """
+    folds = np.empty(len(y), dtype=np.int32)
+    for label in np.unique(y):
+        rows = np.flatnonzero(y == label)
+        start = counts.get(label, 0)
+        folds[rows] = (start + np.arange(len(rows))) % n_folds
+        counts[label] = start + len(rows)
+    return folds
+
+
+def iter_shards(directory: Path, n_folds: int = 0) -> Iterator[Tuple[object, np.ndarray, Optional[np.ndarray]]]:
+    """
+    Yields (X, y, folds) per shard; dense X is memory-mapped. folds is None
+    unless n_folds > 1.
+    """
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    counts: dict = {}
+    for shard in manifest['shards']:
+        name = shard['name']
+        if manifest['sparse']:
+            X = sp.load_npz(directory / f'{name}.X.npz').tocsr()
+        else:
+            X = np.load(directory / f'{name}.X.npy', mmap_mode='r')
+        y = np.load(directory / f'{name}.y.npy')
+        yield X, y, (fold_ids(y, counts, n_folds) if n_folds > 1 else None)
+
+
+class ShardIterator(xgb.DataIter):
+    """
+    XGBoost DataIter over a shard directory, optionally restricted to the rows
+    of some cross-validation folds.
+
+    Args:
+        directory (Path): Shard directory written by ShardWriter.
+        n_folds (int): Number of stratified folds rows are assigned to (0 = no folds).
+        exclude_fold (int, optional): Skip the rows of this fold (training split).
+        cache_prefix (str, optional): Where XGBoost pages an external-memory DMatrix.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        n_folds: int = 0,
+        exclude_fold: Optional[int] = None,
+        cache_prefix: Optional[str] = None
+    ):
+        self.directory = Path(directory)
+        self.n_folds = n_folds
+        self.exclude_fold = exclude_fold
+        self._shards: Optional[Iterator] = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data: Callable) -> int:
+        if self._shards is None:
+            self._shards = iter_shards(self.directory, self.n_folds)
+        for X, y, folds in self._shards:
+            if folds is not None and self.exclude_fold is not None:
+                keep = folds != self.exclude_fold
+                X, y = X[keep], y[keep]
+            if len(y):
+                input_data(data=X, label=y)
+                return 1
+        return 0
+
+    def reset(self):
+        self._shards = None
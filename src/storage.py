@@ -0,0 +1,337 @@
+# src/storage.py
+"""
+Storage layer for the preprocessing pipeline.
+
+Tables are read and written by file suffix (.csv, .parquet, .feather), with an
+optional declared schema so every format yields the same pandas dtypes:
+int32 for bounded integers, categorical for low-cardinality strings and
+datetime64 for timestamps. Values that would lose precision in 32 bits (IP
+addresses, monetary totals, derived ratios, the creditcard PCA components)
+stay 64-bit. CREDITCARD_COMPACT_SCHEMA is an opt-in float32 variant of the
+creditcard schema for columnar modeling inputs; it rounds to about 7
+significant digits, so it is applied only when writing, never before dedup.
+"""
+import logging
+import operator
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.profiling import instrument
+
+logger = logging.getLogger(__name__)
+
+# --- Declared schemas ---
+FRAUD_RAW_SCHEMA: Dict[str, str] = {
+    'user_id': 'int32',
+    'signup_time': 'datetime64[ns]',
+    'purchase_time': 'datetime64[ns]',
+    'purchase_value': 'int32',
+    'device_id': 'object',
+    'source': 'category',
+    'browser': 'category',
+    'sex': 'category',
+    'age': 'int32',
+    'ip_address': 'float64',
+    'class': 'int32',
+}
+
+IP_COUNTRY_SCHEMA: Dict[str, str] = {
+    'lower_bound_ip_address': 'float64',
+    'upper_bound_ip_address': 'int64',
+    'country': 'category',
+}
+
+FRAUD_ENGINEERED_SCHEMA: Dict[str, str] = {
+    'purchase_value': 'int32',
+    'source': 'category',
+    'browser': 'category',
+    'sex': 'category',
+    'age': 'int32',
+    'class': 'int32',
+    'country': 'category',
+    'hour_of_day': 'int32',
+    'day_of_week': 'int32',
+    'time_since_signup': 'float64',
+    'user_txn_count': 'int32',
+    'user_total_spent': 'int64',
+    'user_avg_purchase': 'float64',
+    # Optional window velocity features (src.velocity)
+    **{f"{prefix}_txn_{window}": 'int32'
+       for prefix in ('user', 'device', 'ip') for window in ('1h', '24h', '7d')},
+    **{f"{prefix}_hours_since_prev": 'float64' for prefix in ('user', 'device', 'ip')},
+}
+
+CREDITCARD_SCHEMA: Dict[str, str] = {
+    'Time': 'float64',
+    **{f"V{i}": 'float64' for i in range(1, 29)},
+    'Amount': 'float64',
+    'Class': 'int32',
+}
+
+# Lossy: Time and V1..V28 rounded to float32, for Parquet/Feather modeling inputs
+CREDITCARD_COMPACT_SCHEMA: Dict[str, str] = {
+    **CREDITCARD_SCHEMA,
+    'Time': 'float32',
+    **{f"V{i}": 'float32' for i in range(1, 29)},
+}
+
+Filter = Tuple[str, str, object]
+
+_OPERATORS = {
+    '==': operator.eq, '=': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+}
+
+
+def apply_schema(df: pd.DataFrame, schema: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """
+    Returns df with the columns named in schema cast to their declared dtypes.
+    Columns not in the schema are left untouched, and integer columns that
+    still hold missing values stay float so the cleaning step can drop them.
+    """
+    if not schema:
+        return df
+    casts, dates = {}, {}
+    for col, dtype in schema.items():
+        if col not in df.columns or str(df[col].dtype) == dtype:
+            continue
+        if dtype.startswith('datetime64'):
+            dates[col] = pd.to_datetime(df[col], errors='coerce')
+        elif pd.api.types.is_integer_dtype(dtype) and df[col].isnull().any():
+            continue
+        else:
+            casts[col] = dtype
+    if casts:
+        df = df.astype(casts)
+    if dates:
+        df = df.assign(**dates)
+    return df
+
+
+def _filter_frame(df: pd.DataFrame, filters: Optional[Sequence[Filter]]) -> pd.DataFrame:
+    """Applies (column, op, value) filters in memory, for formats without pushdown."""
+    if not filters:
+        return df
+    mask = np.ones(len(df), dtype=bool)
+    for col, op, value in filters:
+        if op == 'in':
+            mask &= df[col].isin(value).to_numpy()
+        elif op == 'not in':
+            mask &= ~df[col].isin(value).to_numpy()
+        elif op in _OPERATORS:
+            mask &= _OPERATORS[op](df[col], value).to_numpy()
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return df[mask].reset_index(drop=True)
+
+
+# --- Format backends ---
+def _read_csv(path: Path, columns, filters, schema) -> pd.DataFrame:
+    usecols = None
+    if columns is not None:
+        usecols = list(dict.fromkeys(list(columns) + [f[0] for f in filters or []]))
+
+    # Integer columns are cast after parsing so missing values don't break the read
+    dtypes, parse_dates = {}, []
+    for col, dtype in (schema or {}).items():
+        if usecols is not None and col not in usecols:
+            continue
+        if dtype.startswith('datetime64'):
+            parse_dates.append(col)
+        elif not pd.api.types.is_integer_dtype(dtype):
+            dtypes[col] = dtype
+    df = pd.read_csv(path, usecols=usecols, dtype=dtypes or None, parse_dates=parse_dates or False)
+    df = _filter_frame(df, filters)
+    return df[list(columns)] if columns else df
+
+
+def _read_arrow(path: Path, columns, filters, schema, file_format: str) -> pd.DataFrame:
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    dataset = ds.dataset(str(path), format=file_format)
+    expression = pq.filters_to_expression(filters) if filters else None
+    table = dataset.to_table(columns=list(columns) if columns else None, filter=expression)
+    return table.to_pandas()
+
+
+def _write_csv(df: pd.DataFrame, path: Path):
+    df.to_csv(path, index=False)
+
+
+def _write_parquet(df: pd.DataFrame, path: Path):
+    df.to_parquet(path, index=False, engine='pyarrow', compression='snappy')
+
+
+def _write_feather(df: pd.DataFrame, path: Path):
+    df.reset_index(drop=True).to_feather(path, compression='lz4')
+
+
+_READERS: Dict[str, Callable] = {
+    '.csv': _read_csv,
+    '.parquet': lambda path, columns, filters, schema: _read_arrow(path, columns, filters, schema, 'parquet'),
+    '.feather': lambda path, columns, filters, schema: _read_arrow(path, columns, filters, schema, 'feather'),
+}
+
+_WRITERS: Dict[str, Callable] = {
+    '.csv': _write_csv,
+    '.parquet': _write_parquet,
+    '.feather': _write_feather,
+}
+
+FORMAT_SUFFIXES = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+
+def register_format(suffix: str, reader: Callable, writer: Callable):
+    """
+    Plugs in a new storage backend.
+
+    Args:
+        suffix (str): File suffix handled by the backend, e.g. '.orc'.
+        reader (Callable): reader(path, columns, filters, schema) -> pd.DataFrame
+        writer (Callable): writer(df, path) -> None
+    """
+    _READERS[suffix] = reader
+    _WRITERS[suffix] = writer
+
+
+def _suffix(path: Path, table: Dict[str, Callable]) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix not in table:
+        raise ValueError(f"Unsupported file format '{suffix}' for {path}. Supported: {sorted(table)}")
+    return suffix
+
+
+@instrument()
+def read_table(
+    path: Path,
+    schema: Optional[Dict[str, str]] = None,
+    columns: Optional[List[str]] = None,
+    filters: Optional[Sequence[Filter]] = None
+) -> pd.DataFrame:
+    """
+    Loads a table, picking the backend from the file suffix.
+
+    Args:
+        path (Path): File to read (.csv, .parquet or .feather).
+        schema (dict, optional): Column -> dtype mapping applied after loading.
+        columns (list, optional): Only load these columns (projection).
+        filters (list, optional): Row filters as (column, op, value) tuples, e.g.
+            [('class', '==', 1), ('country', 'in', ['Japan'])]. Pushed down to the
+            reader for Parquet/Feather; applied after parsing for CSV.
+
+    Returns:
+        pd.DataFrame: The loaded table with schema dtypes applied.
+
+    Raises:
+        FileNotFoundError: If path does not exist.
+        ValueError: If the format or a filter operator is not supported.
+    """
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(f"File not found: {path}")
+    reader = _READERS[_suffix(path, _READERS)]
+    df = reader(path, columns, filters, schema)
+    return apply_schema(df, schema)
+
+
+@instrument()
+def write_table(df: pd.DataFrame, path: Path, schema: Optional[Dict[str, str]] = None):
+    """
+    Writes a table, picking the backend from the file suffix.
+
+    Args:
+        df (pd.DataFrame): Table to write.
+        path (Path): Destination (.csv, .parquet or .feather).
+        schema (dict, optional): Column -> dtype mapping applied before writing.
+    """
+    path = Path(path)
+    writer = _WRITERS[_suffix(path, _WRITERS)]
+    writer(apply_schema(df, schema), path)
+    logger.info(f"Wrote {len(df):,} rows to {path}")
+
+
+def iter_table_chunks(
+    path: Path,
+    chunksize: int,
+    schema: Optional[Dict[str, str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields a table in chunks of at most chunksize rows, with schema dtypes applied.
+    """
+    path = Path(path)
+    suffix = _suffix(path, _READERS)
+    if suffix == '.csv':
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield apply_schema(chunk, schema)
+    elif suffix in ('.parquet', '.feather'):
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(str(path), format=suffix.lstrip('.'))
+        for batch in dataset.to_batches(batch_size=chunksize):
+            if batch.num_rows:
+                yield apply_schema(batch.to_pandas(), schema)
+    else:
+        raise ValueError(f"Chunked reading is not supported for '{suffix}' files")
+
+
+class TableAppender:
+    """
+    Appends DataFrame chunks to a CSV or Parquet file.
+
+    Parquet categorical columns are written with 32-bit dictionary indices so
+    chunks with different category sets share one file schema. The file is
+    replaced on the first write; if nothing was written by close(), an empty
+    file with the schema's columns replaces it instead, so a stale file from
+    an earlier run is never left behind.
+    """
+
+    def __init__(self, path: Path, schema: Optional[Dict[str, str]] = None):
+        self.path = Path(path)
+        self.schema = schema
+        self.rows_written = 0
+        self._suffix = _suffix(self.path, _WRITERS)
+        if self._suffix not in ('.csv', '.parquet'):
+            raise ValueError(f"Appending is only supported for .csv and .parquet, not '{self._suffix}'")
+        self._writer = None
+        self._arrow_schema = None
+        self._started = False
+
+    def write(self, df: pd.DataFrame):
+        df = apply_schema(df, self.schema)
+        if self._suffix == '.csv':
+            first = not self._started
+            df.to_csv(self.path, mode='w' if first else 'a', header=first, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                fields = [
+                    pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type))
+                    if pa.types.is_dictionary(f.type) else f
+                    for f in table.schema
+                ]
+                self._arrow_schema = pa.schema(fields, metadata=table.schema.metadata)
+                self._writer = pq.ParquetWriter(str(self.path), self._arrow_schema, compression='snappy')
+            table = pa.Table.from_pandas(df, schema=self._arrow_schema, preserve_index=False)
+            self._writer.write_table(table)
+        self._started = True
+        self.rows_written += len(df)
+
+    def close(self):
+        if not self._started:
+            self.write(apply_schema(pd.DataFrame(columns=list(self.schema or {})), self.schema))
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,100 @@
+# src/streaming.py
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from src.data_cleaning import RowHashDeduplicator
+from src.data_processing import map_ips_to_countries
+from src.data_preprocessing import engineer_features
+from src.feature_store import VelocityFeatureStore
+from src.ip_index import IpCountryIndex
+from src.profiling import instrument
+from src.storage import FRAUD_ENGINEERED_SCHEMA, TableAppender, iter_table_chunks
+
+logger = logging.getLogger(__name__)
+
+
+@instrument()
+def stream_fraud_data(
+    fraud_path: Path,
+    ip_df: Union[pd.DataFrame, IpCountryIndex],
+    output_path: Path,
+    chunksize: int = 500_000,
+    schema: Optional[Dict[str, str]] = None,
+    monitor=None
+) -> int:
+    """
+    Cleans, geo-maps and feature-engineers Fraud_Data in chunks, appending each
+    processed chunk to output_path so the full file never has to be in memory.
+
+    Two passes are made over the raw file. The first drops duplicates (via row
+    hashes) and rows with missing values, and accumulates per-user totals in a
+    VelocityFeatureStore. The
+    second maps IPs, engineers features with the global user totals and writes
+    the output. Only the hash set, the per-user totals and a 1-bit keep mask per
+    row are held between chunks.
+
+    Args:
+        fraud_path (Path): Raw Fraud_Data file (.csv, .parquet or .feather).
+        ip_df (pd.DataFrame | IpCountryIndex): The IP range to country lookup table,
+            compiled once into an index and reused for every chunk.
+        output_path (Path): .csv or .parquet file to write; overwritten if it exists.
+        chunksize (int): Number of raw rows read per chunk.
+        schema (dict, optional): Declared dtypes for the raw columns, applied per chunk
+            so every chunk hashes and aggregates consistently.
+        monitor (DriftMonitor, optional): Updated with every engineered chunk
+            (see src.monitoring), so drift and data quality are profiled in the same pass.
+
+    Returns:
+        int: Number of rows written.
+
+    Raises:
+        ValueError: If chunksize is not positive.
+    """
+    try:
+        if chunksize <= 0:
+            raise ValueError(f"chunksize must be positive, got {chunksize}")
+
+        ip_index = ip_df if isinstance(ip_df, IpCountryIndex) else IpCountryIndex.from_frame(ip_df)
+
+        # Pass 1: deduplicate, drop missing values and accumulate user totals
+        deduplicator = RowHashDeduplicator()
+        feature_store = VelocityFeatureStore(entities=('user_id',))
+        keep_masks = []
+        initial_rows = 0
+        for chunk in iter_table_chunks(fraud_path, chunksize, schema=schema):
+            keep = deduplicator.mask_new(chunk) & chunk.notna().all(axis=1).to_numpy()
+            keep_masks.append(np.packbits(keep))
+            feature_store.update(chunk[keep])
+            initial_rows += len(chunk)
+
+        kept_rows = sum(int(np.unpackbits(mask).sum()) for mask in keep_masks)
+        logger.info(f"Initial Row Count: {initial_rows:,}")
+        logger.info(f"Rows After Cleaning: {kept_rows:,} ({len(keep_masks)} chunks)")
+        user_totals = feature_store.totals('user_id')
+
+        # Pass 2: map IPs, engineer features and append to the output file
+        reader = iter_table_chunks(fraud_path, chunksize, schema=schema)
+        with TableAppender(output_path, schema=FRAUD_ENGINEERED_SCHEMA) as appender:
+            for chunk, packed in zip(reader, keep_masks):
+                keep = np.unpackbits(packed, count=len(chunk)).astype(bool)
+                chunk = chunk[keep].reset_index(drop=True)
+                if chunk.empty:
+                    continue
+
+                chunk = map_ips_to_countries(chunk, ip_index)
+                chunk = engineer_features(chunk, user_aggregates=user_totals)
+                if monitor is not None:
+                    monitor.update(chunk)
+                appender.write(chunk)
+            rows_written = appender.rows_written
+
+        logger.info(f"✅ Streamed {rows_written:,} rows to {output_path}")
+        return rows_written
+
+    except Exception as e:
+        logger.error(f"Error in stream_fraud_data: {str(e)}")
+        raise
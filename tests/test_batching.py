@@ -0,0 +1,56 @@
+# tests/test_batching.py
+import asyncio
+import time
+import numpy as np
+import pytest
+from src.batching import MicroBatcher
+
+def fake_score_batch(records):
+    if any('amount' not in r for r in records):
+        raise ValueError("Missing feature: amount")
+    return np.array([r['amount'] / 100 for r in records])
+
+def test_results_fan_out_to_callers():
+    async def run():
+        async with MicroBatcher(fake_score_batch, max_batch_size=8, max_wait_us=2_000) as batcher:
+            scores = await asyncio.gather(*(batcher.score({'amount': i}) for i in range(20)))
+            return scores, batcher.batches_scored
+    scores, batches = asyncio.run(run())
+    assert scores == pytest.approx([i / 100 for i in range(20)])
+    assert batches < 20
+
+def test_bad_record_only_fails_its_caller():
+    async def run():
+        async with MicroBatcher(fake_score_batch, max_batch_size=4, max_wait_us=2_000) as batcher:
+            return await asyncio.gather(
+                batcher.score({'amount': 10}), batcher.score({}), batcher.score({'amount': 30}),
+                return_exceptions=True
+            )
+    good, bad, other = asyncio.run(run())
+    assert good == pytest.approx(0.1) and other == pytest.approx(0.3)
+    assert isinstance(bad, ValueError)
+
+def test_score_requires_start():
+    with pytest.raises(RuntimeError):
+        asyncio.run(MicroBatcher(fake_score_batch).score({'amount': 1}))
+
+def test_invalid_batch_size():
+    with pytest.raises(ValueError):
+        MicroBatcher(fake_score_batch, max_batch_size=0)
+
+def test_stop_scores_batches_held_behind_busy_slots():
+    def slow_score_batch(records):
+        time.sleep(0.2)
+        return fake_score_batch(records)
+
+    async def run():
+        batcher = MicroBatcher(slow_score_batch, max_batch_size=2, max_wait_us=0, max_in_flight=1)
+        await batcher.start()
+        calls = [asyncio.ensure_future(batcher.score({'amount': i})) for i in range(6)]
+        await asyncio.sleep(0.05)
+        await asyncio.wait_for(batcher.stop(), 5)
+        with pytest.raises(RuntimeError):
+            await batcher.score({'amount': 1})
+        return await asyncio.wait_for(asyncio.gather(*calls), 1), batcher.rows_scored
+    scores, rows = asyncio.run(run())
+    assert scores == pytest.approx([i / 100 for i in range(6)]) and rows == 6
@@ -0,0 +1,74 @@
+# tests/test_bundle.py
+import json
+import subprocess
+import sys
+from pathlib import Path
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+from src.bundle import NativeBooster, bundle_versions, load_bundle
+from src.model_preprocessing import prepare_data_for_modeling
+from src.scoring import load_scorer, save_bundle
+
+ROOT = Path(__file__).resolve().parent.parent
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        'purchase_value': rng.integers(9, 155, 400),
+        'age': rng.integers(18, 70, 400),
+        'source': rng.choice(['SEO', 'Ads', 'Direct'], 400),
+        'country': rng.choice(['Japan', 'Kenya', 'Unknown'], 400)
+    })
+    y = pd.Series((X['purchase_value'] > 120).astype(int))
+    X_train, y_train, X_test, _, prep = prepare_data_for_modeling(X, y, imbalance_technique="none")
+    model = XGBClassifier(n_estimators=20, max_depth=3).fit(X_train, y_train)
+    return X.loc[X_test.index], X_test, X_train, y_train, prep, model
+
+def test_versions_round_trip_with_native_booster(tmp_path, fitted):
+    X_raw, X_test, X_train, y_train, prep, model = fitted
+    first = save_bundle(tmp_path, prep, model, threshold=0.3)
+    second = save_bundle(tmp_path, prep, LogisticRegression().fit(X_train, y_train))
+    assert [p.name for p in bundle_versions(tmp_path)] == ['v0001', 'v0002']
+
+    scorer = load_scorer(tmp_path, version='v0001')
+    assert isinstance(scorer.model, NativeBooster) and scorer.threshold == 0.3
+    assert scorer.manifest['schema_hash'] == load_bundle(second)['manifest']['schema_hash']
+    scores = scorer.score_batch(X_raw.to_dict('records'))
+    np.testing.assert_array_equal(scores.astype(np.float32), model.predict_proba(X_test)[:, 1])
+    assert load_scorer(tmp_path).manifest['model_kind'] == 'linear'  # latest version
+
+    # Reason codes reach for the real xgboost Booster behind the native one
+    assert len(load_scorer(first, reason_codes=2).decide(X_raw.iloc[0].to_dict())['reason_codes']) == 2
+
+def test_tampered_schema_and_legacy_joblib(tmp_path, fitted):
+    X_raw, X_test, _, _, prep, model = fitted
+    version = save_bundle(tmp_path / 'bundle', prep, model)
+    spec = json.loads((version / 'preprocessor.json').read_text())
+    spec['category_maps'][0][0][0] = 'Billboard'
+    (version / 'preprocessor.json').write_text(json.dumps(spec))
+    with pytest.raises(ValueError, match="Schema hash"):
+        load_scorer(tmp_path / 'bundle')
+
+    joblib.dump({'preprocessor': prep, 'model': model, 'threshold': 0.5}, tmp_path / 'old.joblib')
+    legacy = load_scorer(tmp_path / 'old.joblib')
+    np.testing.assert_allclose(legacy.score_batch(X_raw), model.predict_proba(X_test)[:, 1], rtol=1e-6)
+
+def test_cold_start_skips_heavy_imports(tmp_path, fitted):
+    X_raw, _, _, _, prep, model = fitted
+    save_bundle(tmp_path, prep, model)
+    record = {k: (v.item() if hasattr(v, 'item') else v) for k, v in X_raw.iloc[0].items()}
+    code = (
+        "import sys, json\n"
+        "from src.scoring import load_scorer\n"
+        f"scorer = load_scorer({str(tmp_path)!r})\n"
+        f"scorer.score_one(json.loads({json.dumps(record)!r}))\n"
+        "print(json.dumps(sorted(m for m in ('xgboost', 'sklearn', 'pandas', 'shap', 'matplotlib', 'IPython')"
+        " if m in sys.modules)))\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(out.stdout.strip().splitlines()[-1]) == []
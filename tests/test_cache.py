@@ -0,0 +1,52 @@
+# tests/test_cache.py
+import os
+import pandas as pd
+from src.cache import StageCache
+from src.data_cleaning import remove_duplicates
+
+def test_key_tracks_inputs_params_and_code(tmp_path):
+    raw = tmp_path / 'raw.csv'
+    raw.write_text('a\n1\n')
+    cache = StageCache(tmp_path / 'cache')
+    key = cache.key('clean', inputs=[raw], params={'n': 1}, code=[remove_duplicates])
+
+    assert cache.key('clean', inputs=[raw], params={'n': 1}, code=[remove_duplicates]) == key
+    assert cache.key('clean', inputs=[raw], params={'n': 2}, code=[remove_duplicates]) != key
+    assert cache.key('clean', inputs=[raw], params={'n': 1}) != key
+    raw.write_text('a\n2\n')
+    assert cache.key('clean', inputs=[raw], params={'n': 1}, code=[remove_duplicates]) != key
+
+def test_fetch_hits_after_miss(tmp_path):
+    cache = StageCache(tmp_path)
+    calls = []
+    df = pd.DataFrame({'a': [1, 2], 'b': pd.Categorical(['x', 'y'])})
+
+    def compute():
+        calls.append(1)
+        return df
+
+    first = cache.fetch('stage', 'k1', compute)
+    second = cache.fetch('stage', 'k1', compute)
+    assert len(calls) == 1 and (cache.hits, cache.misses) == (1, 1)
+    pd.testing.assert_frame_equal(first, second)
+
+def test_lru_eviction_and_invalidate(tmp_path):
+    df = pd.DataFrame({'a': range(1000)})
+    cache = StageCache(tmp_path, max_bytes=10**9)
+    for i, stage in enumerate(['one', 'two', 'three']):
+        cache.fetch(stage, f'k{i}', lambda: df)
+        os.utime(cache.entries()[-1], ns=(i * 10**9, i * 10**9))
+    cache.fetch('one', 'k0', lambda: df)  # touch: 'two' is now least recently used
+
+    cache.max_bytes = cache.size() - 1
+    assert cache.evict() == 1
+    assert sorted(p.name.split('-')[0] for p in cache.entries()) == ['one', 'three']
+
+    assert cache.invalidate(['three']) == 1
+    assert cache.invalidate() == 1
+    assert cache.entries() == []
+
+def test_disabled_cache_always_computes(tmp_path):
+    cache = StageCache.disabled()
+    assert cache.key('stage', inputs=[tmp_path / 'missing.csv']) == ''
+    assert len(cache.fetch('stage', '', lambda: pd.DataFrame({'a': [1]}))) == 1
@@ -1,7 +1,8 @@
 # tests/test_data_cleaning.py
+import numpy as np
 import pandas as pd
 import pytest
-from src.data_cleaning import remove_duplicates, remove_missing_values
+from src.data_cleaning import RowHashDeduplicator, duplicate_mask, remove_duplicates, remove_missing_values
 
 def test_remove_duplicates():
     # Test with duplicates
@@ -34,4 +35,31 @@ def test_remove_missing_values():
 def test_remove_missing_values_no_missing():
     df = pd.DataFrame({'a': [1, 2, 3]})
     cleaned = remove_missing_values(df)
-    assert len(cleaned) == 3
\ No newline at end of file
+    assert len(cleaned) == 3
+
+def test_duplicate_mask_matches_pandas():
+    df = pd.DataFrame({
+        'a': [1.0, 1.0, np.nan, np.nan, 0.0, -0.0],
+        'b': ['x', 'x', 'y', 'y', 'z', 'z'],
+        'c': pd.Categorical(['p', 'q', 'p', 'p', 'p', 'p'])
+    })
+    assert duplicate_mask(df).tolist() == df.duplicated().tolist()
+    assert duplicate_mask(df, subset=['a', 'b']).tolist() == df.duplicated(['a', 'b']).tolist()
+
+def test_remove_duplicates_subset():
+    df = pd.DataFrame({'user_id': [1, 1, 2], 'value': [10, 20, 30]})
+    cleaned = remove_duplicates(df, subset=['user_id'])
+    assert cleaned['value'].tolist() == [10, 30]
+    with pytest.raises(ValueError):
+        remove_duplicates(df, subset=['missing'])
+
+def test_deduplicator_persists_across_chunks(tmp_path):
+    dedup = RowHashDeduplicator(subset=['user_id'])
+    first = remove_duplicates(pd.DataFrame({'user_id': [1, 2, 2]}), deduplicator=dedup)
+    dedup.save(tmp_path / 'seen.npy')
+
+    restored = RowHashDeduplicator.load(tmp_path / 'seen.npy', subset=['user_id'])
+    second = remove_duplicates(pd.DataFrame({'user_id': [2, 3]}), deduplicator=restored)
+    assert first['user_id'].tolist() == [1, 2]
+    assert second['user_id'].tolist() == [3]
+    assert len(restored) == 3
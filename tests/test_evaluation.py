@@ -0,0 +1,105 @@
+# tests/test_evaluation.py
+import json
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import auc, confusion_matrix, f1_score, precision_recall_curve
+from src.evaluation import (bootstrap_metrics, counts_at, evaluate_model, evaluate_models, evaluate_scores,
+                            threshold_curve)
+from src.explainability import plot_feature_importance
+
+ROOT = Path(__file__).resolve().parent.parent
+
+@pytest.fixture(scope="module")
+def scores():
+    rng = np.random.default_rng(0)
+    y = (rng.random(5000) < 0.1).astype(int)
+    # Rounded so many samples tie on a threshold
+    prob = np.round(np.clip(0.3 * y + rng.normal(0.3, 0.2, 5000), 0, 1), 2)
+    return y, prob
+
+def test_single_pass_metrics_match_sklearn(scores):
+    y, prob = scores
+    result = evaluate_scores(y, prob, threshold=0.5)
+    precision, recall, _ = precision_recall_curve(y, prob)
+    assert result['AUC-PR'] == pytest.approx(auc(recall, precision), rel=1e-12)
+
+    pred = (prob >= 0.5).astype(int)
+    (tn, fp), (fn, tp) = confusion_matrix(y, pred)
+    assert (result['TN'], result['FP'], result['FN'], result['TP']) == (tn, fp, fn, tp)
+    assert result['F1-Score'] == pytest.approx(f1_score(y, pred))
+
+    curve = threshold_curve(y, prob)
+    grid = np.array([-1.0, 0.0, 0.37, 1.0, 2.0])
+    counts = counts_at(curve, grid)
+    np.testing.assert_array_equal(counts['tp'], [((prob >= t) & (y == 1)).sum() for t in grid])
+    np.testing.assert_array_equal(counts['fp'], [((prob >= t) & (y == 0)).sum() for t in grid])
+
+def test_optimal_thresholds_match_exhaustive_search(scores):
+    y, prob = scores
+    result = evaluate_scores(y, prob, cost_fp=1.0, cost_fn=25.0)
+    candidates = np.unique(prob)
+    costs = [((prob >= t) & (y == 0)).sum() + 25.0 * ((prob < t) & (y == 1)).sum() for t in candidates]
+    f1s = [f1_score(y, prob >= t) for t in candidates]
+    assert result['Min Cost'] == min(costs)
+    assert result['Cost-Optimal Threshold'] == candidates[int(np.argmin(costs))]
+    assert result['Best F1'] == pytest.approx(max(f1s))
+
+def test_bootstrap_matches_sklearn_on_each_resample(scores):
+    y, prob = scores
+    indices = np.random.default_rng(2).integers(0, len(y), (12, len(y)))
+    samples = bootstrap_metrics(y, prob, threshold=0.5, indices=indices, max_memory_mb=1)
+
+    for i, rows in enumerate(indices):
+        precision, recall, _ = precision_recall_curve(y[rows], prob[rows])
+        assert samples['AUC-PR'][i] == pytest.approx(auc(recall, precision), rel=1e-12)
+        flagged = prob[rows] >= 0.5
+        assert samples['Recall'][i] == pytest.approx(flagged[y[rows] == 1].mean())
+        assert samples['Precision'][i] == pytest.approx(y[rows][flagged].mean())
+
+    stratified = bootstrap_metrics(y, prob, n_boot=200, random_state=0, stratify=True)
+    low, high = np.percentile(stratified['AUC-PR'], [2.5, 97.5])
+    assert low < evaluate_scores(y, prob)['AUC-PR'] < high
+
+def test_models_evaluate_concurrently_and_headless(tmp_path, scores, capsys):
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(600, 3))
+    y = (X[:, 0] + rng.normal(size=600) > 1).astype(int)
+    model = LogisticRegression().fit(X, y)
+
+    table = evaluate_models([(model, X, y, "A", "LR"), (model, X[:300], y[:300], "B", "LR")],
+                            n_jobs=2, save_dir=str(tmp_path))
+    assert list(table['Dataset']) == ["A", "B"]
+    assert (table['AUC-PR CI Low'] <= table['AUC-PR']).all() and (table['AUC-PR'] <= table['AUC-PR CI High']).all()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["pr_curve_a_-_lr.png", "pr_curve_b_-_lr.png"]
+    assert capsys.readouterr().out == ""
+
+    single = evaluate_model(model, X, y, "A", "LR", plot=False)
+    assert single['AUC-PR'] == table.loc[0, 'AUC-PR'] and 'curve' not in single
+
+def test_headless_plots_are_saved_not_shown(tmp_path, scores, monkeypatch, capsys):
+    monkeypatch.setenv('FRAUD_HEADLESS', '1')
+    model = SimpleNamespace(predict_proba=lambda X: np.c_[1 - X, X], feature_importances_=np.array([0.2, 0.5, 0.3]))
+    y, prob = scores
+    evaluate_model(model, prob, y, "A", "LR", plot=True, save_dir=str(tmp_path), n_boot=0)
+    fig = plot_feature_importance(model, ['a', 'b', 'c'], top_n=2, save_path=str(tmp_path / 'importance.png'))
+    assert [t.get_text() for t in fig.axes[0].get_xticklabels()] == ['b', 'c']
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["importance.png", "pr_curve_a_-_lr.png"]
+
+def test_entry_points_skip_heavy_imports():
+    code = (
+        "import importlib, json, sys\n"
+        "for module in sys.argv[1:]:\n"
+        "    importlib.import_module(module)\n"
+        "print(json.dumps(sorted(m for m in ('sklearn', 'xgboost', 'shap', 'matplotlib', 'IPython', 'pandas')"
+        " if m in sys.modules)))\n"
+    )
+    def heavy(*modules):
+        out = subprocess.run([sys.executable, '-c', code, *modules], cwd=ROOT, capture_output=True, text=True, check=True)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    assert heavy('scripts.preprocess', 'src.evaluation', 'src.explainability', 'src.modeling') == ['pandas']
+    assert heavy('scripts.serve') == []
@@ -0,0 +1,89 @@
+# tests/test_feature_store.py
+import pandas as pd
+import pytest
+from src.feature_store import VelocityFeatureStore
+from src.data_preprocessing import engineer_features
+
+@pytest.fixture
+def batches():
+    first = pd.DataFrame({
+        'user_id': [1, 2, 1],
+        'device_id': ['D1', 'D2', 'D3'],
+        'purchase_value': [10, 20, 30],
+        'purchase_time': pd.to_datetime(['2025-01-01 12:00', '2025-01-01 09:00', '2025-01-01 08:00']),
+        'signup_time': pd.to_datetime(['2024-12-31'] * 3)
+    })
+    second = pd.DataFrame({
+        'user_id': [2, 3, 1],
+        'device_id': ['D1', 'D4', 'D1'],
+        'purchase_value': [5, 7, 40],
+        'purchase_time': pd.to_datetime(['2025-01-02 10:00', '2025-01-02 11:00', '2025-01-02 12:00']),
+        'signup_time': pd.to_datetime(['2024-12-31'] * 3)
+    })
+    return first, second
+
+def test_incremental_totals_match_full_groupby(batches):
+    store = VelocityFeatureStore(entities=('user_id', 'device_id'))
+    for batch in batches:
+        store.update(batch)
+    full = pd.concat(batches).groupby('user_id')['purchase_value'].agg(['count', 'sum'])
+    totals = store.totals('user_id').sort_index()
+    assert totals['user_txn_count'].tolist() == full['count'].tolist()
+    assert totals['user_total_spent'].tolist() == full['sum'].tolist()
+    assert store.totals('device_id').loc['D1', 'device_txn_count'] == 3
+
+def test_apply_is_point_in_time(batches):
+    store = VelocityFeatureStore()
+    first = store.apply(batches[0])
+    # user 1 bought at 08:00 (30) then 12:00 (10)
+    assert first['user_txn_count'].tolist() == [2, 1, 1]
+    assert first['user_total_spent'].tolist() == [40, 20, 30]
+    second = store.apply(batches[1])
+    assert second['user_txn_count'].tolist() == [2, 1, 3]
+    assert second.loc[2, 'user_avg_purchase'] == pytest.approx(80 / 3)
+
+def test_features_one_matches_apply(batches):
+    store = VelocityFeatureStore()
+    store.update(batches[0])
+    live = store.features_one({'user_id': 1, 'purchase_value': 40})
+    assert live == {'user_txn_count': 3, 'user_total_spent': 80, 'user_avg_purchase': pytest.approx(80 / 3)}
+    assert store.totals()['user_txn_count'].sum() == 3  # read-only
+    batch = store.apply(pd.DataFrame({'user_id': [1], 'purchase_value': [40]}))
+    for name, value in live.items():
+        assert value == pytest.approx(batch[name].iloc[0])
+        assert isinstance(value, int) == pd.api.types.is_integer_dtype(batch[name]), name
+
+def test_snapshot_restore(tmp_path, batches):
+    store = VelocityFeatureStore(entities=('user_id', 'device_id'))
+    store.update(batches[0])
+    store.snapshot(tmp_path / 'store')
+    restored = VelocityFeatureStore.restore(tmp_path / 'store')
+    restored.update(batches[1])
+    store.update(batches[1])
+    pd.testing.assert_frame_equal(restored.totals('device_id'), store.totals('device_id'))
+    assert restored.last_seen('user_id', 1) == pd.Timestamp('2025-01-02 12:00')
+
+    # A second snapshot replaces the first in one step; an unfinished one is ignored
+    store.snapshot(tmp_path / 'store')
+    (tmp_path / 'store' / 'v000003.tmp').mkdir()
+    assert sorted(p.name for p in (tmp_path / 'store').iterdir()) == ['CURRENT', 'v000002', 'v000003.tmp']
+    assert len(VelocityFeatureStore.restore(tmp_path / 'store')) == len(store)
+
+def test_snapshot_rejects_mixed_keys(tmp_path):
+    store = VelocityFeatureStore(entities=('user_id', 'device_id'))
+    store.update(pd.DataFrame({'user_id': [1, 2], 'device_id': ['A', 7], 'purchase_value': [10, 20],
+                               'purchase_time': pd.to_datetime(['2025-01-01', '2025-01-02'])}))
+    with pytest.raises(ValueError, match="device_id"):
+        store.snapshot(tmp_path / 'store')
+    assert not (tmp_path / 'store' / 'CURRENT').exists()
+
+def test_engineer_features_with_store(batches):
+    store = VelocityFeatureStore()
+    engineer_features(batches[0], feature_store=store)
+    result = engineer_features(batches[1], feature_store=store)
+    assert result['user_txn_count'].tolist() == [2, 1, 3]
+    assert result['user_total_spent'].tolist() == [25, 7, 80]
+
+def test_unknown_entity():
+    with pytest.raises(ValueError, match="Unsupported entities"):
+        VelocityFeatureStore(entities=('email',))
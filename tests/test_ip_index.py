@@ -0,0 +1,52 @@
+# tests/test_ip_index.py
+import numpy as np
+import pandas as pd
+import pytest
+from src.ip_index import IpCountryIndex
+from src.data_processing import map_ips_to_countries
+
+@pytest.fixture
+def ip_df():
+    # deliberately unsorted, with a gap between 200 and 250
+    return pd.DataFrame({
+        'lower_bound_ip_address': [250.0, 0.0, 100.0],
+        'upper_bound_ip_address': [300, 99, 199],
+        'country': ['C', 'A', 'B']
+    })
+
+def test_lookup_ranges_and_unknowns(ip_df):
+    index = IpCountryIndex.from_frame(ip_df)
+    ips = [150.7, 0, 99, 100, 220, 300, 301, -1, 2**33]
+    countries = list(index.lookup_countries(ips))
+    assert countries == ['B', 'A', 'A', 'B', 'Unknown', 'C', 'Unknown', 'Unknown', 'Unknown']
+    assert index.lookup_one(150.7) == 'B'
+    assert index.lookup_one(220) == 'Unknown'
+
+def test_save_and_load_memory_mapped(tmp_path, ip_df):
+    IpCountryIndex.from_frame(ip_df).save(tmp_path / 'idx')
+    loaded = IpCountryIndex.load(tmp_path / 'idx')
+    assert isinstance(loaded.lower.base, np.memmap)
+    assert loaded.lookup_one(260) == 'C'
+
+def test_load_missing_index(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        IpCountryIndex.load(tmp_path)
+
+def test_map_ips_preserves_row_order(ip_df):
+    fraud_df = pd.DataFrame({'ip_address': [260.0, 5.0, 150.0], 'purchase_value': [1, 2, 3]})
+    result = map_ips_to_countries(fraud_df, ip_df)
+    assert list(result.columns) == ['purchase_value', 'country']
+    assert result['purchase_value'].tolist() == [1, 2, 3]
+    assert result['country'].tolist() == ['C', 'A', 'B']
+
+def test_saved_index_is_rebuilt_when_ip_table_changes(tmp_path, ip_df):
+    from scripts.preprocess import load_ip_index
+
+    ip_path = tmp_path / 'IpAddress_to_Country.csv'
+    ip_df.to_csv(ip_path, index=False)
+    assert load_ip_index(ip_path, tmp_path / 'idx').lookup_one(260) == 'C'
+    assert IpCountryIndex.load(tmp_path / 'idx').source is not None
+
+    ip_df.assign(country=['D', 'A', 'B']).to_csv(ip_path, index=False)
+    assert load_ip_index(ip_path, tmp_path / 'idx').lookup_one(260) == 'D'
+    assert IpCountryIndex.load(tmp_path / 'idx').lookup_one(260) == 'D'
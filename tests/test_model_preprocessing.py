@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 import pytest
+import scipy.sparse as sp
 from src.model_preprocessing import prepare_data_for_modeling
 
 def test_prepare_data_for_modeling_smote():
@@ -24,4 +25,45 @@ def test_prepare_data_for_modeling_invalid_input():
     X = "not a dataframe"
     y = pd.Series([0, 1])
     with pytest.raises(ValueError):
-        prepare_data_for_modeling(X, y)
\ No newline at end of file
+        prepare_data_for_modeling(X, y)
+
+def test_prepare_data_for_modeling_sparse_matches_dense():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        'num1': rng.normal(size=200),
+        'cat1': rng.choice(['A', 'B', 'C', 'D'], 200)
+    })
+    y = pd.Series([0] * 180 + [1] * 20)
+
+    dense = prepare_data_for_modeling(X, y, "Test", "none", test_size=0.3)
+    sparse = prepare_data_for_modeling(X, y, "Test", "none", test_size=0.3, sparse=True)
+    assert sp.isspmatrix_csr(sparse[0]) and sparse[0].dtype == np.float32
+    np.testing.assert_allclose(sparse[0].toarray(), dense[0].to_numpy(), rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(sparse[2].toarray(), dense[2].to_numpy(), rtol=1e-6, atol=1e-6)
+
+    X_bal, y_bal, _, _, _ = prepare_data_for_modeling(X, y, "Test", "smote", test_size=0.3, sparse=True)
+    assert sp.issparse(X_bal) and X_bal.shape[0] == len(y_bal)
+    assert y_bal.value_counts(normalize=True).min() > 0.4
+
+def test_prepare_data_for_modeling_native_categories():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        'num1': rng.normal(size=300),
+        'cat1': rng.choice(['A', 'B', 'C'], 300)
+    })
+    y = pd.Series([0] * 270 + [1] * 30)
+
+    X_train, _, X_test, _, prep = prepare_data_for_modeling(X, y, "Test", "none", test_size=0.3, encoding="native")
+    assert list(X_train.columns) == ['num__num1', 'cat__cat1']
+    assert list(X_train['cat__cat1'].cat.categories) == [0, 1, 2, 3]  # 3 = reserved for unknown
+    assert (X_test['cat__cat1'].astype(int) == X.loc[X_test.index, 'cat1'].map({'A': 0, 'B': 1, 'C': 2})).all()
+    unseen = prep.transform(pd.DataFrame({'num1': [0.0, 0.0], 'cat1': ['Z', None]}))
+    np.testing.assert_array_equal(unseen[:, 1], [3, 3])
+
+    X_bal, y_bal, _, _, _ = prepare_data_for_modeling(X, y, "Test", "smote", test_size=0.3, encoding="native")
+    assert isinstance(X_bal['cat__cat1'].dtype, pd.CategoricalDtype)
+    assert set(X_bal['cat__cat1'].astype(int)) <= {0, 1, 2}  # codes copied, never interpolated
+    assert y_bal.value_counts(normalize=True).min() > 0.4
+
+    with pytest.raises(ValueError):
+        prepare_data_for_modeling(X, y, encoding="native", sparse=True)
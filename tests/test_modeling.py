@@ -0,0 +1,44 @@
+# tests/test_modeling.py
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from xgboost import XGBClassifier
+from src.modeling import train_xgboost_external
+from src.shards import fold_ids, iter_shards, write_shards
+
+@pytest.fixture(scope="module")
+def training_set():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(2000, 5)), columns=list('abcde')).astype(np.float32)
+    y = pd.Series((X['a'] + rng.normal(size=2000) > 1).astype(int))
+    return X, y
+
+def test_shards_round_trip_with_stratified_folds(tmp_path, training_set):
+    X, y = training_set
+    write_shards(X, y, tmp_path / 'shards', rows_per_shard=300)
+    parts = list(iter_shards(tmp_path / 'shards', n_folds=3))
+    assert len(parts) == 7
+    np.testing.assert_array_equal(np.vstack([p[0] for p in parts]), X.to_numpy())
+    folds = np.concatenate([p[2] for p in parts])
+    np.testing.assert_array_equal(folds, fold_ids(y.to_numpy(), {}, 3))
+    for k in range(3):
+        assert abs(y[folds == k].mean() - y.mean()) < 0.01
+
+def test_external_refit_matches_in_memory_fit(tmp_path, training_set):
+    X, y = training_set
+    write_shards(X, y, tmp_path / 'shards', rows_per_shard=500)
+    grid = train_xgboost_external(tmp_path / 'shards', {'n_estimators': [10, 20], 'max_depth': [3]}, cv=2)
+
+    assert grid.best_params_ in grid.cv_results_['params']
+    assert grid.best_score_ == grid.cv_results_['mean_test_score'].max()
+    expected = XGBClassifier(random_state=42, eval_metric='aucpr', tree_method='hist', **grid.best_params_).fit(X, y)
+    np.testing.assert_allclose(grid.best_estimator_.predict_proba(X), expected.predict_proba(X), rtol=1e-6)
+
+def test_external_memory_pages_sparse_shards(tmp_path, training_set):
+    X, y = training_set
+    write_shards(sp.csr_matrix(X.clip(lower=0).to_numpy()), y, tmp_path / 'shards', rows_per_shard=500)
+    grid = train_xgboost_external(tmp_path / 'shards', {'n_estimators': [10]}, cv=2, external_memory=True)
+    assert grid.best_estimator_.missing == 0.0
+    assert 0 < grid.best_score_ <= 1
+    assert sorted(p.name for p in (tmp_path / 'shards').iterdir() if p.is_dir()) == []
@@ -0,0 +1,110 @@
+# tests/test_monitoring.py
+import json
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp
+from sklearn.linear_model import LogisticRegression
+from src.model_preprocessing import prepare_data_for_modeling
+from src.monitoring import DriftMonitor, HyperLogLog, NumericSketch
+from src.scoring import FraudScorer
+from src.serving import handle_request
+from src.storage import FRAUD_ENGINEERED_SCHEMA
+
+def frame(rng, n, shift=0.0, countries=('Japan', 'Kenya', 'Unknown'), p=(0.6, 0.35, 0.05)):
+    return pd.DataFrame({
+        'purchase_value': rng.lognormal(3.5 + shift, 0.6, n).round(),
+        'age': rng.integers(18, 70, n),
+        'country': rng.choice(list(countries), n, p=list(p)),
+        'device_id': np.char.add('D', rng.integers(0, n // 2, n).astype(str)).astype(object),
+    })
+
+def test_sketches_match_exact_statistics():
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(3, 1.5, 50_000)
+    sketch = NumericSketch(relative_accuracy=0.01)
+    sketch.update(values)
+    exact = np.quantile(values, [0.01, 0.5, 0.99], method='lower')
+    np.testing.assert_allclose(sketch.quantiles([0.01, 0.5, 0.99]), exact, rtol=0.011)
+
+    shifted = rng.lognormal(3.2, 1.5, 50_000)
+    live = NumericSketch(relative_accuracy=0.01)
+    for x in shifted[:1000]:
+        live.update_one(x)
+    live.update(shifted[1000:])
+    assert live.ks(sketch) == pytest.approx(ks_2samp(values, shifted).statistic, abs=0.005)
+
+    hll, other = HyperLogLog(), HyperLogLog()
+    hll.add_hashes(np.random.default_rng(1).integers(0, 2**64 - 1, 30_000, dtype=np.uint64, endpoint=True))
+    for i in range(5000):
+        other.add(f"id-{i}")
+    hll.merge(other)
+    assert hll.estimate() == pytest.approx(35_000, rel=0.05)
+
+def test_report_flags_drift_and_round_trips(tmp_path):
+    rng = np.random.default_rng(0)
+    profile = DriftMonitor.for_columns(['purchase_value', 'age'], ['country', 'device_id'],
+                                       unknown_values={'country': 'Unknown'})
+    profile.update(frame(rng, 20_000))
+    profile.save(tmp_path / 'profile.json')
+
+    stable = DriftMonitor.load(tmp_path / 'profile.json').as_reference()
+    stable.update(frame(rng, 5000))
+    assert stable.report()['alerts'] == []
+
+    drifted = DriftMonitor.load(tmp_path / 'profile.json').as_reference()
+    live = frame(rng, 5000, shift=0.5, countries=('Japan', 'Kenya', 'Unknown', 'Peru'), p=(0.3, 0.3, 0.25, 0.15))
+    live.loc[:999, 'age'] = np.nan
+    drifted.update(live)
+    report = drifted.report()
+    assert report['features']['country']['unseen_rate'] == pytest.approx((live['country'] == 'Peru').mean())
+    assert report['features']['age']['null_rate'] == pytest.approx(0.2)
+    assert report['features']['device_id']['distinct'] == pytest.approx(live['device_id'].nunique(), rel=0.05)
+    flagged = {alert.split(':')[0] + ' ' + alert.split()[1] for alert in report['alerts']}
+    assert {'purchase_value PSI', 'purchase_value KS', 'country PSI', 'country unknown_rate',
+            'age null_rate'} <= flagged
+    json.dumps(report)
+
+    monitor = DriftMonitor.from_dtypes(FRAUD_ENGINEERED_SCHEMA, exclude=['class'])
+    assert 'country' in monitor.sketches and 'class' not in monitor.sketches
+
+def test_scorer_monitors_its_stream_across_threads():
+    rng = np.random.default_rng(0)
+    X = frame(rng, 600).drop(columns='device_id')
+    y = pd.Series((X['purchase_value'] > 60).astype(int))
+    X_train, y_train, _, _, prep = prepare_data_for_modeling(X, y, imbalance_technique="none")
+    profile = DriftMonitor.for_columns(['purchase_value', 'age'], ['country'])
+    profile.update(X)
+
+    scorer = FraudScorer(prep, LogisticRegression().fit(X_train, y_train), monitor=profile.as_reference())
+    assert handle_request(FraudScorer(prep, LogisticRegression().fit(X_train, y_train)), 'GET', '/monitor', b'')[0] == 404
+    records = frame(rng, 400, shift=1.0).drop(columns='device_id').to_dict('records')
+    with ThreadPoolExecutor(4) as pool:
+        list(pool.map(scorer.score_one, records[:300]))
+    scorer.decide_batch(records[300:])
+
+    status, report = handle_request(scorer, 'GET', '/monitor', b'')
+    assert status == 200 and report['rows'] == 400
+    assert any(alert.startswith('purchase_value: PSI') for alert in report['alerts'])
+    assert report['features']['country']['psi'] < 0.2
+
+def test_update_one_matches_update_on_infinities():
+    values = [np.inf, -np.inf, 1e300, -1e300, 0.0, 5.0]
+    one, batch = NumericSketch(), NumericSketch()
+    for value in values:
+        one.update_one(value)
+    batch.update(values)
+    assert one.counts == batch.counts and one.nulls == batch.nulls == 0
+
+def test_nullable_dtypes_count_na_as_null():
+    frame = pd.DataFrame({'amount': pd.array([5, None, 7], dtype='Int64'),
+                          'ratio': pd.array([0.5, None, 1.5], dtype='Float64'),
+                          'browser': pd.array(['a', None, 'a'], dtype='string')})
+    batch, one = DriftMonitor.from_dtypes(frame.dtypes), DriftMonitor.from_dtypes(frame.dtypes)
+    batch.update(frame)
+    for record in frame.to_dict('records'):
+        one.update_one(record)
+    for monitor in (batch, one):
+        assert [monitor.sketches[col].nulls for col in frame] == [1, 1, 1]
+        assert monitor.sketches['amount'].count == 2 and monitor.sketches['browser'].counts == [2]
@@ -0,0 +1,74 @@
+# tests/test_parallel.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_cleaning import remove_duplicates, remove_missing_values
+from src.data_processing import map_ips_to_countries
+from src.data_preprocessing import engineer_features
+from src.ip_index import IpCountryIndex
+import src.parallel
+from src.parallel import SharedFrame, hash_partitions, parallel_fraud_pipeline, process_pool
+
+@pytest.fixture
+def fraud_df():
+    rng = np.random.default_rng(1)
+    n = 60
+    df = pd.DataFrame({
+        'user_id': rng.integers(1, 12, n),
+        'signup_time': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 1000, n), unit='min'),
+        'purchase_time': pd.Timestamp('2025-01-02') + pd.to_timedelta(rng.integers(0, 5000, n), unit='min'),
+        'purchase_value': rng.integers(10, 100, n),
+        'device_id': rng.choice(['D1', 'D2', 'D3'], n).astype(object),
+        'source': pd.Categorical(rng.choice(['SEO', 'Ads'], n)),
+        'age': rng.integers(18, 60, n),
+        'ip_address': rng.uniform(0, 400, n).round(1),
+        'class': rng.integers(0, 2, n)
+    })
+    df.loc[7, 'device_id'] = np.nan
+    return pd.concat([df, df.iloc[[3, 7, 40]]], ignore_index=True)
+
+@pytest.fixture
+def ip_index():
+    return IpCountryIndex.from_frame(pd.DataFrame({
+        'lower_bound_ip_address': [0.0, 100.0, 250.0],
+        'upper_bound_ip_address': [99.0, 199.0, 300.0],
+        'country': ['A', 'B', 'C']
+    }))
+
+def test_shared_frame_round_trip(fraud_df):
+    with SharedFrame(fraud_df) as shared:
+        restored = SharedFrame.read(shared.spec)
+        subset = SharedFrame.read(shared.spec, np.array([2, 7]))
+    pd.testing.assert_frame_equal(restored, fraud_df, check_index_type=False)
+    assert subset.index.tolist() == [2, 7]
+    assert pd.isna(subset.loc[7, 'device_id'])
+
+def test_hash_partitions_keep_users_together(fraud_df):
+    parts = hash_partitions(fraud_df['user_id'], 3)
+    assert set(parts) <= {0, 1, 2}
+    assert (pd.Series(parts).groupby(fraud_df['user_id']).nunique() == 1).all()
+
+def test_parallel_matches_serial(fraud_df, ip_index):
+    expected = remove_missing_values(remove_duplicates(fraud_df))
+    expected = engineer_features(map_ips_to_countries(expected, ip_index))
+
+    with process_pool(2) as pool:
+        result = parallel_fraud_pipeline(fraud_df, ip_index, pool, n_partitions=3)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason="needs /dev/shm to list shared memory blocks")
+def test_failed_partition_frees_finished_results(fraud_df, ip_index, monkeypatch):
+    bad_user = fraud_df['user_id'].iloc[0]
+    def engineer_or_fail(part):
+        if (part['user_id'] == bad_user).any():
+            raise RuntimeError("partition failed")
+        return engineer_features(part)
+    monkeypatch.setattr(src.parallel, 'engineer_features', engineer_or_fail)
+
+    before = set(os.listdir('/dev/shm'))
+    with ThreadPoolExecutor(max_workers=3) as pool, pytest.raises(RuntimeError, match="partition failed"):
+        parallel_fraud_pipeline(fraud_df, ip_index, pool, n_partitions=3)
+    assert set(os.listdir('/dev/shm')) == before
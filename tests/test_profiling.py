@@ -0,0 +1,77 @@
+# tests/test_profiling.py
+import json
+import pstats
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from src.data_cleaning import remove_duplicates
+from src.profiling import disable_profiling, enable_profiling, get_recorder, instrument, stage
+
+@instrument(rows_arg='df')
+def double(scale, df):
+    return pd.concat([df, df * scale])
+
+@instrument()
+def wait(seconds):
+    time.sleep(seconds)
+
+def test_instrument_records_stages_and_exports(tmp_path):
+    df = pd.DataFrame({'a': [1, 1, 2], 'b': [3, 3, 4]})
+    idle = get_recorder()
+    recorded = len(idle.records)
+    with stage('ignored') as current:
+        current.rows_out = 1
+    remove_duplicates(df)
+    assert not idle.enabled and len(idle.records) == recorded
+
+    recorder = enable_profiling()
+    try:
+        with stage('pipeline', rows_in=len(df)) as current:
+            out = double(2, df=remove_duplicates(df))
+            current.rows_out = len(out)
+    finally:
+        disable_profiling()
+    remove_duplicates(df)
+
+    records = {r['stage']: r for r in recorder.records}
+    assert list(records) == ['remove_duplicates', 'double', 'pipeline']
+    assert (records['remove_duplicates']['rows_in'], records['remove_duplicates']['rows_out']) == (3, 2)
+    assert (records['double']['rows_in'], records['double']['rows_out']) == (2, 4)
+    assert records['double']['parent'] == 'pipeline' and records['pipeline']['parent'] is None
+    assert records['pipeline']['wall_s'] >= records['double']['wall_s'] > 0
+
+    recorder.save_json(tmp_path / 'metrics.json')
+    summary = json.loads((tmp_path / 'metrics.json').read_text())['stages']
+    assert summary['pipeline'] == {**summary['pipeline'], 'calls': 1, 'rows_in': 3, 'rows_out': 4}
+    recorder.save_prometheus(tmp_path / 'metrics.prom')
+    text = (tmp_path / 'metrics.prom').read_text()
+    assert '# TYPE fraud_pipeline_stage_wall_seconds_total counter' in text
+    assert 'fraud_pipeline_stage_rows_out_total{stage="double"} 4' in text
+
+def test_peak_memory_and_profiles(tmp_path):
+    recorder = enable_profiling(tmp_path / 'cprofile')
+    try:
+        with stage('outer'):
+            with stage('allocate'):
+                block = np.ones(40 * 1024**2 // 8)
+                del block
+            with stage('small'):
+                sum(range(1000))
+    finally:
+        disable_profiling()
+    records = {r['stage']: r for r in recorder.records}
+    if recorder.resets_peak:
+        assert records['allocate']['peak_rss_delta_mb'] > 35
+        assert records['small']['peak_rss_delta_mb'] < 5
+        assert records['outer']['peak_rss_delta_mb'] > 35
+    assert [p.name for p in (tmp_path / 'cprofile').iterdir()] == [Path(records['outer']['profile']).name]
+    assert pstats.Stats(records['outer']['profile']).total_calls > 0
+
+    recorder = enable_profiling(tmp_path / 'sample', profile_mode='sample', sample_interval=0.001)
+    try:
+        wait(0.05)
+    finally:
+        disable_profiling()
+    folded = open(recorder.records[0]['profile']).read()
+    assert 'wait (test_profiling.py' in folded and 'profiling.py' not in folded.replace('test_profiling.py', '')
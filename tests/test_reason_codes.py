@@ -0,0 +1,61 @@
+# tests/test_reason_codes.py
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+from src.explainability import get_feature_names
+from src.model_preprocessing import prepare_data_for_modeling
+from src.reason_codes import ReasonCoder
+from src.scoring import FraudScorer
+from src.serving import handle_request
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        'purchase_value': rng.integers(9, 155, 400),
+        'age': rng.integers(18, 70, 400),
+        'source': rng.choice(['SEO', 'Ads', 'Direct'], 400),
+        'country': rng.choice(['Japan', 'Kenya', 'Unknown'], 400)
+    })
+    y = pd.Series(((X['purchase_value'] > 120) | (X['country'] == 'Kenya')).astype(int))
+    X_train, y_train, X_test, _, prep = prepare_data_for_modeling(X, y, imbalance_technique="none")
+    model = XGBClassifier(n_estimators=30, max_depth=3).fit(X_train, y_train)
+    return X.loc[X_test.index], X_test, X_train, y_train, prep, model
+
+def test_one_hot_columns_sum_to_their_source_feature(fitted):
+    _, X_test, _, _, prep, model = fitted
+    contribs = model.get_booster().predict(xgb.DMatrix(X_test.to_numpy()), pred_contribs=True,
+                                           validate_features=False)
+    coder = ReasonCoder.from_preprocessor(prep)
+    grouped = coder.aggregate(contribs)
+
+    assert coder.features == ['purchase_value', 'age', 'source', 'country']
+    np.testing.assert_allclose(grouped.sum(axis=1), contribs[:, :-1].sum(axis=1), rtol=1e-4, atol=1e-5)
+    country = [i for i, name in enumerate(X_test.columns) if name.startswith('cat__country_')]
+    np.testing.assert_allclose(grouped[:, 3], contribs[:, country].sum(axis=1), rtol=1e-5, atol=1e-6)
+
+    # get_feature_names output groups the same way
+    by_name = ReasonCoder.from_feature_names(get_feature_names(prep), ['source', 'country'])
+    np.testing.assert_allclose(by_name.aggregate(contribs), grouped)
+
+def test_decisions_carry_top_k_reason_codes(fitted):
+    X_raw, X_test, X_train, y_train, prep, model = fitted
+    scorer = FraudScorer(prep, model, reason_codes=2)
+    decisions = scorer.decide_batch(X_raw.to_dict('records'))
+
+    np.testing.assert_allclose([d['fraud_probability'] for d in decisions],
+                               model.predict_proba(X_test)[:, 1], rtol=1e-6)
+    codes = decisions[0]['reason_codes']
+    assert len(codes) == 2 and codes[0]['contribution'] >= codes[1]['contribution']
+    kenya_only = (X_raw['country'] == 'Kenya').to_numpy() & (X_raw['purchase_value'] <= 120).to_numpy()
+    assert decisions[int(np.flatnonzero(kenya_only)[0])]['reason_codes'][0]['feature'] == 'country'
+
+    assert scorer.decide(X_raw.iloc[0].to_dict()) == decisions[0]
+    _, payload = handle_request(scorer, 'POST', '/score', X_raw.iloc[:3].to_json(orient='records').encode())
+    assert [r['reason_codes'] for r in payload['results']] == [d['reason_codes'] for d in decisions[:3]]
+
+    linear = FraudScorer(prep, LogisticRegression().fit(X_train, y_train), reason_codes=3)
+    assert len(linear.decide(X_raw.iloc[0].to_dict())['reason_codes']) == 3
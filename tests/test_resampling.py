@@ -0,0 +1,65 @@
+# tests/test_resampling.py
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from imblearn.under_sampling import TomekLinks
+from sklearn.neighbors import NearestNeighbors
+from src.resampling import AUTO_KDTREE_MAX_FEATURES, nearest_neighbors, resolve_backend, smote, smote_tomek, tomek_links
+
+@pytest.fixture(scope="module")
+def imbalanced():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(2000, 6))
+    y = (rng.random(2000) < 0.1).astype(int)
+    X[y == 1] += 1.0
+    return X, y
+
+@pytest.mark.parametrize("backend,sparse", [("brute", False), ("brute", True), ("kdtree", False)])
+def test_nearest_neighbors_match_sklearn(imbalanced, backend, sparse):
+    X, _ = imbalanced
+    expected_d, expected_i = NearestNeighbors(n_neighbors=6).fit(X).kneighbors(X)
+    dist, idx = nearest_neighbors(sp.csr_matrix(X) if sparse else X, 5, backend=backend, n_jobs=2)
+    np.testing.assert_array_equal(idx, expected_i[:, 1:])
+    np.testing.assert_allclose(dist, expected_d[:, 1:], atol=1e-4)
+
+    with pytest.raises(ValueError):
+        nearest_neighbors(sp.csr_matrix(X), 5, backend='kdtree')
+
+def test_auto_backend_picks_kdtree_for_narrow_dense_input():
+    narrow, wide = np.zeros((10, AUTO_KDTREE_MAX_FEATURES)), np.zeros((10, AUTO_KDTREE_MAX_FEATURES + 1))
+    assert resolve_backend(narrow) == 'kdtree'
+    assert resolve_backend(wide) == resolve_backend(sp.csr_matrix(narrow)) == 'brute'
+    assert resolve_backend(narrow, 'brute') == 'brute'
+    with pytest.raises(ValueError):
+        resolve_backend(narrow, 'balltree')
+
+def test_smote_balances_reproducibly_and_keeps_types(imbalanced):
+    X, y = imbalanced
+    X_df = pd.DataFrame(X, columns=[f"f{i}" for i in range(6)])
+    X_res, y_res = smote(X_df, pd.Series(y, name='class'), random_state=7)
+    again, _ = smote(X_df, pd.Series(y, name='class'), random_state=7)
+
+    assert list(X_res.columns) == list(X_df.columns) and y_res.name == 'class'
+    assert np.bincount(y_res).tolist() == [np.bincount(y)[0]] * 2
+    pd.testing.assert_frame_equal(X_res, again)
+    pd.testing.assert_frame_equal(X_res.iloc[:len(X)], X_df)
+    # Synthetic rows stay inside the minority class's bounding box
+    minority = X[y == 1]
+    synthetic = X_res.to_numpy()[len(X):]
+    assert (synthetic >= minority.min(axis=0) - 1e-9).all() and (synthetic <= minority.max(axis=0) + 1e-9).all()
+
+    X_sp, y_sp = smote(sp.csr_matrix(X.astype(np.float32)), y, random_state=7)
+    assert sp.isspmatrix_csr(X_sp) and X_sp.shape == X_res.shape
+
+def test_tomek_links_match_imblearn(imbalanced):
+    X, y = imbalanced
+    X_res, y_res = smote(X, y, random_state=0)
+    tomek = TomekLinks(sampling_strategy='all')
+    tomek.fit_resample(X_res, y_res)
+    expected = np.ones(len(y_res), dtype=bool)
+    expected[tomek.sample_indices_] = False
+
+    np.testing.assert_array_equal(tomek_links(X_res, y_res), expected)
+    X_clean, y_clean = smote_tomek(X, y, random_state=0)
+    assert len(y_clean) == len(y_res) - expected.sum()
@@ -0,0 +1,115 @@
+# tests/test_scoring.py
+import asyncio
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from xgboost import XGBClassifier
+from src.model_preprocessing import prepare_data_for_modeling
+from src.scoring import CompiledPreprocessor, FraudScorer, load_scorer, save_bundle
+from src.serving import create_app, handle_request
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({
+        'purchase_value': rng.integers(9, 155, 300),
+        'age': rng.integers(18, 70, 300),
+        'source': rng.choice(['SEO', 'Ads', 'Direct'], 300),
+        'country': rng.choice(['Japan', 'Kenya', 'Unknown'], 300)
+    })
+    y = pd.Series((X['purchase_value'] > 120).astype(int))
+    X_train, y_train, X_test, y_test, prep = prepare_data_for_modeling(X, y, imbalance_technique="none")
+    return X.loc[X_test.index], X_test, X_train, y_train, prep
+
+def test_compiled_preprocessor_matches_column_transformer(fitted):
+    X_raw, X_test, _, _, prep = fitted
+    compiled = CompiledPreprocessor.from_column_transformer(prep)
+    np.testing.assert_allclose(compiled.transform(X_raw), X_test.to_numpy())
+
+    record = dict(X_raw.iloc[0], country='Atlantis')  # unknown category -> all zeros
+    row = compiled.transform_one(record)
+    expected = prep.transform(pd.DataFrame([record]))[0]
+    np.testing.assert_allclose(row, expected)
+
+@pytest.mark.parametrize("model_cls", [LogisticRegression, XGBClassifier])
+def test_score_one_matches_predict_proba(fitted, model_cls):
+    X_raw, X_test, X_train, y_train, prep = fitted
+    model = model_cls().fit(X_train, y_train)
+    config = model.get_booster().save_config() if hasattr(model, 'get_booster') else None
+    scorer = FraudScorer(prep, model)
+    scores = [scorer.score_one(r) for r in X_raw.to_dict('records')]
+    np.testing.assert_allclose(scores, model.predict_proba(X_test)[:, 1], rtol=1e-6)
+    np.testing.assert_allclose(scorer.score_batch(X_raw), model.predict_proba(X_test)[:, 1], rtol=1e-6)
+    # The caller's model keeps its own thread settings
+    assert config is None or model.get_booster().save_config() == config
+
+def test_sparse_trained_xgboost_scores_match():
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({
+        'purchase_value': rng.integers(9, 155, 300),
+        'age': rng.integers(18, 70, 300),
+        'source': rng.choice(['SEO', 'Ads', 'Direct'], 300),
+        'country': rng.choice(['Japan', 'Kenya', 'Unknown'], 300)
+    })
+    y = pd.Series((X['purchase_value'] > 120).astype(int))
+    X_train, y_train, X_test, _, prep = prepare_data_for_modeling(X, y, imbalance_technique="none", sparse=True)
+    model = XGBClassifier(n_estimators=20, missing=0.0).fit(X_train, y_train)
+    scorer = FraudScorer(prep, model)
+    # Sparse test rows keep the split order, so recover them from the dense split
+    _, _, X_test_dense, _, _ = prepare_data_for_modeling(X, y, imbalance_technique="none")
+    scores = [scorer.score_one(r) for r in X.loc[X_test_dense.index].to_dict('records')]
+    np.testing.assert_allclose(scores, model.predict_proba(X_test)[:, 1], rtol=1e-6)
+
+def test_native_categorical_xgboost_scores_match(tmp_path):
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame({
+        'purchase_value': rng.integers(9, 155, 400),
+        'country': rng.choice(['Japan', 'Kenya', 'Peru', 'Unknown'], 400)
+    })
+    y = pd.Series(((X['country'] == 'Kenya') & (X['purchase_value'] > 60)).astype(int))
+    X_train, y_train, X_test, _, prep = prepare_data_for_modeling(X, y, imbalance_technique="none", encoding="native")
+    model = XGBClassifier(n_estimators=20, enable_categorical=True, tree_method='hist').fit(X_train, y_train)
+    expected = model.predict_proba(X_test)[:, 1]
+
+    compiled = CompiledPreprocessor.from_column_transformer(prep)
+    X_raw = X.loc[X_test.index]
+    np.testing.assert_array_equal(compiled.transform(X_raw), prep.transform(X_raw))
+    np.testing.assert_array_equal(compiled.transform_one(dict(X_raw.iloc[0], country='Atlantis'))[1], 4)
+
+    scorer = FraudScorer(prep, model, reason_codes=1)
+    np.testing.assert_allclose([scorer.score_one(r) for r in X_raw.to_dict('records')], expected, rtol=1e-6)
+    assert scorer.decide(X_raw.iloc[0].to_dict())['reason_codes'][0]['feature'] in ('country', 'purchase_value')
+    save_bundle(tmp_path / 'bundle', prep, model)
+    np.testing.assert_allclose(load_scorer(tmp_path / 'bundle').score_batch(X_raw), expected, rtol=1e-6)
+
+def test_score_one_missing_feature(fitted):
+    X_raw, _, X_train, y_train, prep = fitted
+    scorer = FraudScorer(prep, LogisticRegression().fit(X_train, y_train))
+    with pytest.raises(ValueError, match="Missing feature"):
+        scorer.score_one({'age': 30})
+
+def test_bundle_round_trip_and_http_routes(tmp_path, fitted):
+    X_raw, _, X_train, y_train, prep = fitted
+    save_bundle(tmp_path / 'bundle', prep, LogisticRegression().fit(X_train, y_train), threshold=0.3)
+    scorer = load_scorer(tmp_path / 'bundle')
+    record = {k: (v.item() if hasattr(v, 'item') else v) for k, v in X_raw.iloc[0].items()}
+
+    status, payload = handle_request(scorer, 'POST', '/score', json.dumps(record).encode())
+    assert status == 200
+    assert payload['is_fraud'] == (payload['fraud_probability'] >= 0.3)
+    assert handle_request(scorer, 'POST', '/score', b'{"age": 1}')[0] == 400
+    for bad in ({**record, 'age': 'abc'}, {**record, 'age': None}, [1, 2], [record, 'x']):
+        assert handle_request(scorer, 'POST', '/score', json.dumps(bad).encode())[0] == 400
+    assert handle_request(scorer, 'GET', '/nope', b'')[0] == 404
+
+    sent = []
+    async def receive():
+        return {'type': 'http.request', 'body': json.dumps([record, record]).encode()}
+    async def send(message):
+        sent.append(message)
+    scope = {'type': 'http', 'method': 'POST', 'path': '/score'}
+    asyncio.run(create_app(scorer)(scope, receive, send))
+    assert sent[0]['status'] == 200
+    assert len(json.loads(sent[1]['body'])['results']) == 2
@@ -0,0 +1,108 @@
+# tests/test_search.py
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from xgboost import XGBClassifier
+from src.modeling import train_xgboost
+from src.search import (EARLY_STOPPING_FRACTION, FoldMatrixCache, grid_search, n_rungs, successive_halving_search,
+                        thread_budget)
+
+PARAM_GRID = {'n_estimators': [20, 40], 'max_depth': [2, 4], 'learning_rate': [0.1, 0.3]}
+
+@pytest.fixture(scope="module")
+def training_set():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1500, 4)), columns=list('abcd'))
+    y = pd.Series((X['a'] + X['b'] * X['c'] + rng.normal(size=1500) > 1).astype(int))
+    return X, y
+
+def test_thread_budget_never_oversubscribes():
+    assert thread_budget(8, max_concurrent=5) == (5, 1)
+    assert thread_budget(8, max_concurrent=2) == (2, 4)
+    assert thread_budget(1, max_concurrent=10) == (1, 1)
+    assert n_rungs(8, 3) == 3 and n_rungs(1, 3) == 1
+
+def test_halving_narrows_candidates_and_refits(training_set):
+    X, y = training_set
+    search = train_xgboost(X, y, PARAM_GRID, cv=3, n_jobs=2)
+
+    iters = search.cv_results_['iter']
+    assert [int((iters == r).sum()) for r in range(iters.max() + 1)] == [8, 3, 1]
+    assert np.all(np.diff(search.cv_results_['n_resources'][[0, 8, 11]]) > 0)
+    assert search.cv_results_['rank_test_score'][search.best_index_] == 1
+    assert search.best_params_ in search.cv_results_['params']
+    assert isinstance(search.best_estimator_, XGBClassifier)
+    assert search.best_estimator_.n_estimators <= search.best_params_['n_estimators']
+    assert search.best_estimator_.predict_proba(X).shape == (len(X), 2)
+
+def test_interrupted_search_resumes_from_trial_cache(tmp_path, training_set, monkeypatch):
+    X, y = training_set
+    real_train = xgb.train
+    calls = []
+
+    def interrupted_train(*args, **kwargs):
+        if len(calls) == 10:
+            raise KeyboardInterrupt
+        calls.append(1)
+        return real_train(*args, **kwargs)
+
+    monkeypatch.setattr(xgb, 'train', interrupted_train)
+    with pytest.raises(KeyboardInterrupt):
+        successive_halving_search(X, y, PARAM_GRID, cv=3, n_jobs=1, trial_dir=tmp_path)
+
+    calls.clear()
+    monkeypatch.setattr(xgb, 'train', lambda *a, **k: (calls.append(1), real_train(*a, **k))[1])
+    resumed = successive_halving_search(X, y, PARAM_GRID, cv=3, n_jobs=1, trial_dir=tmp_path)
+    assert len(calls) == 36 - 10  # 8x3 + 3x3 + 1x3 trials, 10 already recorded
+
+    calls.clear()
+    again = successive_halving_search(X, y, PARAM_GRID, cv=3, n_jobs=1, trial_dir=tmp_path)
+    assert calls == [] and again.best_params_ == resumed.best_params_
+
+def test_grid_search_matches_gridsearchcv_and_shares_fold_matrices(training_set):
+    X, y = training_set
+    search = grid_search(X, y, PARAM_GRID, cv=3, n_jobs=1)
+    expected = GridSearchCV(
+        XGBClassifier(random_state=42, eval_metric='aucpr', scale_pos_weight=1, tree_method='hist', n_jobs=1),
+        PARAM_GRID, cv=StratifiedKFold(n_splits=3), scoring='average_precision'
+    ).fit(X, y)
+
+    np.testing.assert_allclose(search.cv_results_['mean_test_score'], expected.cv_results_['mean_test_score'], rtol=1e-6)
+    assert search.best_params_ == expected.best_params_
+    # One set of matrices per fold, reused by the other 7 candidates
+    assert search.fold_matrix_stats_['builds'] == 3
+    assert search.fold_matrix_stats_['hits'] == 7 * 3
+
+def test_fold_matrix_cache_builds_once_per_key(training_set):
+    X, y = training_set
+    cache = FoldMatrixCache(X, y.to_numpy(), missing=np.nan)
+    rows = np.arange(1000)
+    first = cache.get((0,), rows, None, np.arange(1000, 1500))
+    assert cache.get((0,), rows, None, np.arange(1000, 1500)) is first
+    assert first[1] is None  # no early-stopping rows
+    cache.get((0,), rows, None, np.arange(1000, 1500), max_bin=64)
+    assert (cache.builds, cache.hits, len(cache)) == (2, 1, 2)
+    cache.clear()
+    assert len(cache) == 0
+
+def test_early_stopping_rows_come_from_the_training_fold(training_set, monkeypatch):
+    X, y = training_set
+    built = []
+    real_build = FoldMatrixCache._build
+    def recording_build(self, train_rows, stop_rows, valid_rows, max_bin):
+        built.append((train_rows, stop_rows, valid_rows))
+        return real_build(self, train_rows, stop_rows, valid_rows, max_bin)
+    monkeypatch.setattr(FoldMatrixCache, '_build', recording_build)
+    successive_halving_search(X, y, PARAM_GRID, cv=3, n_jobs=1)
+
+    folds = [(train, valid) for train, valid in StratifiedKFold(n_splits=3).split(X, y)]
+    for train_rows, stop_rows, valid_rows in built:
+        train, valid = next(fold for fold in folds if np.array_equal(fold[1], valid_rows))
+        assert not np.intersect1d(stop_rows, valid).size and not np.intersect1d(stop_rows, train_rows).size
+        assert np.isin(stop_rows, train).all() and np.isin(train_rows, train).all()
+    # Final rung: the whole stratified slice
+    train_rows, stop_rows, valid_rows = built[-1]
+    assert len(stop_rows) == pytest.approx(EARLY_STOPPING_FRACTION * (len(train_rows) + len(stop_rows)), abs=2)
+    assert y.to_numpy()[stop_rows].mean() == pytest.approx(y.to_numpy()[train_rows].mean(), abs=0.02)
@@ -0,0 +1,49 @@
+# tests/test_shap_cache.py
+import numpy as np
+import pandas as pd
+import pytest
+import shap
+import xgboost as xgb
+from xgboost import XGBClassifier
+from src.shap_cache import ShapCache
+
+@pytest.fixture(scope="module")
+def fitted():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(1200, 5)), columns=list('abcde'))
+    y = (X['a'] + X['b'] * X['c'] > 0.5).astype(int)
+    return XGBClassifier(n_estimators=30, max_depth=3).fit(X, y), X
+
+def test_batch_values_match_tree_explainer(tmp_path, fitted):
+    model, X = fitted
+    explainer = shap.TreeExplainer(model)
+    cache = ShapCache(tmp_path, model)
+    rows = [7, 3, 7, 500]
+
+    values = cache.explain(X, rows=rows)
+    np.testing.assert_allclose(values, explainer.shap_values(X.iloc[rows]), atol=1e-5)
+    assert cache.expected_value == pytest.approx(float(explainer.expected_value), abs=1e-5)
+    assert (cache.computed, len(cache)) == (3, 3)
+
+    # Chunks across worker processes give the same values
+    everything = cache.explain(X, chunk_size=400, n_jobs=2)
+    np.testing.assert_allclose(everything, explainer.shap_values(X), atol=1e-5)
+
+def test_repeat_requests_are_served_from_disk(tmp_path, fitted, monkeypatch):
+    model, X = fitted
+    ShapCache(tmp_path, model).explain(X, rows=np.arange(100))
+
+    reopened = ShapCache(tmp_path, model)
+    monkeypatch.setattr(xgb.Booster, 'predict', lambda *a, **k: pytest.fail("recomputed"))
+    values = reopened.explain(X, rows=np.arange(50, 100))
+    assert (reopened.computed, reopened.hits, values.shape) == (0, 50, (50, 5))
+    with pytest.raises(KeyError):
+        reopened.get([100])
+
+def test_retrained_model_gets_its_own_cache(tmp_path, fitted):
+    model, X = fitted
+    other = XGBClassifier(n_estimators=5, max_depth=2).fit(X, model.predict(X))
+    first, second = ShapCache(tmp_path, model), ShapCache(tmp_path, other)
+    assert first.directory != second.directory
+    with pytest.raises(ValueError):
+        first.explain(X.iloc[:, :4])
@@ -0,0 +1,69 @@
+# tests/test_storage.py
+import pandas as pd
+import pytest
+from src.data_cleaning import remove_duplicates
+from src.storage import (CREDITCARD_COMPACT_SCHEMA, CREDITCARD_SCHEMA, FRAUD_ENGINEERED_SCHEMA, TableAppender,
+                         read_table, write_table)
+
+@pytest.fixture
+def engineered_df():
+    return pd.DataFrame({
+        'purchase_value': [34, 16, 15, 44],
+        'source': ['SEO', 'Ads', 'SEO', 'Direct'],
+        'browser': ['Chrome', 'Chrome', 'Opera', 'Safari'],
+        'sex': ['M', 'F', 'M', 'M'],
+        'age': [39, 53, 53, 41],
+        'class': [0, 0, 1, 0],
+        'country': ['Japan', 'United States', 'Unknown', 'Japan'],
+        'hour_of_day': [2, 1, 18, 13],
+        'day_of_week': [5, 0, 3, 0],
+        'time_since_signup': [1251.85, 4.98, 0.0003, 3046.68],
+        'user_txn_count': [1, 1, 2, 1],
+        'user_total_spent': [34, 16, 30, 44],
+        'user_avg_purchase': [34.0, 16.0, 15.0, 44.0]
+    })
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".feather"])
+def test_round_trip_applies_schema(tmp_path, engineered_df, suffix):
+    path = tmp_path / f"engineered{suffix}"
+    write_table(engineered_df, path, schema=FRAUD_ENGINEERED_SCHEMA)
+    loaded = read_table(path, schema=FRAUD_ENGINEERED_SCHEMA)
+
+    assert loaded['user_txn_count'].dtype == 'int32'
+    assert loaded['country'].dtype == 'category'
+    pd.testing.assert_frame_equal(
+        loaded.astype(str), engineered_df.astype(str), check_dtype=False
+    )
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_projection_and_filters(tmp_path, engineered_df, suffix):
+    path = tmp_path / f"engineered{suffix}"
+    write_table(engineered_df, path, schema=FRAUD_ENGINEERED_SCHEMA)
+    loaded = read_table(path, columns=['purchase_value', 'country'],
+                        filters=[('country', 'in', ['Japan']), ('purchase_value', '>', 40)])
+    assert list(loaded.columns) == ['purchase_value', 'country']
+    assert loaded['purchase_value'].tolist() == [44]
+
+def test_appender_handles_new_categories(tmp_path, engineered_df):
+    path = tmp_path / "engineered.parquet"
+    with TableAppender(path, schema=FRAUD_ENGINEERED_SCHEMA) as appender:
+        appender.write(engineered_df.iloc[:2])
+        appender.write(engineered_df.iloc[2:])
+    loaded = read_table(path, schema=FRAUD_ENGINEERED_SCHEMA)
+    assert loaded['country'].tolist() == engineered_df['country'].tolist()
+
+def test_unsupported_format(tmp_path, engineered_df):
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        write_table(engineered_df, tmp_path / "engineered.xlsx")
+
+def test_creditcard_csv_keeps_full_precision(tmp_path):
+    # The two rows differ only beyond float32 precision
+    raw = pd.DataFrame({'Time': [0.0, 0.0], 'V1': [-1.3598071336738, -1.3598071336739],
+                        'Amount': [149.62, 149.62], 'Class': [0, 0]})
+    raw.to_csv(tmp_path / 'creditcard.csv', index=False)
+    loaded = read_table(tmp_path / 'creditcard.csv', schema=CREDITCARD_SCHEMA)
+    assert loaded['V1'].dtype == 'float64' and len(remove_duplicates(loaded)) == 2
+    pd.testing.assert_frame_equal(loaded, raw, check_dtype=False)
+
+    write_table(loaded, tmp_path / 'compact.parquet', schema=CREDITCARD_COMPACT_SCHEMA)
+    assert read_table(tmp_path / 'compact.parquet')['V1'].dtype == 'float32'
@@ -0,0 +1,81 @@
+# tests/test_streaming.py
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_cleaning import remove_duplicates, remove_missing_values
+from src.data_processing import map_ips_to_countries
+from src.data_preprocessing import engineer_features
+from src.storage import FRAUD_ENGINEERED_SCHEMA
+from src.streaming import RowHashDeduplicator, stream_fraud_data
+
+@pytest.fixture
+def fraud_df():
+    rng = np.random.default_rng(0)
+    n = 40
+    df = pd.DataFrame({
+        'user_id': rng.integers(1, 8, n),
+        'signup_time': pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 1000, n), unit='min'),
+        'purchase_time': pd.Timestamp('2025-01-02') + pd.to_timedelta(rng.integers(0, 5000, n), unit='min'),
+        'purchase_value': rng.integers(10, 100, n),
+        'device_id': rng.choice(['D1', 'D2', 'D3'], n),
+        'source': rng.choice(['SEO', 'Ads'], n),
+        'browser': rng.choice(['Chrome', 'Safari'], n),
+        'sex': rng.choice(['M', 'F'], n),
+        'age': rng.integers(18, 60, n),
+        'ip_address': rng.uniform(0, 400, n).round(1),
+        'class': rng.integers(0, 2, n)
+    })
+    df.loc[5, 'browser'] = None
+    # duplicates within and across chunks
+    return pd.concat([df, df.iloc[[1, 2, 30]]], ignore_index=True)
+
+@pytest.fixture
+def ip_df():
+    return pd.DataFrame({
+        'lower_bound_ip_address': [0.0, 100.0, 250.0],
+        'upper_bound_ip_address': [99.0, 199.0, 300.0],
+        'country': ['A', 'B', 'C']
+    })
+
+def test_row_hash_deduplicator_across_chunks():
+    dedup = RowHashDeduplicator()
+    first = dedup.mask_new(pd.DataFrame({'a': [1, 2, 2], 'b': ['x', 'y', 'y']}))
+    second = dedup.mask_new(pd.DataFrame({'a': [2, 3], 'b': ['y', 'z']}))
+    assert first.tolist() == [True, True, False]
+    assert second.tolist() == [False, True]
+    assert len(dedup) == 3
+
+def test_stream_matches_in_memory(tmp_path, fraud_df, ip_df):
+    raw_path = tmp_path / 'fraud.csv'
+    fraud_df.to_csv(raw_path, index=False)
+
+    expected = pd.read_csv(raw_path)
+    expected = remove_missing_values(remove_duplicates(expected))
+    expected = engineer_features(map_ips_to_countries(expected, ip_df))
+
+    out_path = tmp_path / 'out.csv'
+    rows = stream_fraud_data(raw_path, ip_df, out_path, chunksize=7)
+    streamed = pd.read_csv(out_path)
+    expected = pd.read_csv(io.StringIO(expected.to_csv(index=False)))
+
+    assert rows == len(expected)
+    pd.testing.assert_frame_equal(streamed, expected)
+
+def test_stream_invalid_chunksize(tmp_path, fraud_df, ip_df):
+    raw_path = tmp_path / 'fraud.csv'
+    fraud_df.to_csv(raw_path, index=False)
+    with pytest.raises(ValueError):
+        stream_fraud_data(raw_path, ip_df, tmp_path / 'out.csv', chunksize=0)
+
+@pytest.mark.parametrize('suffix', ['.csv', '.parquet'])
+def test_stream_replaces_stale_output_when_every_row_is_dropped(tmp_path, fraud_df, ip_df, suffix):
+    raw_path = tmp_path / 'fraud.csv'
+    fraud_df.to_csv(raw_path, index=False)
+    out_path = tmp_path / f'out{suffix}'
+    assert stream_fraud_data(raw_path, ip_df, out_path, chunksize=7) > 0
+
+    fraud_df.assign(browser=None).to_csv(raw_path, index=False)
+    assert stream_fraud_data(raw_path, ip_df, out_path, chunksize=7) == 0
+    empty = pd.read_csv(out_path) if suffix == '.csv' else pd.read_parquet(out_path)
+    assert empty.empty and list(empty.columns) == list(FRAUD_ENGINEERED_SCHEMA)
@@ -0,0 +1,40 @@
+# tests/test_velocity.py
+import pandas as pd
+import pytest
+from src.velocity import add_window_features
+
+@pytest.fixture
+def txns():
+    return pd.DataFrame({
+        'user_id': [1, 1, 2, 1, 1],
+        'device_id': ['D1', 'D2', 'D1', 'D1', 'D1'],
+        'ip_address': [10.0, 10.0, 20.0, 30.0, 10.0],
+        'purchase_time': ['2025-01-01 10:30:00', '2025-01-01 10:00:00', '2025-01-01 10:10:00',
+                          '2025-01-02 09:00:00', '2025-01-09 08:30:00'],
+    })
+
+def test_window_counts_and_gaps(txns):
+    result = add_window_features(txns)
+    assert result['user_txn_1h'].tolist() == [2, 1, 1, 1, 1]
+    assert result['user_txn_24h'].tolist() == [2, 1, 1, 3, 1]
+    assert result['user_txn_7d'].tolist() == [2, 1, 1, 3, 2]
+    assert result['device_txn_1h'].tolist() == [2, 1, 1, 1, 1]
+    assert result['ip_txn_7d'].tolist() == [2, 1, 1, 1, 1]
+    assert result['user_hours_since_prev'].tolist() == pytest.approx([0.5, -1.0, -1.0, 22.5, 167.5])
+
+def test_original_order_and_columns_kept(txns):
+    result = add_window_features(txns, entities=('user_id',), windows={'2h': pd.Timedelta(hours=2)})
+    assert list(result.columns) == list(txns.columns) + ['user_txn_2h', 'user_hours_since_prev']
+    pd.testing.assert_frame_equal(result[txns.columns], txns)
+
+def test_missing_column(txns):
+    with pytest.raises(ValueError, match="Missing required columns"):
+        add_window_features(txns.drop(columns=['device_id']))
+
+def test_tied_timestamps_count_each_other():
+    df = pd.DataFrame({
+        'user_id': [1, 1, 1],
+        'purchase_time': ['2025-01-01 10:00:00', '2025-01-01 10:00:00', '2025-01-01 09:30:00'],
+    })
+    out = add_window_features(df, entities=('user_id',))
+    assert out['user_txn_1h'].tolist() == [3, 3, 1]